@@ -141,6 +141,64 @@ INTERNAL_IPS = [
     '127.0.0.1',
 ]
 
+# BigTeam sync configuration
+# Number of commits written per transaction when ingesting VCS history
+BIGTEAM_SYNC_BATCH_SIZE = 500
+
+# Number of revisions imported between two checkpoints by import_history
+BIGTEAM_IMPORT_WINDOW_SIZE = 5000
+
+# Concurrent repository sync: worker pool size, 'thread' or 'process' workers,
+# and the maximum number of repositories fetched from one VCS host at a time
+BIGTEAM_SYNC_WORKERS = 4
+BIGTEAM_SYNC_WORKER_MODE = 'thread'
+BIGTEAM_SYNC_PER_HOST_LIMIT = 2
+
+# syncd scheduler: random spread of sync delays (fraction of the delay),
+# maximum backoff in seconds after failures, and how often (seconds) the
+# repository list is reloaded
+BIGTEAM_SYNC_JITTER = 0.1
+BIGTEAM_SYNC_MAX_BACKOFF = 3600
+BIGTEAM_SYNC_RELOAD_INTERVAL = 60
+
+# sync_worker: seconds after which a running job whose worker stopped
+# reporting progress is failed, so its repository can be queued again
+BIGTEAM_SYNC_JOB_TIMEOUT = 2 * 3600
+
+# Directory of the persistent bare Git mirrors (one per remote URL), and the
+# size in bytes above which the least recently used mirrors are evicted
+# (0 keeps every mirror)
+BIGTEAM_GIT_MIRROR_DIR = BASE_DIR / 'git-mirrors'
+BIGTEAM_GIT_MIRROR_MAX_SIZE = 10 * 1024 ** 3
+
+# Commits read from git at a time when walking a Git history; bounds memory
+# on a first sync of a large repository
+BIGTEAM_GIT_PAGE_SIZE = 1000
+
+# Read repositories stored on this host (file:// URLs or absolute paths) in
+# place: Git without a mirror, SVN with svnlook instead of the svn client
+BIGTEAM_READ_LOCAL_IN_PLACE = True
+
+# SVN: number of (path, revision) node kinds remembered when the log does not
+# report whether a changed path is a file or a directory
+BIGTEAM_SVN_PATH_KIND_CACHE_SIZE = 100000
+
+# SVN: number of (file, last changed revision) binary flags remembered; the
+# svn:mime-type of all files changed by a revision is read in one request
+BIGTEAM_SVN_MIME_TYPE_CACHE_SIZE = 100000
+
+# SVN: files larger than this (bytes) are skipped when counting the lines of
+# added or deleted files; 0 counts every file
+BIGTEAM_SVN_LINE_COUNT_MAX_SIZE = 50 * 1024 ** 2
+
+# SVN: largest window of revisions read with one svn log request. Windows
+# start small and grow while the server answers quickly
+BIGTEAM_SVN_LOG_MAX_WINDOW = 5000
+
+# SVN: server certificate failures accepted without a prompt, comma separated
+# (unknown-ca, cn-mismatch, expired, not-yet-valid, other); '' accepts none
+BIGTEAM_SVN_TRUST_SERVER_CERT_FAILURES = 'not-yet-valid'
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -1,20 +1,28 @@
+from datetime import timedelta
+
 from django.contrib import admin
-from .models import Repository, CommitLog, Author
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from .models import Repository, CommitLog, Author, SyncJob, SyncRun
 
 
 @admin.register(Repository)
 class RepositoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'vcs_type', 'url', 'last_sync', 'commit_count')
+    list_display = ('name', 'vcs_type', 'url', 'last_sync', 'commit_count', 'import_progress')
     list_filter = ('vcs_type', 'created_at', 'last_sync')
     search_fields = ('name', 'desc', 'url')
-    readonly_fields = ('created_at', 'updated_at', 'last_sync')
+    readonly_fields = ('created_at', 'updated_at', 'last_sync', 'sync_skips', 'import_progress')
     
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'desc', 'url', 'sourceview')
         }),
         ('VCS Configuration', {
-            'fields': ('vcs_type', 'branch'),
+            'fields': ('vcs_type', 'branch', 'path', 'fork_of', 'sync_interval'),
             'description': 'Version Control System settings'
         }),
         ('Authentication', {
@@ -23,7 +31,7 @@ class RepositoryAdmin(admin.ModelAdmin):
             'description': 'Authentication credentials for repository access'
         }),
         ('Metadata', {
-            'fields': ('created_at', 'updated_at', 'last_sync'),
+            'fields': ('created_at', 'updated_at', 'last_sync', 'sync_skips', 'import_progress'),
             'classes': ('collapse',),
         }),
     )
@@ -32,17 +40,18 @@ class RepositoryAdmin(admin.ModelAdmin):
         return obj.commits.count()
     commit_count.short_description = 'Commits'
     
+    def import_progress(self, obj):
+        return obj.import_progress()
+    import_progress.short_description = 'Import progress'
+    
     actions = ['update_repositories']
     
     def update_repositories(self, request, queryset):
-        updated_count = 0
-        for repo in queryset:
-            if repo.update():
-                updated_count += 1
+        jobs = SyncJob.enqueue(queryset)
         
         self.message_user(
             request,
-            f'Successfully updated {updated_count} of {queryset.count()} repositories.'
+            f'Queued {len(jobs)} of {queryset.count()} repositories for update.'
         )
     update_repositories.short_description = 'Update selected repositories'
 
@@ -81,3 +90,91 @@ class CommitLogAdmin(admin.ModelAdmin):
         # Optimize queries by selecting related objects
         return super().get_queryset(request).select_related('repository', 'author')
 
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('repository', 'status', 'commits_ingested', 'created_at', 'duration')
+    list_filter = ('status', 'repository')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+    
+    def duration(self, obj):
+        seconds = obj.duration()
+        if seconds is None:
+            return ''
+        return f'{seconds:.1f}s'
+    duration.short_description = 'Duration'
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('repository')
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = ('repository', 'status', 'started_at', 'commit_count', 'duration_display',
+                    'throughput', 'connect_time', 'head_time', 'fetch_time', 'parse_time',
+                    'author_time', 'write_time', 'objects_fetched', 'bytes_fetched')
+    list_filter = ('status', 'repository', 'repository__vcs_type')
+    date_hierarchy = 'started_at'
+    readonly_fields = [field.name for field in SyncRun._meta.fields]
+    
+    # Days of history shown by the throughput view
+    THROUGHPUT_DAYS = 30
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def duration_display(self, obj):
+        return f'{obj.duration:.1f}s'
+    duration_display.short_description = 'Duration'
+    
+    def throughput(self, obj):
+        return f'{obj.throughput():.1f}/s'
+    throughput.short_description = 'Commits/s'
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('repository')
+    
+    def get_urls(self):
+        urls = [
+            path('throughput/', self.admin_site.admin_view(self.throughput_view),
+                 name='commits_syncrun_throughput'),
+        ]
+        return urls + super().get_urls()
+    
+    def throughput_view(self, request):
+        """
+        Daily throughput and average phase times per repository, to show
+        which phase slows the syncs of a repository down.
+        """
+        since = timezone.now() - timedelta(days=self.THROUGHPUT_DAYS)
+        rows = list(SyncRun.objects.filter(started_at__gte=since)
+                .exclude(status='skipped')
+                .annotate(day=TruncDate('started_at'))
+                .values('repository__name', 'day')
+                .annotate(runs=Count('id'),
+                          failures=Count('id', filter=Q(status='failed')),
+                          commits=Sum('commit_count'),
+                          duration=Sum('duration'),
+                          connect=Avg('connect_time'),
+                          head=Avg('head_time'),
+                          fetch=Avg('fetch_time'),
+                          parse=Avg('parse_time'),
+                          authors=Avg('author_time'),
+                          write=Avg('write_time'))
+                .order_by('repository__name', '-day'))
+        
+        for row in rows:
+            row['throughput'] = row['commits'] / row['duration'] if row['duration'] else 0
+            phases = {name: row[name] or 0 for name in
+                      ('connect', 'head', 'fetch', 'parse', 'authors', 'write')}
+            row['bottleneck'] = max(phases, key=phases.get) if any(phases.values()) else ''
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Sync throughput',
+            'opts': self.model._meta,
+            'days': self.THROUGHPUT_DAYS,
+            'rows': rows,
+        }
+        return TemplateResponse(request, 'admin/commits/syncrun/throughput.html', context)
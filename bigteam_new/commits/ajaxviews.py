@@ -1,7 +1,7 @@
 # Create Ajax views here.
 from django.http import HttpResponse
 from django.shortcuts import redirect, get_object_or_404
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Max
 import datetime
 from .models import *
 from django.core import serializers
@@ -146,3 +146,26 @@ def commits_project(request):
     return HttpResponse(json.dumps(list(commits)), 'application/json')
 
 
+
+#Status data
+#ajax view for repository sync jobs
+#return a list of {"repository__id", "repository__name", "status", "commits_ingested", "duration", "error"}
+#for the latest job of every repository
+def sync_status(request):
+    if not is_ajax(request):
+        return HttpResponse(status=400)
+
+    latest = SyncJob.objects.values('repository').annotate(latest_id=Max('id'))
+    jobs = SyncJob.objects.filter(pk__in=latest.values('latest_id'))
+    jobs = jobs.select_related('repository').order_by('repository__name')
+
+    data = [{
+        'repository__id': job.repository_id,
+        'repository__name': job.repository.name,
+        'status': job.status,
+        'commits_ingested': job.commits_ingested,
+        'duration': job.duration(),
+        'error': job.error,
+    } for job in jobs]
+
+    return HttpResponse(json.dumps(data), 'application/json')
@@ -0,0 +1,119 @@
+"""
+Author identity resolution for commit ingestion.
+"""
+
+import logging
+import threading
+
+from django.db.models import Q
+
+from .models import Author
+
+logger = logging.getLogger(__name__)
+
+
+class AuthorResolver:
+    """
+    Sync-scoped cache mapping VCS identities to Author rows.
+
+    All authors are loaded into dicts keyed by account and by email when the
+    resolver is created, so resolving an identity is a dict lookup. Unknown
+    identities are looked up and created in bulk. One resolver may be shared
+    by several repositories syncing at once; access is serialized by a lock
+    and concurrent creation of the same author is absorbed by the
+    ``(account, email)`` unique key.
+    """
+
+    def __init__(self, preload=True):
+        self._by_account = {}
+        self._by_email = {}
+        self._lock = threading.Lock()
+        if preload:
+            self.load()
+
+    def load(self):
+        """
+        (Re)load all authors from the database.
+        """
+        with self._lock:
+            self._by_account.clear()
+            self._by_email.clear()
+            for author in Author.objects.order_by('id'):
+                self._remember(author)
+        logger.debug(f'Loaded {len(self._by_account)} authors')
+
+    def _remember(self, author):
+        self._by_account.setdefault(author.account, author)
+        if author.email:
+            self._by_email.setdefault(author.email, author)
+
+    def _lookup(self, account, email):
+        """
+        Find a cached author by account first, then by email.
+        """
+        author = self._by_account.get(account)
+        if author is None and email:
+            author = self._by_email.get(email)
+            if author is not None and author.account != account:
+                # Same person committing under a new account name; the old
+                # name may belong to another author with a different email
+                if self._by_account.get(author.account) is author:
+                    del self._by_account[author.account]
+                author.account = account
+                Author.objects.filter(pk=author.pk).update(account=account)
+                self._by_account[account] = author
+        return author
+
+    def resolve(self, account, email=''):
+        """
+        Get or create the author for a single identity.
+        """
+        return self.resolve_many([(account, email)])[(account, email)]
+
+    def resolve_many(self, identities):
+        """
+        Resolve several (account, email) identities at once.
+
+        Returns:
+            dict: (account, email) -> Author
+        """
+        identities = set(identities)
+
+        with self._lock:
+            missing = {identity for identity in identities
+                       if self._lookup(*identity) is None}
+            if missing:
+                self._fetch(missing)
+                missing = {identity for identity in missing
+                           if self._lookup(*identity) is None}
+            if missing:
+                self._create(missing)
+
+            return {identity: self._lookup(*identity) for identity in identities}
+
+    def _fetch(self, identities):
+        """
+        Load authors created since the cache was filled, e.g. by another sync.
+        """
+        accounts = {account for account, email in identities}
+        emails = {email for account, email in identities if email}
+        for author in Author.objects.filter(
+                Q(account__in=accounts) | Q(email__in=emails)).order_by('id'):
+            self._remember(author)
+
+    def _create(self, identities):
+        """
+        Create missing authors with one bulk insert.
+        """
+        # Several identities may share an account; the first one wins, the
+        # others resolve to it through the account lookup.
+        new_authors = {}
+        for account, email in sorted(identities):
+            new_authors.setdefault(account, Author(
+                account=account, display=account, email=email))
+        Author.objects.bulk_create(new_authors.values(), ignore_conflicts=True)
+
+        # ignore_conflicts does not return primary keys; read the rows back
+        self._fetch({(author.account, author.email)
+                     for author in new_authors.values()})
+        logger.debug(f'Created {len(new_authors)} authors')
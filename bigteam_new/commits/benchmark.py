@@ -0,0 +1,292 @@
+"""
+Ingestion benchmarks against synthetic local repositories.
+
+Repositories are generated on disk (Git with ``git fast-import``, SVN with
+``svnadmin load``) so the benchmarks need no network. Each case reports
+commits per second, database queries per commit and the peak RSS of the
+process; the benchmark_sync management command writes them to JSON.
+"""
+
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+import django
+from django.db import connection
+from django.test.utils import override_settings
+
+from .models import Repository
+
+logger = logging.getLogger(__name__)
+
+# Start of the synthetic history; commits are one minute apart
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+# Files touched round-robin by the synthetic commits
+FILE_COUNT = 20
+
+
+def _identity(number, authors):
+    author = f'author{number % authors}'
+    return author, f'{author}@example.com'
+
+
+def _content(number):
+    return ''.join(f'revision {number} line {line}\n' for line in range(10)).encode()
+
+
+def make_git_repository(path, commit_count, authors=1, branch='main'):
+    """
+    Create a Git repository with ``commit_count`` commits by ``authors``
+    different authors on ``branch``.
+
+    Returns:
+        str: path of the repository, usable as a Repository URL
+    """
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(['git', 'init', '-q', '-b', branch, path], check=True)
+
+    stream = bytearray()
+    for number in range(commit_count):
+        name, email = _identity(number, authors)
+        timestamp = int((EPOCH + timedelta(minutes=number)).timestamp())
+        message = f'commit {number}\n'.encode()
+        content = _content(number)
+        stream += f'commit refs/heads/{branch}\n'.encode()
+        stream += f'author {name} <{email}> {timestamp} +0000\n'.encode()
+        stream += f'committer {name} <{email}> {timestamp} +0000\n'.encode()
+        stream += b'data %d\n%s' % (len(message), message)
+        stream += f'M 100644 inline file{number % FILE_COUNT}.txt\n'.encode()
+        stream += b'data %d\n%s\n' % (len(content), content)
+
+    subprocess.run(['git', 'fast-import', '--quiet'], input=bytes(stream),
+                   cwd=path, check=True)
+    subprocess.run(['git', 'checkout', '-q', branch], cwd=path, check=True)
+    return path
+
+
+def _svn_props(props):
+    block = bytearray()
+    for key, value in props:
+        key, value = key.encode(), value.encode()
+        block += b'K %d\n%s\nV %d\n%s\n' % (len(key), key, len(value), value)
+    return bytes(block + b'PROPS-END\n')
+
+
+def make_svn_repository(path, commit_count, authors=1):
+    """
+    Create an SVN repository with ``commit_count`` revisions by ``authors``
+    different authors, loaded from a generated dump file.
+
+    Returns:
+        str: file:// URL of the repository
+    """
+    subprocess.run(['svnadmin', 'create', path], check=True)
+
+    stream = bytearray(b'SVN-fs-dump-format-version: 2\n\n')
+    date = EPOCH.strftime('%Y-%m-%dT%H:%M:%S.000000Z')
+    props = _svn_props([('svn:date', date)])
+    stream += b'Revision-number: 0\nProp-content-length: %d\nContent-length: %d\n\n%s\n' % (
+        len(props), len(props), props)
+
+    added = set()
+    for number in range(commit_count):
+        author, _ = _identity(number, authors)
+        date = (EPOCH + timedelta(minutes=number)).strftime('%Y-%m-%dT%H:%M:%S.000000Z')
+        props = _svn_props([('svn:log', f'commit {number}'),
+                            ('svn:author', author),
+                            ('svn:date', date)])
+        stream += b'Revision-number: %d\nProp-content-length: %d\nContent-length: %d\n\n%s\n' % (
+            number + 1, len(props), len(props), props)
+
+        filename = f'file{number % FILE_COUNT}.txt'
+        action = 'change' if filename in added else 'add'
+        added.add(filename)
+        content = _content(number)
+        stream += (f'Node-path: {filename}\nNode-kind: file\nNode-action: {action}\n'
+                   f'Text-content-length: {len(content)}\n'
+                   f'Content-length: {len(content)}\n\n').encode()
+        stream += content + b'\n\n'
+
+    subprocess.run(['svnadmin', 'load', '--quiet', path], input=bytes(stream), check=True)
+    return f'file://{os.path.abspath(path)}'
+
+
+class QueryCounter:
+    """
+    Count the SQL queries run on the default connection.
+
+    Unlike CaptureQueriesContext the queries are not kept, so large
+    benchmarks do not skew the memory figures.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+
+def peak_rss_kb():
+    """
+    Get the peak resident set size of the process in KiB.
+
+    The peak never goes down, so a case only shows up when it raises the
+    peak of the cases run before it.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if platform.system() == 'Darwin' else peak
+
+
+def _result(name, vcs, commits, seconds, queries, timer=None):
+    return {
+        'name': name,
+        'vcs': vcs,
+        'commits': commits,
+        'seconds': round(seconds, 4),
+        'commits_per_sec': round(commits / seconds, 1) if seconds else 0.0,
+        'queries': queries,
+        'queries_per_commit': round(queries / commits, 3) if commits else None,
+        'peak_rss_kb': peak_rss_kb(),
+        'phases': {phase: round(elapsed, 4) for phase, elapsed in timer.durations.items()}
+                  if timer is not None else {},
+    }
+
+
+def bench_client(repository, in_place=True):
+    """
+    Read the whole history through the VCS backend alone, without storing it.
+
+    Args:
+        in_place: read the generated repository where it is; False reads it
+            as a remote one, through a Git mirror or the svn client
+    """
+    with override_settings(BIGTEAM_READ_LOCAL_IN_PLACE=in_place):
+        client = repository.get_vcs_client()
+    name = f'{repository.vcs_type}-client'
+    if not in_place:
+        name += '-mirror' if repository.vcs_type == 'git' else '-log'
+    try:
+        with QueryCounter() as queries:
+            started = perf_counter()
+            head = client.get_latest_revision()
+            if repository.vcs_type == 'svn':
+                commits = client.iter_commits(start_revision='1', end_revision=head)
+            else:
+                commits = client.iter_commits(end_revision=head)
+            commit_count = sum(1 for _ in client.timer.iterate(commits, 'parse'))
+            seconds = perf_counter() - started
+    finally:
+        client.cleanup()
+    return _result(name, repository.vcs_type,
+                   commit_count, seconds, queries.count, client.timer)
+
+
+def bench_update(repository, name):
+    """
+    Run Repository.update() and report the SyncRun it records.
+    """
+    with QueryCounter() as queries:
+        started = perf_counter()
+        if not repository.update():
+            raise RuntimeError(f'Sync of {repository.name} failed')
+        seconds = perf_counter() - started
+
+    run = repository.sync_runs.order_by('-id').first()
+    result = _result(name, repository.vcs_type, run.commit_count, seconds, queries.count)
+    result['phases'] = {
+        'connect': run.connect_time, 'head': run.head_time, 'fetch': run.fetch_time,
+        'parse': run.parse_time, 'authors': run.author_time, 'write': run.write_time,
+    }
+    return result
+
+
+def run_benchmarks(workdir, vcs_types=('git', 'svn'), commit_count=1000, authors=10):
+    """
+    Generate repositories in ``workdir`` and benchmark every backend on them.
+
+    Runs against whatever database is configured, so callers should point
+    Django at a scratch database first.
+
+    Returns:
+        dict: benchmark parameters, environment and one result per case
+    """
+    results = []
+    # Start from empty Git mirrors: the git-client-mirror case pays for the
+    # initial fetch. The other cases follow BIGTEAM_READ_LOCAL_IN_PLACE,
+    # which reads the generated repositories in place when on
+    mirror_dir = os.path.join(workdir, 'mirrors')
+    shutil.rmtree(mirror_dir, ignore_errors=True)
+    mirrors = override_settings(BIGTEAM_GIT_MIRROR_DIR=mirror_dir)
+    mirrors.enable()
+    try:
+        for vcs_type in vcs_types:
+            path = os.path.join(workdir, vcs_type)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            try:
+                if vcs_type == 'git':
+                    url = make_git_repository(path, commit_count, authors)
+                else:
+                    url = make_svn_repository(path, commit_count, authors)
+                repository = Repository.objects.create(
+                    name=f'benchmark-{vcs_type}', url=url, vcs_type=vcs_type, branch='main')
+                repository.get_vcs_client()
+            except (OSError, ImportError, subprocess.CalledProcessError) as e:
+                logger.warning(f'Skipping {vcs_type} benchmarks: {e}')
+                results.append({'name': f'{vcs_type}-skipped', 'vcs': vcs_type, 'error': str(e)})
+                continue
+
+            results.append(bench_client(repository))
+            results.append(bench_client(repository, in_place=False))
+            results.append(bench_update(repository, f'{vcs_type}-update'))
+            results.append(bench_update(repository, f'{vcs_type}-update-unchanged'))
+    finally:
+        mirrors.disable()
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'commits': commit_count,
+        'authors': authors,
+        'results': results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Find cases of ``report`` slower than in ``baseline``.
+
+    Args:
+        report: benchmark report from run_benchmarks()
+        baseline: earlier report to compare with
+        tolerance: accepted throughput drop as a fraction, e.g. 0.2
+
+    Returns:
+        list: (case name, baseline commits/sec, current commits/sec)
+    """
+    previous = {result['name']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result['name'], {}).get('commits_per_sec')
+        current = result.get('commits_per_sec')
+        if before and current is not None and current < before * (1 - tolerance):
+            regressions.append((result['name'], before, current))
+    return regressions
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from commits.benchmark import compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Benchmark commit ingestion against generated local Git and SVN '
+            'repositories and write the results as JSON. Runs on a scratch '
+            'database, never on the configured one.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vcs', nargs='+', choices=['git', 'svn'], default=['git', 'svn'],
+                            help='backends to benchmark (default: both)')
+        parser.add_argument('--commits', type=int, default=1000,
+                            help='commits in each generated repository (default: 1000)')
+        parser.add_argument('--authors', type=int, default=10,
+                            help='distinct authors in each repository (default: 10)')
+        parser.add_argument('--output', default='benchmark.json',
+                            help='JSON file the results are written to')
+        parser.add_argument('--baseline',
+                            help='earlier JSON results; fail if a case got slower')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='accepted commits/sec drop against the baseline (default: 0.2)')
+        parser.add_argument('--workdir',
+                            help='keep the generated repositories in this directory')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)
+
+        workdir = options['workdir'] or tempfile.mkdtemp(prefix='bigteam_bench_')
+        os.makedirs(workdir, exist_ok=True)
+
+        # Benchmark on a throwaway database next to the repositories
+        if connection.vendor == 'sqlite':
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+                workdir, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                                      serialize=False)
+        try:
+            report = run_benchmarks(workdir, options['vcs'], options['commits'],
+                                    options['authors'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if not options['workdir']:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+        for result in report['results']:
+            if 'error' in result:
+                self.stdout.write(self.style.WARNING(f"{result['name']}: {result['error']}"))
+                continue
+            self.stdout.write(
+                f"{result['name']:<24} {result['commits']:>7} commits "
+                f"{result['commits_per_sec']:>9.1f} commits/s "
+                f"{result['queries_per_commit'] or 0:>7.3f} queries/commit "
+                f"{result['peak_rss_kb']:>8} KiB peak RSS")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if baseline is not None:
+            regressions = compare(report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError('Ingestion got slower: ' + ', '.join(
+                    f'{name} {before:.1f} -> {current:.1f} commits/s'
+                    for name, before, current in regressions))
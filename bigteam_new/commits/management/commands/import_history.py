@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from commits.models import Repository
+
+
+class Command(BaseCommand):
+    help = ('Import the full history of repositories in checkpointed windows. '
+            'An interrupted import continues where it stopped when run again.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('repository_ids', nargs='+', type=int,
+                            help='IDs of the repositories to import')
+        parser.add_argument('--window', type=int, default=None,
+                            help='revisions per checkpoint (default: BIGTEAM_IMPORT_WINDOW_SIZE)')
+
+    def handle(self, *args, **options):
+        for repository_id in options['repository_ids']:
+            try:
+                repo = Repository.objects.get(pk=repository_id)
+            except Repository.DoesNotExist:
+                raise CommandError(f'Repository {repository_id} does not exist')
+
+            new_commits_count = repo.import_history(window_size=options['window'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Imported {repo.name}: {new_commits_count} new commits '
+                f'({repo.import_progress()} revisions)'
+            ))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from commits.models import SyncJob
+from commits.sync import SyncEngine
+
+
+class Command(BaseCommand):
+    help = ('Process queued repository sync jobs. Jobs are queued by the '
+            '"Update" link and the admin "Update selected repositories" action.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='process the jobs queued now and exit')
+        parser.add_argument('--poll', type=float, default=5.0,
+                            help='seconds to wait between checks of an empty queue')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='repositories fetched at once (default: BIGTEAM_SYNC_WORKERS)')
+
+    def handle(self, *args, **options):
+        engine = SyncEngine(workers=options['workers'])
+        while True:
+            jobs = SyncJob.claim(limit=engine.workers * 4)
+            if jobs:
+                self.process(engine, jobs)
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll'])
+
+    def process(self, engine, jobs):
+        jobs_by_repository = {job.repository_id: job for job in jobs}
+
+        def on_progress(repository, new_commits_count):
+            job = jobs_by_repository[repository.pk]
+            job.commits_ingested = new_commits_count
+            # Also a heartbeat, see SyncJob.reclaim_stale()
+            job.save(update_fields=['commits_ingested', 'updated_at'])
+
+        def on_finish(repository, success, error):
+            jobs_by_repository.pop(repository.pk).finish(success, error)
+
+        try:
+            updated_count, failed_count = engine.run(
+                [job.repository for job in jobs],
+                on_progress=on_progress, on_finish=on_finish)
+        finally:
+            # Anything the engine did not report on must not stay 'running',
+            # also when the engine itself failed
+            for job in jobs_by_repository.values():
+                job.finish(False, 'Sync did not complete')
+
+        self.stdout.write(f'Processed {len(jobs)} sync jobs: '
+                          f'{updated_count} successful, {failed_count} failed')
@@ -0,0 +1,32 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from commits.scheduler import SyncScheduler
+
+
+class Command(BaseCommand):
+    help = ('Run the sync daemon: keep every repository in sync on its own '
+            'schedule until interrupted.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='repositories fetched at once (default: BIGTEAM_SYNC_WORKERS)')
+        parser.add_argument('--per-host', type=int, default=None,
+                            help='repositories fetched from one host at once '
+                                 '(default: BIGTEAM_SYNC_PER_HOST_LIMIT)')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.serve(options['workers'], options['per_host']))
+
+    async def serve(self, workers, per_host_limit):
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop_event.set)
+
+        self.stdout.write('Sync daemon started')
+        scheduler = SyncScheduler(workers=workers, per_host_limit=per_host_limit)
+        await scheduler.run(stop_event)
+        self.stdout.write('Sync daemon stopped')
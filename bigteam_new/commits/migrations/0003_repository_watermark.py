@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:08
+
+from django.db import migrations, models
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast
+
+
+def seed_watermarks(apps, schema_editor):
+    """
+    Derive the watermark of already synced repositories from their commits.
+    """
+    Repository = apps.get_model('commits', 'Repository')
+    CommitLog = apps.get_model('commits', 'CommitLog')
+
+    for repo in Repository.objects.all():
+        commits = CommitLog.objects.filter(repository=repo)
+        if repo.vcs_type == 'svn':
+            revision = commits.aggregate(
+                revision=Max(Cast('revision', IntegerField())))['revision']
+            watermark = {'revision': revision} if revision else {}
+        else:
+            # Same rule the old getLastStoredRev() used
+            last_commit = commits.order_by('-id').first()
+            watermark = ({'refs': {repo.branch or 'main': last_commit.revision}}
+                         if last_commit else {})
+        Repository.objects.filter(pk=repo.pk).update(watermark=watermark)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0002_author_email_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='watermark',
+            field=models.JSONField(blank=True, default=dict, verbose_name='sync watermark'),
+        ),
+        migrations.RunPython(seed_watermarks, migrations.RunPython.noop),
+    ]
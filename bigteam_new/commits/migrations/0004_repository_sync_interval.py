@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0003_repository_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='sync_interval',
+            field=models.PositiveIntegerField(default=300, help_text='Seconds between automatic syncs', verbose_name='sync interval'),
+        ),
+    ]
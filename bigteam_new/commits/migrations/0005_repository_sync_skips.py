@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0004_repository_sync_interval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='sync_skips',
+            field=models.PositiveIntegerField(default=0, verbose_name='skipped syncs'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0006_syncjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('success', 'Success'), ('skipped', 'Skipped'), ('failed', 'Failed')], max_length=10, verbose_name='status')),
+                ('started_at', models.DateTimeField(verbose_name='started at')),
+                ('finished_at', models.DateTimeField(verbose_name='finished at')),
+                ('duration', models.FloatField(default=0, verbose_name='duration (s)')),
+                ('commit_count', models.PositiveIntegerField(default=0, verbose_name='commits')),
+                ('start_revision', models.CharField(blank=True, max_length=100, verbose_name='from revision')),
+                ('end_revision', models.CharField(blank=True, max_length=100, verbose_name='to revision')),
+                ('objects_fetched', models.PositiveIntegerField(default=0, verbose_name='objects fetched')),
+                ('bytes_fetched', models.BigIntegerField(default=0, verbose_name='bytes fetched')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('connect_time', models.FloatField(default=0, verbose_name='connect (s)')),
+                ('head_time', models.FloatField(default=0, verbose_name='head lookup (s)')),
+                ('fetch_time', models.FloatField(default=0, verbose_name='fetch (s)')),
+                ('parse_time', models.FloatField(default=0, verbose_name='log parse (s)')),
+                ('author_time', models.FloatField(default=0, verbose_name='authors (s)')),
+                ('write_time', models.FloatField(default=0, verbose_name='write (s)')),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_runs', to='commits.repository')),
+            ],
+            options={
+                'verbose_name': 'Sync Run',
+                'verbose_name_plural': 'Sync Runs',
+                'db_table': 'commits_syncrun',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['repository', 'started_at'], name='commits_syn_reposit_f91829_idx')],
+            },
+        ),
+    ]
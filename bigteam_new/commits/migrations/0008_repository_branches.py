@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0007_syncrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='repository',
+            name='branch',
+            field=models.CharField(blank=True, default='main', help_text='Git branches to monitor: names or globs separated by commas, e.g. "main, release/*" (default: main)', max_length=255, verbose_name='Branch'),
+        ),
+    ]
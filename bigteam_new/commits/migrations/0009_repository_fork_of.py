@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0008_repository_branches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='fork_of',
+            field=models.ForeignKey(blank=True, help_text='Git repository this one is a fork of', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forks', to='commits.repository', verbose_name='fork of'),
+        ),
+    ]
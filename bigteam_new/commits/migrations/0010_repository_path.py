@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0009_repository_fork_of'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='path',
+            field=models.CharField(blank=True, default='', help_text='Git subdirectory to track, e.g. "services/api"; only commits touching it are stored (default: all)', max_length=255, verbose_name='Path'),
+        ),
+    ]
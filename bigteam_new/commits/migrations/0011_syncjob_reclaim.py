@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # Concurrent enqueues could queue a repository twice; keep the newest job
+    SyncJob = apps.get_model('commits', 'SyncJob')
+    active = set()
+    for job in SyncJob.objects.filter(status__in=['queued', 'running']).order_by('-created_at'):
+        if job.repository_id in active:
+            SyncJob.objects.filter(pk=job.pk).update(status='failed', error='Duplicate job')
+        active.add(job.repository_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commits', '0010_repository_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='syncjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('repository',), name='commits_syncjob_one_active'),
+        ),
+    ]
@@ -1,11 +1,38 @@
-from django.db import models
-from django.db.models import Max
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
 import logging
 
+from .timing import SyncTimer
+
 logger = logging.getLogger(__name__)
 
+# Number of commits written per transaction during ingestion
+SYNC_BATCH_SIZE = getattr(settings, 'BIGTEAM_SYNC_BATCH_SIZE', 500)
+
+# Number of revisions between two checkpoints of a history import
+IMPORT_WINDOW_SIZE = getattr(settings, 'BIGTEAM_IMPORT_WINDOW_SIZE', 5000)
+
+# Seconds after which a running sync job whose worker stopped reporting is
+# considered dead
+SYNC_JOB_TIMEOUT = getattr(settings, 'BIGTEAM_SYNC_JOB_TIMEOUT', 2 * 3600)
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of at most ``size`` items from ``iterable``.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class Repository(models.Model):
     """
@@ -24,8 +51,17 @@ class Repository(models.Model):
     
     # VCS type and configuration
     vcs_type = models.CharField('VCS Type', max_length=10, choices=VCS_CHOICES, default='svn')
-    branch = models.CharField('Branch', max_length=100, default='main', blank=True,
-                             help_text='Git branch to monitor (default: main)')
+    branch = models.CharField('Branch', max_length=255, default='main', blank=True,
+                             help_text='Git branches to monitor: names or globs separated '
+                                       'by commas, e.g. "main, release/*" (default: main)')
+    path = models.CharField('Path', max_length=255, blank=True, default='',
+                            help_text='Git subdirectory to track, e.g. "services/api"; '
+                                      'only commits touching it are stored (default: all)')
+    
+    # Upstream of a Git fork; the mirrors of both share their common objects
+    fork_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL,
+                                related_name='forks', verbose_name='fork of',
+                                help_text='Git repository this one is a fork of')
     
     # Authentication (common for both SVN and Git)
     username = models.CharField('username', max_length=50, blank=True)
@@ -37,6 +73,10 @@ class Repository(models.Model):
     access_token = models.CharField('Access Token', max_length=500, blank=True,
                                    help_text='GitHub/GitLab access token')
     
+    # Seconds between automatic syncs by the syncd scheduler
+    sync_interval = models.PositiveIntegerField('sync interval', default=300,
+                                                help_text='Seconds between automatic syncs')
+    
     # Optional source view URL
     sourceview = models.CharField('source view', max_length=500, null=True, blank=True)
     
@@ -44,6 +84,13 @@ class Repository(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     last_sync = models.DateTimeField(null=True, blank=True)
+    
+    # Point where the next sync resumes: {'revision': <int>} for SVN,
+    # {'refs': {<branch>: <sha>}} for Git. Advanced with each stored batch,
+    # or at the end of the sync when several Git branches are tracked.
+    watermark = models.JSONField('sync watermark', default=dict, blank=True)
+    # Syncs avoided because the remote head matched the watermark
+    sync_skips = models.PositiveIntegerField('skipped syncs', default=0)
 
     class Meta:
         db_table = 'commits_repository'
@@ -53,9 +100,14 @@ class Repository(models.Model):
     def __str__(self):
         return f"{self.name} ({self.vcs_type.upper()})"
 
-    def get_vcs_client(self):
+    def get_vcs_client(self, with_reference=True):
         """
         Get the appropriate VCS client based on the repository type.
+
+        Args:
+            with_reference: give the client of a Git fork the client of its
+                upstream, to share objects with it. The upstream's own
+                upstream is reached through its mirror, not another client.
         """
         if self.vcs_type == 'svn':
             from .vcs.svn_client import SVNClient
@@ -69,66 +121,267 @@ class Repository(models.Model):
             return GitClient(
                 repo_url=self.url,
                 branch=self.branch or 'main',
+                path=self.path,
                 username=self.username,
                 password=self.password,
                 ssh_key_path=self.ssh_key_path,
-                access_token=self.access_token
+                access_token=self.access_token,
+                reference=self.fork_of.get_vcs_client(with_reference=False)
+                if with_reference and self.fork_of and self.fork_of.vcs_type == 'git' else None
             )
         else:
             raise ValueError(f"Unsupported VCS type: {self.vcs_type}")
 
     def clear(self):
         """Clear all commits for this repository."""
-        CommitLog.objects.filter(repository=self).delete()
+        with transaction.atomic():
+            CommitLog.objects.filter(repository=self).delete()
+            Repository.objects.filter(pk=self.pk).update(watermark={})
+        self.watermark = {}
 
-    def update(self):
+    def update(self, resolver=None):
         """
         Update the repository by fetching new commits.
+
+        Every attempt is recorded as a SyncRun with its phase timings.
+
+        Args:
+            resolver: AuthorResolver shared with other repositories syncing
+                in the same run (created if omitted)
         """
+        timer = SyncTimer()
+        started_at = timezone.now()
+        last_stored_rev = self.getLastStoredRev()
+        head = None
+        new_commits_count = 0
+        
+        def record(status, error=''):
+            SyncRun.record(self, timer, status, new_commits_count, started_at=started_at,
+                           start_revision=last_stored_rev, end_revision=head, error=error)
+        
         try:
-            client = self.get_vcs_client()
-            
-            # Test connection first
-            if not client.test_connection():
-                logger.error(f'Connection test failed for repository {self.name}')
+            # One cheap round trip tells whether anything changed and
+            # doubles as the connection test
+            try:
+                with timer.phase('connect'):
+                    client = self.get_vcs_client()
+                    client.timer = timer
+                    head = client.probe_head()
+            except Exception as e:
+                logger.error(f'Connection test failed for repository {self.name}: {e}')
+                record('failed', f'Connection test failed: {e}')
                 return False
             
-            # Get last stored revision/commit
-            last_stored_rev = self.getLastStoredRev()
-            
-            # Get new commits
-            if self.vcs_type == 'svn':
-                latest_rev = client.get_latest_revision()
-                start_rev = max(1, int(last_stored_rev or '0') + 1)
-                end_rev = int(latest_rev)
-                
-                if start_rev <= end_rev:
-                    commits = client.get_commits(
-                        start_revision=str(start_rev),
-                        end_revision=str(end_rev)
-                    )
-                else:
-                    commits = []
-            else:  # Git
-                commits = client.get_new_commits(last_stored_rev)
+            if head == last_stored_rev:
+                self.mark_skipped()
+                record('skipped')
+                return True
             
-            # Store new commits
-            new_commits_count = 0
-            for commit in commits:
-                if self.store_commit(commit):
-                    new_commits_count += 1
+            # Drop what a force push removed before storing its replacements
+            with timer.phase('head'):
+                orphans = self.fetch_orphaned_commits(client, last_stored_rev, head)
+            if orphans:
+                self.remove_commits(orphans, timer=timer)
             
-            # Update last sync time
-            self.last_sync = datetime.now()
-            self.save(update_fields=['last_sync'])
+            # Store new commits as the client produces them, one batch at a time
+            commits = timer.iterate(self.fetch_new_commits(client, last_stored_rev, head), 'parse')
+            new_commits_count = self.store_commits(commits, resolver=resolver, timer=timer)
             
-            logger.info(f'Updated repository {self.name}: {new_commits_count} new commits')
+            self.mark_synced(new_commits_count, client.read_revision(head))
+            record('success')
             return True
             
         except Exception as e:
             logger.error(f'Exception updating repository {self.name}: {e}')
+            record('failed', str(e))
             return False
 
+    def fetch_new_commits(self, client, last_stored_rev, head=None):
+        """
+        Iterate over the commits added after ``last_stored_rev``.
+
+        Only talks to the VCS, never to the database, so it can run in a
+        sync worker thread or process.
+
+        Args:
+            client: VCS client of this repository
+            last_stored_rev: revision the sync resumes from
+            head: head revision from client.probe_head(), if already known
+        """
+        if self.vcs_type == 'svn':
+            latest_rev = head or client.get_latest_revision()
+            start_rev = max(1, int(last_stored_rev or '0') + 1)
+            end_rev = int(latest_rev)
+            
+            if start_rev <= end_rev:
+                return client.iter_commits(
+                    start_revision=str(start_rev),
+                    end_revision=str(end_rev)
+                )
+            return iter(())
+        else:  # Git
+            return client.iter_new_commits(last_stored_rev, head)
+
+    def fetch_orphaned_commits(self, client, last_stored_rev, head):
+        """
+        Find the stored commits that are no longer in the history, after a
+        Git force push.
+
+        Only talks to the VCS, like fetch_new_commits().
+
+        Returns:
+            list: revisions to remove with remove_commits()
+        """
+        if not last_stored_rev:
+            return []
+        return client.find_orphaned_commits(last_stored_rev, head)
+
+    def remove_commits(self, revisions, timer=None):
+        """
+        Delete stored commits, in batches of SYNC_BATCH_SIZE revisions.
+
+        Returns:
+            int: number of commits deleted
+        """
+        if timer is None:
+            timer = SyncTimer()
+
+        removed = 0
+        for chunk in chunked(revisions, SYNC_BATCH_SIZE):
+            with timer.phase('write'):
+                removed += self.commits.filter(revision__in=chunk).delete()[0]
+        logger.info(f'Removed {removed} rewritten commits from {self.name}')
+        return removed
+
+    def mark_synced(self, new_commits_count, head=None):
+        """
+        Record a successful sync.
+
+        Only call once every commit up to ``head`` was read and stored: the
+        watermark jumps to ``head``. After a failed fetch the watermark
+        stays where the last stored batch moved it. Pass the head from
+        client.read_revision(), which leaves out what wasn't read.
+
+        Args:
+            new_commits_count: number of commits stored by the sync
+            head: head revision the sync ran up to. For SVN the watermark
+                moves there, so revisions outside the repository path
+                don't make the next head probe look like a change. For Git
+                it holds the tips of all tracked branches, which become the
+                watermark. None leaves the watermark as it is.
+        """
+        self.last_sync = datetime.now()
+        self.save(update_fields=['last_sync'])
+        
+        if self.vcs_type == 'svn' and head and int(head) > self.watermark.get('revision', 0):
+            self.watermark = {**self.watermark, 'revision': int(head)}
+            Repository.objects.filter(pk=self.pk).update(watermark=self.watermark)
+        elif self.vcs_type == 'git' and head:
+            from .vcs.git_client import decode_tips
+            self.watermark = {**self.watermark, 'refs': decode_tips(head, self.branch or 'main')}
+            Repository.objects.filter(pk=self.pk).update(watermark=self.watermark)
+        
+        logger.info(f'Updated repository {self.name}: {new_commits_count} new commits')
+
+    def mark_skipped(self):
+        """
+        Record a sync that found the remote head unchanged.
+        """
+        self.last_sync = datetime.now()
+        Repository.objects.filter(pk=self.pk).update(
+            last_sync=self.last_sync, sync_skips=F('sync_skips') + 1)
+        
+        logger.info(f'Repository {self.name} unchanged, sync skipped')
+
+    def import_history(self, window_size=None, resolver=None):
+        """
+        Import the repository history in checkpointed windows.
+
+        History is stored ``window_size`` revisions at a time and a
+        checkpoint with the import progress is recorded after each window.
+        An interrupted import continues from the last stored batch on the
+        next run.
+
+        Returns:
+            int: number of new commits stored
+        """
+        window_size = window_size or IMPORT_WINDOW_SIZE
+        timer = SyncTimer()
+        started_at = timezone.now()
+        last_stored_rev = self.getLastStoredRev()
+        head = None
+        new_commits_count = 0
+        with timer.phase('connect'):
+            client = self.get_vcs_client()
+            client.timer = timer
+        try:
+            with timer.phase('head'):
+                head = client.get_latest_revision()
+                total = client.count_revisions(head)
+                done = client.count_revisions(last_stored_rev) if last_stored_rev else 0
+            
+            if self.vcs_type == 'svn':
+                # Windows of revision numbers; empty revisions still count
+                for start_rev in range(done + 1, total + 1, window_size):
+                    end_rev = min(start_rev + window_size - 1, total)
+                    commits = client.iter_commits(start_revision=str(start_rev),
+                                                  end_revision=str(end_rev))
+                    new_commits_count += self.store_commits(
+                        timer.iterate(commits, 'parse'), resolver=resolver, timer=timer)
+                    # Fetch errors propagate, so the window was read in full
+                    done = end_rev
+                    self._checkpoint_import(head, done, total, revision=end_rev)
+            else:  # Git
+                orphans = self.fetch_orphaned_commits(client, last_stored_rev, head)
+                if orphans:
+                    self.remove_commits(orphans, timer=timer)
+                commits = client.iter_commits(start_revision=last_stored_rev,
+                                              end_revision=head)
+                for window in chunked(timer.iterate(commits, 'parse'), window_size):
+                    new_commits_count += self.store_commits(window, resolver=resolver, timer=timer)
+                    done += len(window)
+                    self._checkpoint_import(head, done, total)
+            
+            # Only reached when the whole history up to head was read
+            self.mark_synced(new_commits_count, client.read_revision(head))
+            SyncRun.record(self, timer, 'success', new_commits_count, started_at=started_at,
+                           start_revision=last_stored_rev, end_revision=head)
+            return new_commits_count
+        except Exception as e:
+            SyncRun.record(self, timer, 'failed', new_commits_count, started_at=started_at,
+                           start_revision=last_stored_rev, end_revision=head, error=str(e))
+            raise
+        finally:
+            client.cleanup()
+
+    def _checkpoint_import(self, head, done, total, revision=None):
+        """
+        Record the progress of a history import.
+
+        Args:
+            head: head revision the import runs up to
+            done: revisions imported so far
+            total: revisions up to ``head``
+            revision: SVN revision the whole window was imported up to
+        """
+        watermark = dict(self.watermark)
+        if revision is not None and revision > watermark.get('revision', 0):
+            watermark['revision'] = revision
+        watermark['import'] = {'head': head, 'done': done, 'total': total}
+        Repository.objects.filter(pk=self.pk).update(watermark=watermark)
+        self.watermark = watermark
+        
+        logger.info(f'Importing repository {self.name}: {done}/{total} revisions')
+
+    def import_progress(self):
+        """
+        Get the progress of the last history import as 'done/total'.
+        """
+        progress = self.watermark.get('import')
+        if not progress:
+            return ''
+        return f"{progress['done']}/{progress['total']}"
+
     def store_commit(self, vcs_commit):
         """
         Store a VCS commit in the database.
@@ -170,47 +423,133 @@ class Repository(models.Model):
             logger.error(f'Error storing commit {vcs_commit.revision}: {e}')
             return False
 
+    def store_commits(self, vcs_commits, batch_size=None, resolver=None, timer=None):
+        """
+        Store VCS commits in the database in batches.
+
+        Commits are grouped into chunks of ``batch_size``. Each chunk resolves
+        its authors at once and is written with a single ``bulk_create`` in
+        its own transaction.
+
+        Args:
+            vcs_commits: iterable of VCSCommit objects from the VCS client
+            batch_size: number of commits per chunk (default: SYNC_BATCH_SIZE)
+            resolver: AuthorResolver shared by the sync (created if omitted)
+            timer: SyncTimer charged with the author and write phases
+
+        Returns:
+            int: number of commits that were not stored before
+        """
+        if resolver is None:
+            from .authors import AuthorResolver
+            resolver = AuthorResolver()
+        if timer is None:
+            timer = SyncTimer()
+
+        stored_count = 0
+        for chunk in chunked(vcs_commits, batch_size or SYNC_BATCH_SIZE):
+            stored_count += self._store_commit_batch(chunk, resolver, timer)
+        return stored_count
+
+    def _store_commit_batch(self, vcs_commits, resolver, timer):
+        """
+        Store one chunk of commits in a single transaction.
+        """
+        revisions = [commit.revision for commit in vcs_commits]
+
+        with timer.phase('write'), transaction.atomic():
+            existing = set(
+                self.commits.filter(revision__in=revisions)
+                .values_list('revision', flat=True)
+            )
+
+            # Skip stored commits and duplicates within the chunk
+            pending = {}
+            for commit in vcs_commits:
+                if commit.revision not in existing:
+                    pending.setdefault(commit.revision, commit)
+
+            if pending:
+                with timer.phase('authors'):
+                    authors = resolver.resolve_many(
+                        (commit.author, commit.author_email) for commit in pending.values()
+                    )
+                CommitLog.objects.bulk_create([
+                    CommitLog(
+                        repository=self,
+                        revision=commit.revision,
+                        time=commit.timestamp,
+                        author=authors[(commit.author, commit.author_email)],
+                        comment=commit.message
+                    )
+                    for commit in pending.values()
+                ], ignore_conflicts=True)
+
+            # Commits arrive oldest first, so the chunk's last commit is the
+            # point the next sync resumes from
+            watermark = self._advance_watermark(vcs_commits[-1])
+
+        self.watermark = watermark
+        logger.debug(f'Stored {len(pending)} commits for {self.name}')
+        return len(pending)
+
+    def _advance_watermark(self, vcs_commit):
+        """
+        Move the sync watermark to ``vcs_commit`` and save it.
+
+        Must run in the transaction that stores the commit.
+        """
+        watermark = dict(self.watermark)
+        if self.vcs_type == 'svn':
+            revision = int(vcs_commit.revision)
+            if revision <= watermark.get('revision', 0):
+                return watermark
+            watermark['revision'] = revision
+        elif self.tracks_single_branch():
+            refs = dict(watermark.get('refs', {}))
+            refs[self.branch or 'main'] = vcs_commit.revision
+            watermark['refs'] = refs
+        else:
+            # Commits of several branches arrive interleaved, so no single
+            # commit marks where each branch stands; mark_synced() stores
+            # all tips at the end and an interrupted sync is redone
+            return watermark
+
+        Repository.objects.filter(pk=self.pk).update(watermark=watermark)
+        return watermark
+
     def get_or_create_author(self, account, email=''):
         """
         Get or create an author record.
         """
-        try:
-            # Try to find by account name first
-            author = Author.objects.get(account=account)
-        except Author.DoesNotExist:
-            # Try to find by email if provided
-            if email:
-                try:
-                    author = Author.objects.get(email=email)
-                    # Update account name if different
-                    if author.account != account:
-                        author.account = account
-                        author.save()
-                except Author.DoesNotExist:
-                    author = None
-            
-            if not author:
-                # Create new author
-                author = Author(
-                    account=account,
-                    display=account,  # Default display name
-                    email=email
-                )
-                author.save()
-        
-        return author
+        from .authors import AuthorResolver
+        return AuthorResolver(preload=False).resolve(account, email)
 
     def getLastStoredRev(self):
         """
         Get the last stored revision/commit hash.
+
+        Read from the sync watermark: the last SVN revision number, or the
+        tip SHA of the tracked Git branch. When several Git branches are
+        tracked, their tips encoded as by GitClient.get_latest_revision().
+        Returns None before the first sync.
         """
-        try:
-            last_commit = self.commits.order_by('-id').first()
-            if last_commit:
-                return last_commit.revision
-            return None
-        except Exception:
-            return None
+        if self.vcs_type == 'svn':
+            revision = self.watermark.get('revision')
+            return str(revision) if revision else None
+        refs = self.watermark.get('refs', {})
+        if self.tracks_single_branch():
+            return refs.get(self.branch or 'main')
+        from .vcs.git_client import encode_tips
+        return encode_tips(refs) if refs else None
+
+    def tracks_single_branch(self):
+        """
+        Tell whether the Git branch setting names one branch, no list or glob.
+        """
+        from .vcs.git_client import parse_branches
+        branches = parse_branches(self.branch)
+        return len(branches) == 1 and not any(char in branches[0] for char in '*?[')
 
 
 class Author(models.Model):
@@ -219,7 +558,7 @@ class Author(models.Model):
     """
     account = models.CharField('account name', max_length=50)
     display = models.CharField('display name', max_length=50, blank=True)
-    email = models.EmailField('email address', max_length=254, blank=True)
+    email = models.EmailField('email address', max_length=254, blank=True, db_index=True)
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -292,22 +631,236 @@ class CommitLog(models.Model):
             return f"{self.repository.sourceview}/commit/{self.revision}"
 
 
+class SyncJob(models.Model):
+    """
+    Queued request to sync one repository, processed by the sync_worker
+    management command.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    repository = models.ForeignKey(Repository, related_name='sync_jobs', on_delete=models.CASCADE)
+    status = models.CharField('status', max_length=10, choices=STATUS_CHOICES, default='queued')
+    commits_ingested = models.PositiveIntegerField('commits ingested', default=0)
+    error = models.TextField('error', blank=True)
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Last sign of life of the worker running the job
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'commits_syncjob'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # At most one queued or running job per repository
+            models.UniqueConstraint(fields=['repository'],
+                                    condition=Q(status__in=['queued', 'running']),
+                                    name='commits_syncjob_one_active'),
+        ]
+        verbose_name = 'Sync Job'
+        verbose_name_plural = 'Sync Jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.repository.name}: {self.status}'
+
+    def duration(self):
+        """Get the run time in seconds, or None if the job has not started."""
+        if not self.started_at:
+            return None
+        end = self.finished_at or timezone.now()
+        return (end - self.started_at).total_seconds()
+
+    @classmethod
+    def enqueue(cls, repositories):
+        """
+        Queue a sync for each repository that has no queued or running job.
+
+        Jobs of dead workers are reclaimed first. Concurrent callers can't
+        queue a repository twice: the unique constraint on active jobs
+        rejects the second insert.
+
+        Returns:
+            list: the created SyncJob objects
+        """
+        cls.reclaim_stale()
+        busy = set(cls.objects.filter(status__in=['queued', 'running'])
+                   .values_list('repository_id', flat=True))
+        jobs = []
+        for repository in repositories:
+            if repository.pk in busy:
+                continue
+            try:
+                with transaction.atomic():
+                    jobs.append(cls.objects.create(repository=repository))
+            except IntegrityError:
+                pass  # queued by a concurrent caller
+        return jobs
+
+    @classmethod
+    def reclaim_stale(cls, timeout=None):
+        """
+        Fail the running jobs whose worker has not reported for ``timeout``
+        seconds (default: BIGTEAM_SYNC_JOB_TIMEOUT), e.g. because it was
+        killed, so that their repositories can be queued again.
+
+        Returns:
+            int: number of jobs reclaimed
+        """
+        now = timezone.now()
+        timeout = SYNC_JOB_TIMEOUT if timeout is None else timeout
+        reclaimed = cls.objects.filter(
+            status='running', updated_at__lt=now - timedelta(seconds=timeout)
+        ).update(status='failed', error='Worker stopped before finishing the job',
+                 finished_at=now)
+        if reclaimed:
+            logger.warning(f'Reclaimed {reclaimed} sync jobs of stopped workers')
+        return reclaimed
+
+    @classmethod
+    def claim(cls, limit):
+        """
+        Mark up to ``limit`` queued jobs as running and return them.
+
+        A job is only returned to the worker that switched its status, so
+        several workers can share the queue. Jobs of dead workers are
+        reclaimed first.
+        """
+        cls.reclaim_stale()
+        claimed = []
+        for job in cls.objects.filter(status='queued').order_by('created_at')[:limit]:
+            started_at = timezone.now()
+            if cls.objects.filter(pk=job.pk, status='queued').update(
+                    status='running', started_at=started_at, updated_at=started_at):
+                job.status = 'running'
+                job.started_at = started_at
+                claimed.append(job)
+        return claimed
+
+    def finish(self, success, error=''):
+        """Record the outcome of the job."""
+        self.status = 'done' if success else 'failed'
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
+
+
 def UpdateRepositories():
     """
     Update all repositories by fetching new commits.
+
+    Repositories are fetched concurrently by the sync engine; see
+    commits.sync.SyncEngine for the worker settings.
     """
-    updated_count = 0
-    failed_count = 0
-    
-    for repo in Repository.objects.all():
-        try:
-            if repo.update():
-                updated_count += 1
-            else:
-                failed_count += 1
-        except Exception as e:
-            logger.error(f'Failed to update repository {repo.name}: {e}')
-            failed_count += 1
+    from .sync import SyncEngine
+
+    updated_count, failed_count = SyncEngine().run(Repository.objects.all())
     
     logger.info(f'Repository update completed: {updated_count} successful, {failed_count} failed')
     return updated_count, failed_count
+
+
+class SyncRun(models.Model):
+    """
+    One sync attempt of a repository, with the time spent in each phase.
+    """
+
+    STATUS_CHOICES = [
+        ('success', 'Success'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
+    repository = models.ForeignKey(Repository, related_name='sync_runs', on_delete=models.CASCADE)
+    status = models.CharField('status', max_length=10, choices=STATUS_CHOICES)
+    started_at = models.DateTimeField('started at')
+    finished_at = models.DateTimeField('finished at')
+    duration = models.FloatField('duration (s)', default=0)
+    commit_count = models.PositiveIntegerField('commits', default=0)
+    start_revision = models.CharField('from revision', max_length=100, blank=True)
+    end_revision = models.CharField('to revision', max_length=100, blank=True)
+    objects_fetched = models.PositiveIntegerField('objects fetched', default=0)
+    bytes_fetched = models.BigIntegerField('bytes fetched', default=0)
+    error = models.TextField('error', blank=True)
+
+    # Seconds spent in each phase of the sync
+    connect_time = models.FloatField('connect (s)', default=0)
+    head_time = models.FloatField('head lookup (s)', default=0)
+    fetch_time = models.FloatField('fetch (s)', default=0)
+    parse_time = models.FloatField('log parse (s)', default=0)
+    author_time = models.FloatField('authors (s)', default=0)
+    write_time = models.FloatField('write (s)', default=0)
+
+    class Meta:
+        db_table = 'commits_syncrun'
+        indexes = [
+            models.Index(fields=['repository', 'started_at']),
+        ]
+        verbose_name = 'Sync Run'
+        verbose_name_plural = 'Sync Runs'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f'{self.repository.name} at {self.started_at}: {self.status}'
+
+    def throughput(self):
+        """Get the commits stored per second of sync time."""
+        if not self.duration:
+            return 0.0
+        return self.commit_count / self.duration
+
+    @classmethod
+    def record(cls, repository, timer, status, commit_count=0, started_at=None,
+               start_revision=None, end_revision=None, error=''):
+        """
+        Save a sync attempt from the phase timings collected by ``timer``.
+
+        Args:
+            repository: the synced Repository
+            timer: SyncTimer of the sync
+            status: 'success', 'skipped' or 'failed'
+            commit_count: number of new commits stored
+            started_at: start of the sync (default: now minus the timed phases)
+            start_revision: revision the sync resumed from
+            end_revision: head revision the sync ran up to
+            error: error message of a failed sync
+        """
+        finished_at = timezone.now()
+        if started_at is None:
+            started_at = finished_at - timedelta(seconds=timer.total())
+        durations = timer.durations
+        try:
+            return cls.objects.create(
+                repository=repository,
+                status=status,
+                started_at=started_at,
+                finished_at=finished_at,
+                duration=(finished_at - started_at).total_seconds(),
+                commit_count=commit_count,
+                # Several Git tips may not fit; the start of the list will do
+                start_revision=(start_revision or '')[:100],
+                end_revision=(end_revision or '')[:100],
+                objects_fetched=timer.counters['objects'],
+                bytes_fetched=timer.counters['bytes'],
+                error=error,
+                connect_time=durations['connect'],
+                head_time=durations['head'],
+                fetch_time=durations['fetch'],
+                parse_time=durations['parse'],
+                author_time=durations['authors'],
+                write_time=durations['write'],
+            )
+        except Exception as e:
+            # Losing a timing record must never fail the sync itself
+            logger.error(f'Failed to record sync run of {repository.name}: {e}')
+            return None
@@ -0,0 +1,255 @@
+"""
+Asyncio scheduler that keeps repositories in sync continuously.
+
+Every repository gets its own schedule: it is synced every ``sync_interval``
+seconds with some random jitter, and retried with exponential backoff after
+failures. Blocking VCS calls run in a thread pool; all database writes go
+through a single writer thread, as in the sync engine.
+"""
+
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .authors import AuthorResolver
+from .models import SYNC_BATCH_SIZE, Repository, SyncRun
+from .sync import SYNC_PER_HOST_LIMIT, SYNC_WORKERS, fetch_repository, repository_host
+from .timing import SyncTimer
+
+logger = logging.getLogger(__name__)
+
+# Random spread applied to every delay, as a fraction of the delay
+SYNC_JITTER = getattr(settings, 'BIGTEAM_SYNC_JITTER', 0.1)
+# Upper bound in seconds for the delay after repeated failures
+SYNC_MAX_BACKOFF = getattr(settings, 'BIGTEAM_SYNC_MAX_BACKOFF', 3600)
+# Seconds between two reloads of the repository list
+SYNC_RELOAD_INTERVAL = getattr(settings, 'BIGTEAM_SYNC_RELOAD_INTERVAL', 60)
+
+
+class RepositorySchedule:
+    """
+    Sync timing of one repository.
+    """
+
+    def __init__(self, interval, jitter=SYNC_JITTER, max_backoff=SYNC_MAX_BACKOFF):
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.failures = 0
+
+    def first_delay(self):
+        """
+        Delay before the first sync, spread over one interval so that a
+        restart does not sync every repository at once.
+        """
+        return random.uniform(0, self.interval)
+
+    def next_delay(self):
+        """
+        Delay before the next sync: the interval, doubled for every
+        consecutive failure up to max_backoff, with jitter applied.
+        """
+        delay = self.interval
+        if self.failures:
+            delay = min(self.interval * 2 ** self.failures, max(self.max_backoff, self.interval))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def record(self, success):
+        self.failures = 0 if success else self.failures + 1
+
+
+class _ThreadQueue:
+    """
+    asyncio.Queue with a blocking put() for producers in other threads.
+
+    Once closed, put() raises instead of waiting for a consumer that is gone.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def put(self, item):
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        while True:
+            if self.closed:
+                future.cancel()
+                raise RuntimeError('Sync was cancelled')
+            try:
+                return future.result(timeout=1)
+            except FutureTimeoutError:
+                continue
+
+
+class SyncScheduler:
+    """
+    Long-running scheduler syncing each repository on its own schedule.
+
+    Args:
+        workers: maximum repositories fetched at once
+        per_host_limit: maximum repositories fetched from one host at once
+    """
+
+    def __init__(self, workers=None, per_host_limit=None, batch_size=None):
+        self.workers = workers or SYNC_WORKERS
+        self.per_host_limit = per_host_limit or SYNC_PER_HOST_LIMIT
+        self.batch_size = batch_size or SYNC_BATCH_SIZE
+        self.fetchers = ThreadPoolExecutor(self.workers, thread_name_prefix='syncd-fetch')
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix='syncd-writer')
+        self.slots = asyncio.Semaphore(self.workers)
+        self.host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+
+    async def write(self, func, *args, **kwargs):
+        """
+        Run a database operation on the writer thread.
+        """
+        def call():
+            close_old_connections()
+            return func(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.writer, call)
+
+    async def run(self, stop_event):
+        """
+        Sync repositories until ``stop_event`` is set.
+        """
+        tasks = {}
+
+        try:
+            while not stop_event.is_set():
+                repositories = await self.write(lambda: list(Repository.objects.all()))
+                current = {repository.pk for repository in repositories}
+
+                for pk in set(tasks) - current:
+                    tasks.pop(pk).cancel()
+                for repository in repositories:
+                    task = tasks.get(repository.pk)
+                    if task is None or task.done():
+                        tasks[repository.pk] = asyncio.create_task(
+                            self._repository_loop(repository.pk, stop_event))
+
+                try:
+                    await asyncio.wait_for(stop_event.wait(), SYNC_RELOAD_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            self.fetchers.shutdown(wait=False, cancel_futures=True)
+            self.writer.shutdown(wait=True)
+
+    async def _repository_loop(self, pk, stop_event):
+        """
+        Keep one repository in sync until it is deleted or the daemon stops.
+        """
+        schedule = None
+        delay = None
+        while not stop_event.is_set():
+            if schedule is None:
+                try:
+                    repository = await self.write(Repository.objects.get, pk=pk)
+                except Repository.DoesNotExist:
+                    return
+                schedule = RepositorySchedule(repository.sync_interval)
+                delay = schedule.first_delay()
+
+            try:
+                await asyncio.wait_for(stop_event.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            # Read after the delay, so that the sync starts from the current
+            # watermark and settings
+            try:
+                repository = await self.write(
+                    Repository.objects.select_related('fork_of').get, pk=pk)
+            except Repository.DoesNotExist:
+                return
+            schedule.interval = repository.sync_interval
+
+            success = await self.sync_repository(repository)
+            schedule.record(success)
+            delay = schedule.next_delay()
+            if not success:
+                logger.warning(f'Sync of {repository.name} failed {schedule.failures} times, '
+                               f'retrying in {delay:.0f}s')
+
+    async def sync_repository(self, repository):
+        """
+        Sync one repository, fetching in the thread pool and writing on the
+        writer thread.
+
+        Returns:
+            bool: True if the sync succeeded
+        """
+        # A fresh author cache per sync: authors may have been merged,
+        # renamed or deleted in the admin since the last one
+        resolver = await self.write(AuthorResolver)
+
+        loop = asyncio.get_running_loop()
+        async with self.slots, self.host_slots[repository_host(repository.url)]:
+            started_at = timezone.now()
+            last_stored_rev = repository.getLastStoredRev()
+            messages = _ThreadQueue(loop, maxsize=2)
+            fetch = loop.run_in_executor(
+                self.fetchers, fetch_repository, repository,
+                last_stored_rev, messages, self.batch_size)
+
+            new_commits_count = 0
+            timer = SyncTimer()   # writer phases, merged with the worker's
+            status = head = None
+            error = ''
+            try:
+                while status is None:
+                    kind, pk, payload = await messages.queue.get()
+                    if kind == 'batch':
+                        try:
+                            new_commits_count += await self.write(partial(
+                                repository.store_commits, payload, batch_size=self.batch_size,
+                                resolver=resolver, timer=timer))
+                        except Exception as e:
+                            error = f'Failed to store commits: {e}'
+                            logger.error(f'Failed to store commits for {repository.name}: {e}')
+                            status = 'failed'
+                    elif kind == 'orphans':
+                        try:
+                            await self.write(partial(repository.remove_commits, payload,
+                                                     timer=timer))
+                        except Exception as e:
+                            error = f'Failed to remove rewritten commits: {e}'
+                            logger.error(f'Failed to remove rewritten commits for '
+                                         f'{repository.name}: {e}')
+                            status = 'failed'
+                    elif kind == 'done':
+                        head, worker_timer = payload
+                        timer.merge(worker_timer)
+                        await self.write(repository.mark_synced, new_commits_count, head)
+                        status = 'success'
+                    elif kind == 'skipped':
+                        head, worker_timer = payload
+                        timer.merge(worker_timer)
+                        await self.write(repository.mark_skipped)
+                        status = 'skipped'
+                    else:
+                        error, worker_timer = payload
+                        timer.merge(worker_timer)
+                        logger.error(f'Failed to update repository {repository.name}: {error}')
+                        status = 'failed'
+            finally:
+                # Stop a worker whose batches are no longer wanted
+                messages.closed = True
+                await asyncio.gather(fetch, return_exceptions=True)
+            await self.write(partial(
+                SyncRun.record, repository, timer, status, new_commits_count,
+                started_at=started_at, start_revision=last_stored_rev,
+                end_revision=head, error=error))
+            return status != 'failed'
@@ -1,592 +1,763 @@
-'''
-svnlogclient.py
-Copyright (C) 2009 Nitin Bhide (nitinbhide@gmail.com)
-
-This module is part of SVNPlot (http://code.google.com/p/svnplot) and is released under
-the New BSD License: http://www.opensource.org/licenses/bsd-license.php
---------------------------------------------------------------------------------------
-
-A convinience wrapper over the subversion client to query the log information
-'''
-
-import logging
-import datetime, time
-import os, re, string
-import urllib, urlparse
-import getpass
-import traceback
-import types
-import tempfile
-from os.path import normpath
-from operator import itemgetter
-from StringIO import StringIO
-import pysvn
-
-SVN_HEADER_ENCODING = 'utf-8'
-URL_NORM_RE = re.compile('[/]+')
-
-def convert2datetime(seconds):
-    gmt = time.gmtime(seconds)
-    return(datetime.datetime(gmt.tm_year, gmt.tm_mon, gmt.tm_mday, gmt.tm_hour, gmt.tm_min, gmt.tm_sec))
-
-def makeunicode(s):
-    uns = s
-    
-    if(s):
-        encoding = 'utf-8'
-        errors='strict'
-        if not isinstance(s, unicode):
-            try:
-                #try utf-8 first.If that doesnot work, then try 'latin_1'
-                uns=unicode(s, encoding, errors)
-            except UnicodeDecodeError:
-                uns=unicode(s, 'latin_1', errors)
-        assert(isinstance(uns, unicode))
-    return(uns)
-    
-def normurlpath(pathstr):
-    '''
-    normalize url path. I cannot use 'normpath' directory as it changes path seperator to 'os' default path seperator.
-    '''
-    nrmpath = pathstr
-    if( nrmpath):
-        nrmpath = re.sub(URL_NORM_RE, '/',nrmpath)
-        nrmpath = makeunicode(nrmpath)
-        assert(nrmpath.endswith('/') == pathstr.endswith('/'))
-        
-    return(nrmpath)
-    
-def getDiffLineCountDict(diff_log):
-    diff_log = makeunicode(diff_log)
-    diffio = StringIO(diff_log)
-    addlnCount=0
-    dellnCount=0
-    curfile=None
-    diffCountDict = dict()
-    newfilediffstart = 'Index: '
-    newfilepropdiffstart = 'Property changes on: '
-    for diffline in diffio:
-        #remove the newline characters near the end of line
-        diffline = diffline.rstrip()
-        if(diffline.find(newfilediffstart)==0):
-            #diff for new file has started update the old filename.
-            if(curfile != None):
-                diffCountDict[curfile] = (addlnCount, dellnCount)
-            #reset the linecounts and current filename
-            addlnCount = 0
-            dellnCount = 0
-            #Index line entry doesnot have '/' as start of file path. Hence add the '/'
-            #so that path entries in revision log list match with the names in the 'diff count' dictionary
-            logging.debug(diffline)
-            curfile = u'/'+diffline[len(newfilediffstart):]
-        elif(diffline.find(newfilepropdiffstart)==0):
-            #property modification diff has started. Ignore it.
-            if(curfile != None):
-                diffCountDict[curfile] = (addlnCount, dellnCount)
-            curfile = u'/'+diffline[len(newfilepropdiffstart):]
-            #only properties are modified. there is no content change. hence set the line count to 0,0
-            if( curfile not in diffCountDict):
-                diffCountDict[curfile] = (0, 0)
-        elif(diffline.find('---')==0 or diffline.find('+++')==0 or diffline.find('@@')==0 or diffline.find('===')==0):                
-            continue
-        elif(diffline.find('-')==0):
-            dellnCount = dellnCount+1                
-        elif(diffline.find('+')==0):
-             addlnCount = addlnCount+1
-    
-    #update last file stat in the dictionary.
-    if( curfile != None):
-        diffCountDict[curfile] = (addlnCount, dellnCount)
-    return(diffCountDict)
-    
-class SVNLogClient:
-    def __init__(self, svnrepourl,binaryext=[], username=None,password=None):
-        self.svnrooturl = None
-        self.tmppath = None
-        self.username = None
-        self.password = None
-        self._updateTempPath()
-        self.svnrepourl = svnrepourl
-        self.svnclient = pysvn.Client()
-        self.svnclient.exception_style = 1
-        self.svnclient.callback_get_login = self.get_login
-        self.svnclient.callback_ssl_server_trust_prompt = self.ssl_server_trust_prompt
-        self.svnclient.callback_ssl_client_cert_password_prompt = self.ssl_client_cert_password_prompt
-        self.setbinextlist(binaryext)
-        self.set_user_password(username, password)
-        
-    def setbinextlist(self, binextlist):
-        '''
-        set extensionlist for binary files with some cleanup if required.
-        '''
-        binaryextlist = []
-        for binext in binextlist:
-            binext = binext.strip()
-            binext = u'.' + binext
-            binaryextlist.append(binext)
-            binext = binext.upper()
-            binaryextlist.append(binext)
-        self.binaryextlist = tuple(binaryextlist)
-
-    def set_user_password(self,username, password):
-        if( username != None and username != u''):
-            self.username = username
-            self.svnclient.set_default_username(self.username)
-        if( password != None):
-            self.password = password
-            self.svnclient.set_default_password(self.password)
-        
-    def get_login(self, realm, username, may_save):
-        logging.debug("This is a svnclient.callback_get_login event. ")
-        if( self.username == None):
-            self.username = raw_input("username for %s:" % realm)
-        #save = True
-        if( self.password == None):
-            self.password = getpass.getpass()
-        if(self.username== None or self.username ==''): 
-            retcode = False
-        else:
-            retcode = True
-        return retcode, self.username, self.password, may_save
-
-    def ssl_server_trust_prompt( self, trust_dict ):
-        retcode=True
-        accepted_failures = 1
-        save=1
-        print "trusting: "
-        print trust_dict
-        return retcode, accepted_failures, save
-        
-    def ssl_client_cert_password_prompt(self, realm, may_save):
-        """callback_ssl_client_cert_password_prompt is called each time subversion needs a password in the realm to use a client certificate and has no cached credentials. """
-        logging.debug("callback_ssl_client_cert_password_prompt called to gain password for subversion in realm %s ." %(realm))
-        password = getpass.getpass()
-        return retcode, password, may_save    
-    
-    def _updateTempPath(self):
-        #Get temp directory
-        self.tmppath = tempfile.gettempdir()
-        #Bugfix for line count update problems.
-        #pysvn Client.diff() call documentation says
-        #diff uses tmp_path to form the filename when creating any temporary files needed. The names are formed using tmp_path + unique_string + ".tmp".
-        #For example tmp_path=/tmp/diff_prefix will create files like /tmp/diff_prefix.tmp and /tmp/diff_prefix1.tmp.
-        #Hence i assumed that passing the temppath as '/tmp/svnplot' will create temporary files like '/tmp/svnplot1.tmp' etc.
-        #However 'diff' function tries to create temporary files as '/tmp/svnplot/tempfile.tmp'. Since '/tmp/svnplot' folder doesnot exist
-        #temporary file cannot be created and the 'diff' call fails. Hence I am changing it just 'tmpdir' path. -- Nitin (20 July 2009)
-        #self.tmppath = os.path.join(self.tmppath, "svnplot")
-        
-    def printSvnErrorHint(self, exp):
-        '''
-        print some helpful error message for svn client errors.
-        '''
-        exitadvised = False
-        if(isinstance(exp, pysvn.ClientError)):
-            fullerrmsg, errs = exp
-            for svnerr in errs:
-                errmsg,code = svnerr
-                logging.error("SVN Error Code %d" % code)
-                logging.error(errmsg)
-                print "SVN Error : "+errmsg
-                helpmsg = None
-                if( code == 22):
-                    '''
-                    Safe data 'Index: test' was followed by non-ASCII byte 196: unable to convert to/from UTF-8
-                    '''
-                    helpmsg ="HINT : Make sure that you have 'APR_ICONV_PATH' variable set to subversion client "
-                    helpmsg = helpmsg +"'iconv' directory.\n"
-                    if( 'APR_ICONV_PATH' in os.environ):
-                        helpmsg = helpmsg+'Current value of APR_ICONV_PATH is %s' % os.environ['APR_ICONV_PATH']
-                    else:
-                        helpmsg = helpmsg+ 'Currently APR_ICONV_PATH is not set'
-                    exitadvised=True
-                elif (code == 145000):
-                    '''
-                    Unknown node kind error. Should never get this.
-                    '''
-                    helpmsg ="HINT : You should never get this error. Please report this to svnplot issue base"
-                    exitadvised=True
-                if( helpmsg):
-                    print helpmsg
-                    logging.error(helpmsg)
-                    
-        return(exitadvised)
-        
-    def getHeadRevNo(self):
-        revno = 0
-        headrev = self._getHeadRev()
-        
-        if( headrev != None):
-            revno = headrev.revision.number
-        else:
-            print "Unable to find head revision for the repository"
-            print "Check the firewall settings, network connection and repository path"
-            
-        return(revno)
-
-    def _getHeadRev(self, enddate=None):
-        rooturl = self.getRootUrl()
-        logging.debug("Trying to get head revision rooturl:%s" % rooturl)
-        
-        headrevlog = None
-        headrev = pysvn.Revision( pysvn.opt_revision_kind.head )
-            
-        revlog = self.svnclient.log( rooturl,
-             revision_start=headrev, revision_end=headrev, discover_changed_paths=False)
-                
-        #got the revision log. Now break out the multi-try for loop
-        if( revlog != None and len(revlog) > 0):
-            revno = revlog[0].revision.number
-            logging.debug("Found head revision %d" % revno)
-            headrevlog = revlog[0]            
-            
-            if( enddate != None and enddate < headrevlog.date):
-                headrevlog = self.getLastRevForDate(enddate, rooturl, False)
-            
-        return(headrevlog)
-    
-    def getStartEndRevForRepo(self, startdate=None, enddate=None):
-        '''
-        find the start and end revision data for the entire repository.
-        '''
-        rooturl = self.getRootUrl()
-        headrev = self._getHeadRev(enddate)
-        
-        firstrev = self.getLog(1, url=rooturl, detailedLog=False)
-        if (startdate!= None and firstrev.date < startdate):
-            firstrev = self.getFirstRevForDate(startdate,rooturl,False)
-            
-        if( firstrev and headrev):            
-            assert(firstrev.revision.number <= headrev.revision.number)
-        
-        return(firstrev, headrev)
-        
-    def findStartEndRev(self, startdate=None, enddate=None):
-        #Find svn-root for the url
-        url = self.getUrl('')
-        
-        #find the start and end revision numbers for the entire repository.
-        firstrev, headrev = self.getStartEndRevForRepo(startdate, enddate)
-        startrevno = firstrev.revision.number
-        endrevno = headrev.revision.number
-                
-        if( not self.isRepoUrlSameAsRoot()):
-            #if the url is not same as 'root' url. Then we need to find first revision for
-            #given URL.        
-        
-            #headrev and first revision of the repository is found
-            #actual start end revision numbers for given URL will be between these two numbers
-            #Since svn log doesnot have a direct way of determining the start and end revisions
-            #for a given url, I am using headrevision and first revision time to get those
-            starttime = firstrev.date
-            revstart = pysvn.Revision(pysvn.opt_revision_kind.date, starttime)
-            logging.debug("finding start end revision for %s" % url)
-            startrev = self.svnclient.log( url,
-                         revision_start=revstart, revision_end=headrev.revision, limit = 1, discover_changed_paths=False)
-            
-            if( startrev != None and len(startrev) > 0):
-                startrevno = startrev[0].revision.number
-                
-        return(startrevno, endrevno)
-        
-    def getFirstRevForDate(self, revdate, url, detailedlog=False):
-        '''
-        find the first log entry for the given date.
-        '''
-        revlog = None
-        revstart = pysvn.Revision(pysvn.opt_revision_kind.date, revdate)
-        revloglist = self.svnclient.log( url,
-                         revision_start=revstart, limit = 1, discover_changed_paths=False)
-        if( revloglist != None and len(revloglist) > 0):
-            revlog = revloglist[0]
-        return(revlog)
-    
-    def getLastRevForDate(self, revdate, url, detailedlog=False):
-        '''
-        find the first log entry for the given date.
-        '''
-        revlog = None
-        revstart = pysvn.Revision(pysvn.opt_revision_kind.date, revdate)
-        #seconds per day is 24*60*60. revend is revstart+1 day
-        revend = pysvn.Revision(pysvn.opt_revision_kind.date, revdate+(24*60*60))
-        revloglist = self.svnclient.log( url,
-                         revision_start=revstart, revision_end=revend, discover_changed_paths=False)
-        if( revloglist != None and len(revloglist) > 0):
-            revlog = revloglist[-1]
-        return(revlog)
-        
-    def getLog(self, revno, url=None, detailedLog=False):
-        log=None
-        if( url == None):
-            url = self.getUrl('')
-        rev = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-                
-        logging.debug("Trying to get revision log. revno:%d, url=%s" % (revno, url))
-        revlog = self.svnclient.log( url,
-             revision_start=rev, revision_end=rev, discover_changed_paths=detailedLog)
-        log = revlog[0]
-                
-        return(log)
-
-    def getLogs(self, startrevno, endrevno, cachesize=1, detailedLog=False):
-        revlog =None
-        startrev = pysvn.Revision(pysvn.opt_revision_kind.number, startrevno)
-        endrev = pysvn.Revision(pysvn.opt_revision_kind.number, endrevno)
-        url = self.getUrl('')
-                
-        logging.debug("Trying to get revision logs [%d:%d]" % (startrevno, endrevno))
-        revlog = self.svnclient.log( url,
-             revision_start=startrev, revision_end=endrev, limit=cachesize,
-                                     discover_changed_paths=detailedLog)
-        return(revlog)
-    
-    def getRevDiff(self, revno):
-        rev1 = pysvn.Revision(pysvn.opt_revision_kind.number, revno-1)
-        rev2 = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-        url = self.getUrl('')
-        diff_log = None
-        
-        logging.info("Trying to get revision diffs url:%s" % url)
-        diff_log = self.svnclient.diff(self.tmppath, url, revision1=rev1, revision2=rev2,
-                        recurse=True,ignore_ancestry=True,ignore_content_type=False,
-                        header_encoding=SVN_HEADER_ENCODING, diff_deleted=True)
-                    
-        return diff_log
-
-    def getRevFileDiff(self, path, revno,prev_path=None,prev_rev_no=None):
-        if( prev_path == None):
-            prev_path = path
-
-        if( prev_rev_no == None):
-            prev_rev_no = revno-1
-            
-        cur_url = self.getUrl(path)
-        cur_rev = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-        prev_url = self.getUrl(prev_path)
-        prev_rev = pysvn.Revision(pysvn.opt_revision_kind.number, prev_rev_no)
-        diff_log = None
-        
-        logging.debug("Getting filelevel revision diffs")
-        logging.debug("revision : %d, url=%s" % (revno, cur_url))
-        logging.debug("prev url=%s" % prev_url)
-        
-        try:
-            diff_log = self.svnclient.diff(self.tmppath, url_or_path=prev_url, revision1=prev_rev,
-                        url_or_path2=cur_url , revision2=cur_rev,
-                        recurse=True, ignore_ancestry=False,ignore_content_type=False,
-                        header_encoding=SVN_HEADER_ENCODING, diff_deleted=True)
-        except pysvn.ClientError, exp:
-            logging.exception("Error in getting file level revision diff")
-            logging.debug("url : %s" % cur_url)
-            logging.debug("previous url : %s" % prev_url)
-            logging.debug("revno =%d", revno)
-            logging.debug("prev renvo = %d", prev_rev_no)            
-            raise
-        
-        return(diff_log)
-    
-    def getInfo(self, path, revno=None):
-        '''Gets the information about the given path ONLY from the repository.
-        Hence recurse flag is set to False.
-        '''
-        if( revno == None):
-            rev = pysvn.Revision( pysvn.opt_revision_kind.head )
-        else:
-            rev = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-        url = self.getUrl(path)
-        entry_list = None
-        
-        logging.debug("Trying to get file information for %s" % url)
-        entry_list = self.svnclient.info2( url,revision=rev,recurse=False)
-        
-        return(entry_list)
-        
-    def getFullDirInfo(self, path, revno):
-        '''
-        get full information of the directory at this given path and given revision
-        number. It is assumed that 'path' represents a directory.
-        '''
-        if( revno == None):
-            rev = pysvn.Revision( pysvn.opt_revision_kind.head )
-        else:
-            rev = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-        url = self.getUrl(path)
-        entry_list = None
-        
-        logging.debug("Trying to get full information for %s" % url)
-        entry_list = self.svnclient.info2( url,revision=rev,recurse=True)
-        
-        return(entry_list)
-    
-    def getFileList(self, path, revno):
-        '''
-        return the file list of all the files in the directory 'path' and its
-        sub directories
-        '''                
-        entrylist = self.getFullDirInfo(path, revno)
-        dirpath = path
-        if not dirpath.endswith('/'):
-            dirpath = path + '/'
-        assert(dirpath.endswith('/'))
-        for pathentry, info_dict in entrylist:
-            if info_dict.kind == pysvn.node_kind.file:
-                yield normurlpath(dirpath+pathentry)
-        
-        
-    def isChildPath(self, filepath):
-        '''
-        Check if the given path is a child path of if given svnrepourl. All filepaths are child paths
-        if the repository path is same is repository 'root'
-        Use while updating/returning changed paths in the a given revision.
-        '''
-        assert(self.svnrooturl != None)
-        fullpath = self.svnrooturl + filepath
-                
-        return(fullpath.startswith(self.svnrepourl))
-
-    def __isBinaryFileExt(self, filepath):
-        '''
-        check the extension of filepath and see if the extension is in binary files
-        list
-        '''
-        return(filepath.endswith(self.binaryextlist))        
-
-    def __isTextMimeType(self, fmimetype):
-        '''
-        check if the mime-type is a text mime-type based on the standard svn text file logic.        
-        '''
-        textMimeType = False
-        if( fmimetype.startswith('text/') or fmimetype == 'image/x-xbitmap' or fmimetype == 'image/x-xpixmap'):
-            textMimeType = True
-        return(textMimeType)
-            
-    def __isBinaryFile(self, filepath, revno):
-        '''
-        detect if file is a binary file using same heuristic as subversion. If the file
-        has no svn:mime-type  property, or has a mime-type that is textual (e.g. text/*),
-        Subversion assumes it is text. Otherwise it is treated as binary file.
-        '''
-        logging.debug("Binary file check for file <%s> revision:%d" % (filepath, revno))
-        binary = False #if explicit mime-type is not found always treat the file as 'text'                   
-        url = self.getUrl(filepath)
-        rev = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-
-        proplist = self.svnclient.proplist(url, revision=rev)        
-        if( len(proplist) > 0):
-            assert(len(proplist) == 1)
-            path, propdict = proplist[0]
-            if( 'svn:mime-type' in propdict):
-                fmimetype = propdict['svn:mime-type']
-                #print "found mime-type file: %s mimetype : %s" % (filepath, fmimetype)
-                if( self.__isTextMimeType(fmimetype)==False):
-                    #mime type is not a 'text' mime type.
-                    binary = True
-               
-        return(binary)
-    
-    def isBinaryFile(self, filepath, revno):
-        assert(filepath is not None)
-        assert(revno > 0)
-        binary = self.__isBinaryFileExt(filepath)
-        
-        if( binary == False):
-            binary = self.__isBinaryFile(filepath, revno)
-        return(binary)
-    
-    def isDirectory(self, revno, changepath):
-        #if the file/dir is deleted in the current revision. Then the status needs to be checked for
-        # one revision before that
-        logging.debug("isDirectory: path %s revno %d" % (changepath, revno))
-        isDir = False            
-        
-        try:
-            entry = self.getInfo(changepath, revno)
-            filename, info_dict = entry[0]
-            if( info_dict.kind == pysvn.node_kind.dir):
-                isDir = True
-                logging.debug("path %s is Directory" % changepath)
-        except pysvn.ClientError, expinst:
-            #it is possible that changedpath is deleted (even if changetype is not 'D') and
-            # doesnot exist in the revno. In this case, we will get a ClientError exception.
-            # this case just return isDir as 'False' and let the processing continue
-            pass
-                                                    
-        return(isDir)
-        
-    def _getLineCount(self, filepath, revno):
-        linecount = 0
-        
-        logging.info("Trying to get linecount for %s" % (filepath))
-        rev = pysvn.Revision(pysvn.opt_revision_kind.number, revno)
-        url = self.getUrl(filepath)
-        contents = self.svnclient.cat(url, revision = rev)
-        matches = re.findall("$", contents, re.M )
-        if( matches != None):
-            linecount = len(matches)
-        logging.debug("%s linecount : %d" % (filepath, linecount))
-        
-        return(linecount)
-    
-    def getLineCount(self, filepath, revno):
-        linecount = 0        
-        if( self.isBinaryFile(filepath, revno) == False):
-            linecount = self._getLineCount(filepath, revno)
-        
-        return(linecount)
-
-    def getRootUrl2(self):
-        assert( self.svnrooturl == None)
-        #remove the trailing '/' if any
-        firstrev = pysvn.Revision( pysvn.opt_revision_kind.number, 1)
-        possibleroot = self.svnrepourl        
-        if( possibleroot.endswith('/') == False):
-            possibleroot = possibleroot+'/'
-        #get the last log message for the given path.
-        headrev = pysvn.Revision( pysvn.opt_revision_kind.head )
-        urlinfo = self.svnclient.info2( possibleroot,revision=headrev,recurse=False)
-        last_changed_rev = headrev
-        maxmatchlen = 0
-        for path, infodict in urlinfo:
-            self.svnrooturl = infodict.repos_root_URL
-            break
-                                
-    def getRootUrl(self):        
-        if( self.svnrooturl == None and self.svnclient.is_url(self.svnrepourl)):
-            # for some reason 'root_url_from_path' crashes Python interpreter
-            # for http:// urls for PySVN 1.6.3 (python 2.5)
-            # hence I need to do jump through hoops to get -- Nitin
-            #self.svnrooturl = self.svnclient.root_url_from_path(self.svnrepourl)
-            
-            #Comment this line if PySVN - root_url_from_path() function works for you.
-            self.getRootUrl2()
-            
-            logging.debug("found rooturl %s" % self.svnrooturl)
-            
-        #if the svnrooturl is None at this point, then raise an exception
-        if( self.svnrooturl == None):
-            raise RuntimeError , "Repository Root not found"
-            
-        return(self.svnrooturl)
-    
-    def getUrl(self, path):
-        url = self.svnrepourl
-        if( path.strip() != ""):
-            #remember 'path' can be a unicode string            
-            try:
-                path = path.encode('utf8')
-            except:
-                #not possible to encode path as unicode. Probably an latin-1 character with value > 127
-                #keep path as it is.
-                pass
-            url = self.getRootUrl() + urllib.pathname2url(path)
-        return(url)
-
-    def isRepoUrlSameAsRoot(self):
-        repourl = self.svnrepourl.rstrip('/')
-        rooturl = self.getRootUrl()
-        rooturl = rooturl.rstrip('/')
-        return(repourl == rooturl)
-    
-    def __iter__(self):
-        from svnlogiter import SVNRevLogIter
-        return(SVNRevLogIter(self, 1, self.getHeadRevNo()))
-
+'''
+svnlogclient.py
+Copyright (C) 2009 Nitin Bhide (nitinbhide@gmail.com)
+
+This module is part of SVNPlot (http://code.google.com/p/svnplot) and is released under
+the New BSD License: http://www.opensource.org/licenses/bsd-license.php
+--------------------------------------------------------------------------------------
+
+A convinience wrapper over the subversion command line client to query the log information.
+
+The 'svn' command is run with '--xml' and its output is parsed incrementally, so log
+entries are available as soon as they arrive and memory use does not depend on the
+number of revisions.
+'''
+
+import logging
+import datetime, time
+import re
+import subprocess
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from io import StringIO
+from urllib.parse import quote, unquote
+
+SVN_HEADER_ENCODING = 'utf-8'
+URL_NORM_RE = re.compile('[/]+')
+# svn error codes, e.g. 'svn: E160013: ...' for a missing path
+SVN_ERROR_RE = re.compile(r'\b([EW]\d{6})\b')
+# default number of (path, revision) node kinds and binary flags remembered by a client
+KIND_CACHE_SIZE = 10000
+MIME_CACHE_SIZE = 10000
+# files whose mime-types are asked in one 'svn propget' command
+PROPGET_BATCH_SIZE = 500
+# 'svn propget' errors which only mean that some target has no such property
+PROPGET_NOT_FOUND_CODES = {'W200017', 'E200000'}
+# files larger than this (bytes) are not line counted by default, 0 counts every file
+LINECOUNT_MAX_SIZE = 50*1024*1024
+# bytes read from 'svn cat' at a time
+READ_SIZE = 64*1024
+# server certificate failures accepted without a prompt, as the pysvn based client did
+# (it accepted SVN_AUTH_SSL_NOTYETVALID only). '' accepts none.
+TRUST_SERVER_CERT_FAILURES = 'not-yet-valid'
+
+
+class SVNError(RuntimeError):
+    '''
+    Failure of an 'svn' command. 'codes' lists the svn error codes found in its output and
+    'stdout' keeps what the command printed before failing.
+    '''
+    def __init__(self, command, returncode, stderr, stdout=b''):
+        self.command = command
+        self.returncode = returncode
+        self.stderr = stderr
+        self.stdout = stdout
+        self.codes = SVN_ERROR_RE.findall(stderr)
+        super().__init__("'%s' failed with exit code %d: %s" % (
+            ' '.join(command[:2]), returncode, stderr.strip()))
+
+
+def convert2datetime(seconds):
+    gmt = time.gmtime(seconds)
+    return(datetime.datetime(gmt.tm_year, gmt.tm_mon, gmt.tm_mday, gmt.tm_hour, gmt.tm_min, gmt.tm_sec))
+
+def parse_svn_date(text):
+    '''
+    convert the svn XML date (e.g. 2024-01-01T12:00:00.000000Z) into a naive UTC datetime.
+    '''
+    return(datetime.datetime.strptime(text[:19], '%Y-%m-%dT%H:%M:%S'))
+
+def makeunicode(s):
+    uns = s
+
+    if(s):
+        if isinstance(s, bytes):
+            try:
+                #try utf-8 first.If that doesnot work, then try 'latin_1'
+                uns = s.decode('utf-8')
+            except UnicodeDecodeError:
+                uns = s.decode('latin_1')
+        assert(isinstance(uns, str))
+    return(uns)
+
+def normurlpath(pathstr):
+    '''
+    normalize url path. I cannot use 'normpath' directory as it changes path seperator to 'os' default path seperator.
+    '''
+    nrmpath = pathstr
+    if( nrmpath):
+        nrmpath = re.sub(URL_NORM_RE, '/',nrmpath)
+        nrmpath = makeunicode(nrmpath)
+        assert(nrmpath.endswith('/') == pathstr.endswith('/'))
+
+    return(nrmpath)
+
+def getDiffLineCountDict(diff_log):
+    diff_log = makeunicode(diff_log)
+    diffio = StringIO(diff_log)
+    addlnCount=0
+    dellnCount=0
+    curfile=None
+    diffCountDict = dict()
+    newfilediffstart = 'Index: '
+    newfilepropdiffstart = 'Property changes on: '
+    for diffline in diffio:
+        #remove the newline characters near the end of line
+        diffline = diffline.rstrip()
+        if(diffline.find(newfilediffstart)==0):
+            #diff for new file has started update the old filename.
+            if(curfile != None):
+                diffCountDict[curfile] = (addlnCount, dellnCount)
+            #reset the linecounts and current filename
+            addlnCount = 0
+            dellnCount = 0
+            #Index line entry doesnot have '/' as start of file path. Hence add the '/'
+            #so that path entries in revision log list match with the names in the 'diff count' dictionary
+            logging.debug(diffline)
+            curfile = '/'+diffline[len(newfilediffstart):]
+        elif(diffline.find(newfilepropdiffstart)==0):
+            #property modification diff has started. Ignore it.
+            if(curfile != None):
+                diffCountDict[curfile] = (addlnCount, dellnCount)
+            curfile = '/'+diffline[len(newfilepropdiffstart):]
+            #only properties are modified. there is no content change. hence set the line count to 0,0
+            if( curfile not in diffCountDict):
+                diffCountDict[curfile] = (0, 0)
+        elif(diffline.find('---')==0 or diffline.find('+++')==0 or diffline.find('@@')==0 or diffline.find('===')==0):
+            continue
+        elif(diffline.find('-')==0):
+            dellnCount = dellnCount+1
+        elif(diffline.find('+')==0):
+             addlnCount = addlnCount+1
+
+    #update last file stat in the dictionary.
+    if( curfile != None):
+        diffCountDict[curfile] = (addlnCount, dellnCount)
+    return(diffCountDict)
+
+
+class LRUCache:
+    '''
+    thread safe mapping which keeps only the 'maxsize' most recently used entries.
+    '''
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if( key not in self._entries):
+                return(default)
+            self._entries.move_to_end(key)
+            return(self._entries[key])
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while( len(self._entries) > self.maxsize):
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return(key in self._entries)
+
+    def __len__(self):
+        return(len(self._entries))
+
+
+class SVNLogEntry:
+    '''
+    one revision of 'svn log --xml' output.
+    changed_paths is a list of dictionaries with 'path', 'action', 'kind' ('file', 'dir' or
+    None when the server does not report it), 'copyfrom_path' and 'copyfrom_revision'
+    (revision number or None) keys.
+    '''
+    def __init__(self, revno, author='', date=None, message='', changed_paths=None):
+        self.revno = revno
+        self.author = author
+        self.date = date
+        self.message = message
+        self.changed_paths = changed_paths or []
+
+    @classmethod
+    def fromxml(cls, element):
+        '''
+        create the entry from a <logentry> element.
+        '''
+        changed_paths = []
+        for pathelem in element.iterfind('paths/path'):
+            copyfromrev = pathelem.get('copyfrom-rev')
+            changed_paths.append({
+                'path': pathelem.text or '',
+                'action': pathelem.get('action'),
+                #servers older than 1.6 send an empty kind
+                'kind': pathelem.get('kind') or None,
+                'copyfrom_path': pathelem.get('copyfrom-path'),
+                'copyfrom_revision': int(copyfromrev) if copyfromrev else None,
+            })
+        datetext = element.findtext('date')
+        return(cls(int(element.get('revision')),
+                   author=element.findtext('author') or '',
+                   date=parse_svn_date(datetext) if datetext else None,
+                   message=element.findtext('msg') or '',
+                   changed_paths=changed_paths))
+
+
+def iterxml(stream, tag):
+    '''
+    Incrementally parse the XML 'stream' and yield every 'tag' element once it is complete.
+    Yielded elements are cleared afterwards, so memory use stays flat however long the
+    document is.
+    '''
+    root = None
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if root is None:
+            root = element
+        if event == 'end' and element.tag == tag:
+            yield element
+            element.clear()
+            # drop the references the root keeps to the parsed elements
+            root.clear()
+
+
+class SVNLogClient:
+    def __init__(self, svnrepourl,binaryext=[], username=None,password=None, kindcache=None,
+                 mimecache=None, maxlinecountsize=LINECOUNT_MAX_SIZE,
+                 trustfailures=TRUST_SERVER_CERT_FAILURES):
+        '''
+        kindcache and mimecache are LRUCaches of the node kinds found by isDirectory and of
+        the binary flags found by isBinaryFile. They can be shared by several clients,
+        entries are keyed by full url.
+        maxlinecountsize is the size in bytes above which getLineCount skips a file.
+        trustfailures is the comma separated list of server certificate failures that are
+        accepted, e.g. 'unknown-ca,not-yet-valid'.
+        '''
+        self.svnrooturl = None
+        self.maxlinecountsize = maxlinecountsize
+        self.trustfailures = trustfailures
+        self.kindcache = kindcache if kindcache is not None else LRUCache(KIND_CACHE_SIZE)
+        self.mimecache = mimecache if mimecache is not None else LRUCache(MIME_CACHE_SIZE)
+        self.tmppath = None
+        self.username = None
+        self.password = None
+        self._updateTempPath()
+        self.svnrepourl = svnrepourl
+        self.setbinextlist(binaryext)
+        self.set_user_password(username, password)
+
+    def setbinextlist(self, binextlist):
+        '''
+        set extensionlist for binary files with some cleanup if required.
+        '''
+        binaryextlist = []
+        for binext in binextlist:
+            binext = binext.strip()
+            binext = '.' + binext
+            binaryextlist.append(binext)
+            binext = binext.upper()
+            binaryextlist.append(binext)
+        self.binaryextlist = tuple(binaryextlist)
+
+    def set_user_password(self,username, password):
+        if( username != None and username != ''):
+            self.username = username
+        if( password != None and password != ''):
+            self.password = password
+
+    def _updateTempPath(self):
+        #Get temp directory
+        self.tmppath = tempfile.gettempdir()
+
+    def _svnCommand(self, command, *args):
+        '''
+        build the command line of an svn sub command. svn never prompts, credentials are
+        passed explicitly and never cached on disk. The password is read from the standard
+        input (see _svnInput), so it does not show up in the process list. This needs svn
+        1.10 or later.
+        '''
+        cmd = ['svn', command, '--non-interactive']
+        if( self.trustfailures):
+            cmd.append('--trust-server-cert-failures=%s' % self.trustfailures)
+        if( self.username):
+            cmd += ['--username', self.username]
+        if( self.password):
+            cmd += ['--password-from-stdin', '--no-auth-cache']
+        return(cmd + list(args))
+
+    def _svnInput(self):
+        '''
+        standard input of an svn command built by _svnCommand, None when there is no password.
+        '''
+        if( self.password):
+            return((self.password + '\n').encode('utf-8'))
+        return(None)
+
+    def _startSvn(self, cmd):
+        '''
+        start the svn command 'cmd' with piped output and give it the password.
+        '''
+        stdininput = self._svnInput()
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE if stdininput else subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if( stdininput):
+            try:
+                process.stdin.write(stdininput)
+                process.stdin.close()
+            except BrokenPipeError:
+                #svn already stopped, its exit code tells why
+                pass
+        return(process)
+
+    def _runSvn(self, command, *args):
+        '''
+        run an svn sub command and return its standard output as bytes.
+        '''
+        cmd = self._svnCommand(command, *args)
+        logging.debug("Running svn %s %s" % (command, ' '.join(args)))
+        result = subprocess.run(cmd, input=self._svnInput(), capture_output=True)
+        if( result.returncode != 0):
+            raise SVNError(cmd, result.returncode, makeunicode(result.stderr) or '', result.stdout)
+        return(result.stdout)
+
+    def _streamSvnXml(self, tag, command, *args):
+        '''
+        run an svn sub command with '--xml' and yield its 'tag' elements as the output arrives.
+        '''
+        cmd = self._svnCommand(command, '--xml', *args)
+        logging.debug("Streaming svn %s %s" % (command, ' '.join(args)))
+        process = self._startSvn(cmd)
+        try:
+            yield from iterxml(process.stdout, tag)
+            stderr = process.stderr.read()
+            if( process.wait() != 0):
+                raise SVNError(cmd, process.returncode, makeunicode(stderr) or '')
+        except ET.ParseError:
+            #svn stopped in the middle of its output. Report the svn error if there is one.
+            stderr = process.stderr.read()
+            if( process.wait() != 0):
+                raise SVNError(cmd, process.returncode, makeunicode(stderr) or '')
+            raise
+        finally:
+            self._closeProcess(process)
+
+    def _closeProcess(self, process):
+        if( process.poll() is None):
+            #the caller stopped early
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    def _pegUrl(self, url, revno):
+        '''
+        url pinned to revision 'revno', so that paths deleted or moved later are still found.
+        '''
+        if( revno is None):
+            return(url)
+        return("%s@%d" % (url, revno))
+
+    def getHeadRevNo(self):
+        '''
+        head revision of the repository. Raises SVNError when svn fails or reports nothing,
+        instead of returning 0, which is the head of an empty repository.
+        '''
+        info = self._getUrlInfo(self.svnrepourl)
+        if( info is None):
+            raise SVNError(['svn', 'info', self.svnrepourl], 0,
+                           "Unable to find head revision for the repository. "
+                           "Check the firewall settings, network connection and repository path")
+        revno = info['revision']
+        logging.debug("Found head revision %d" % revno)
+        return(revno)
+
+    def _getUrlInfo(self, url, revno=None):
+        '''
+        'svn info' of one url as a dictionary with 'kind', 'path', 'url', 'root', 'revision'
+        and 'last_changed_rev' keys.
+        '''
+        infolist = self._getInfoList(url, revno, depth='empty')
+        if( len(infolist) == 0):
+            return(None)
+        info = infolist[0]
+        if( self.svnrooturl is None and info['root']):
+            self.svnrooturl = info['root']
+        return(info)
+
+    def _getInfoList(self, url, revno=None, depth='empty'):
+        infolist = []
+        for entry in self._streamSvnXml('entry', 'info', '--depth', depth, self._pegUrl(url, revno)):
+            commit = entry.find('commit')
+            infolist.append({
+                'kind': entry.get('kind'),
+                'path': entry.get('path'),
+                'url': entry.findtext('url'),
+                'root': entry.findtext('repository/root'),
+                'revision': int(entry.get('revision')),
+                'last_changed_rev': int(commit.get('revision')) if commit is not None and commit.get('revision') else None,
+            })
+        return(infolist)
+
+    def getStartEndRevForRepo(self, startdate=None, enddate=None):
+        '''
+        find the start and end revision data for the entire repository.
+        '''
+        rooturl = self.getRootUrl()
+        headrevno = self.getHeadRevNo()
+        if( enddate != None):
+            headrev = self.getLastRevForDate(enddate, rooturl, False)
+        else:
+            headrev = self.getLog(headrevno, url=rooturl, detailedLog=False)
+
+        firstrev = self.getLog(1, url=rooturl, detailedLog=False)
+        if (startdate!= None and firstrev.date < startdate):
+            firstrev = self.getFirstRevForDate(startdate,rooturl,False)
+
+        if( firstrev and headrev):
+            assert(firstrev.revno <= headrev.revno)
+
+        return(firstrev, headrev)
+
+    def findStartEndRev(self, startdate=None, enddate=None):
+        #find the start and end revision numbers for the entire repository.
+        firstrev, headrev = self.getStartEndRevForRepo(startdate, enddate)
+        startrevno = firstrev.revno
+        endrevno = headrev.revno
+
+        if( not self.isRepoUrlSameAsRoot()):
+            #if the url is not same as 'root' url. Then the first revision of the url is
+            #the first revision that changed it.
+            url = self.getUrl('')
+            logging.debug("finding start end revision for %s" % url)
+            startrev = self._getLogList(url, startrevno, endrevno, limit=1, detailedLog=False)
+            if( len(startrev) > 0):
+                startrevno = startrev[0].revno
+
+        return(startrevno, endrevno)
+
+    def getFirstRevForDate(self, revdate, url, detailedlog=False):
+        '''
+        find the first log entry for the given date.
+        '''
+        revlog = None
+        revloglist = self._getLogList(url, '{%s}' % revdate.isoformat(), 'HEAD', limit=1,
+                                      detailedLog=detailedlog)
+        if( len(revloglist) > 0):
+            revlog = revloglist[0]
+        return(revlog)
+
+    def getLastRevForDate(self, revdate, url, detailedlog=False):
+        '''
+        find the last log entry for the given date.
+        '''
+        revlog = None
+        revend = revdate+datetime.timedelta(days=1)
+        revloglist = self._getLogList(url, '{%s}' % revdate.isoformat(),
+                                      '{%s}' % revend.isoformat(), detailedLog=detailedlog)
+        if( len(revloglist) > 0):
+            revlog = revloglist[-1]
+        return(revlog)
+
+    def _getLogList(self, url, startrev, endrev, limit=None, detailedLog=False):
+        return(list(self.iterLogs(startrev, endrev, cachesize=limit, detailedLog=detailedLog,
+                                  url=url)))
+
+    def getLog(self, revno, url=None, detailedLog=False):
+        if( url == None):
+            url = self.getUrl('')
+        logging.debug("Trying to get revision log. revno:%d, url=%s" % (revno, url))
+        revlog = self._getLogList(url, revno, revno, detailedLog=detailedLog)
+        return(revlog[0] if revlog else None)
+
+    def iterLogs(self, startrevno, endrevno, cachesize=None, detailedLog=False, url=None):
+        '''
+        stream the log entries from 'startrevno' to 'endrevno' (at most 'cachesize' entries)
+        as SVNLogEntry objects, while 'svn log' is still running.
+        '''
+        if( url == None):
+            url = self.getUrl('')
+        args = ['-r', '%s:%s' % (startrevno, endrevno)]
+        if( cachesize):
+            args += ['--limit', str(cachesize)]
+        if( detailedLog):
+            args.append('--verbose')
+        if( isinstance(endrevno, int)):
+            #peg the url at the end revision so that paths deleted since are still found
+            url = self._pegUrl(url, endrevno)
+        logging.debug("Trying to get revision logs [%s:%s]" % (startrevno, endrevno))
+        for element in self._streamSvnXml('logentry', 'log', *args, url):
+            yield SVNLogEntry.fromxml(element)
+
+    def getLogs(self, startrevno, endrevno, cachesize=1, detailedLog=False):
+        return(list(self.iterLogs(startrevno, endrevno, cachesize, detailedLog)))
+
+    def getRevDiff(self, revno):
+        url = self.getUrl('')
+        logging.info("Trying to get revision diffs url:%s" % url)
+        diff_log = self._runSvn('diff', '--internal-diff', '--ignore-properties', '-c', str(revno), url)
+        return makeunicode(diff_log)
+
+    def getRevFileDiff(self, path, revno,prev_path=None,prev_rev_no=None):
+        if( prev_path == None):
+            prev_path = path
+
+        if( prev_rev_no == None):
+            prev_rev_no = revno-1
+
+        cur_url = self.getUrl(path)
+        prev_url = self.getUrl(prev_path)
+
+        logging.debug("Getting filelevel revision diffs")
+        logging.debug("revision : %d, url=%s" % (revno, cur_url))
+        logging.debug("prev url=%s" % prev_url)
+
+        try:
+            diff_log = self._runSvn('diff', '--internal-diff', '--notice-ancestry',
+                                    self._pegUrl(prev_url, prev_rev_no), self._pegUrl(cur_url, revno))
+        except SVNError:
+            logging.exception("Error in getting file level revision diff")
+            logging.debug("url : %s" % cur_url)
+            logging.debug("previous url : %s" % prev_url)
+            logging.debug("revno =%d", revno)
+            logging.debug("prev renvo = %d", prev_rev_no)
+            raise
+
+        return(makeunicode(diff_log))
+
+    def getInfo(self, path, revno=None):
+        '''Gets the information about the given path ONLY from the repository.
+        Returns a list of the dictionaries described in _getUrlInfo.
+        '''
+        url = self.getUrl(path)
+        logging.debug("Trying to get file information for %s" % url)
+        return(self._getInfoList(url, revno, depth='empty'))
+
+    def getFullDirInfo(self, path, revno):
+        '''
+        get full information of the directory at this given path and given revision
+        number. It is assumed that 'path' represents a directory.
+        '''
+        url = self.getUrl(path)
+        logging.debug("Trying to get full information for %s" % url)
+        return(self._getInfoList(url, revno, depth='infinity'))
+
+    def getFileList(self, path, revno):
+        '''
+        return the file list of all the files in the directory 'path' and its
+        sub directories
+        '''
+        dirpath = path
+        if not dirpath.endswith('/'):
+            dirpath = path + '/'
+        assert(dirpath.endswith('/'))
+        url = self.getUrl(path)
+        for entry in self._streamSvnXml('entry', 'list', '--depth', 'infinity', self._pegUrl(url, revno)):
+            if entry.get('kind') == 'file':
+                yield normurlpath(dirpath+entry.findtext('name'))
+
+    def isChildPath(self, filepath):
+        '''
+        Check if the given path is a child path of if given svnrepourl. All filepaths are child paths
+        if the repository path is same is repository 'root'
+        Use while updating/returning changed paths in the a given revision.
+        '''
+        fullpath = unquote(self.getRootUrl()).rstrip('/') + filepath
+        repourl = unquote(self.svnrepourl).rstrip('/')
+
+        return(fullpath == repourl or fullpath.startswith(repourl + '/'))
+
+    def __isBinaryFileExt(self, filepath):
+        '''
+        check the extension of filepath and see if the extension is in binary files
+        list
+        '''
+        return(filepath.endswith(self.binaryextlist))
+
+    def __isTextMimeType(self, fmimetype):
+        '''
+        check if the mime-type is a text mime-type based on the standard svn text file logic.
+        '''
+        textMimeType = False
+        if( fmimetype.startswith('text/') or fmimetype == 'image/x-xbitmap' or fmimetype == 'image/x-xpixmap'):
+            textMimeType = True
+        return(textMimeType)
+
+    def __isBinaryFile(self, filepath, revno):
+        '''
+        detect if file is a binary file using same heuristic as subversion. If the file
+        has no svn:mime-type  property, or has a mime-type that is textual (e.g. text/*),
+        Subversion assumes it is text. Otherwise it is treated as binary file.
+        '''
+        logging.debug("Binary file check for file <%s> revision:%d" % (filepath, revno))
+        binary = False #if explicit mime-type is not found always treat the file as 'text'
+        url = self.getUrl(filepath)
+
+        for prop in self._streamSvnXml('property', 'proplist', '--verbose', self._pegUrl(url, revno)):
+            if( prop.get('name') == 'svn:mime-type'):
+                fmimetype = prop.text or ''
+                if( self.__isTextMimeType(fmimetype)==False):
+                    #mime type is not a 'text' mime type.
+                    binary = True
+
+        return(binary)
+
+    def isBinaryFile(self, filepath, revno):
+        '''
+        revno should be the revision in which the file last changed: binary flags are cached
+        by url and revision.
+        '''
+        assert(filepath is not None)
+        assert(revno > 0)
+        binary = self.__isBinaryFileExt(filepath)
+
+        if( binary == False):
+            key = (self.getUrl(filepath), revno)
+            binary = self.mimecache.get(key)
+            if( binary is None):
+                binary = self.__isBinaryFile(filepath, revno)
+                self.mimecache[key] = binary
+        return(binary)
+
+    def prefetchBinaryFlags(self, files):
+        '''
+        find out which of the given (filepath, revno) files are binary with one 'svn propget'
+        command (per PROPGET_BATCH_SIZE files) instead of one 'proplist' per file, and cache
+        the results for isBinaryFile.
+        '''
+        targets = dict()
+        for filepath, revno in files:
+            if( not self.__isBinaryFileExt(filepath)):
+                key = (self.getUrl(filepath), revno)
+                if( key not in self.mimecache):
+                    targets[self._pegUrl(*key)] = key
+        targets = list(targets.items())
+        for start in range(0, len(targets), PROPGET_BATCH_SIZE):
+            self.__propgetBinaryFlags(dict(targets[start:start+PROPGET_BATCH_SIZE]))
+
+    def __propgetBinaryFlags(self, targets):
+        logging.debug("Binary file check for %d files" % len(targets))
+        complete = True
+        try:
+            output = self._runSvn('propget', 'svn:mime-type', '--xml', *targets)
+        except SVNError as exp:
+            #svn fails when a target has no mime-type but still prints the others.
+            # Other errors (e.g. a missing target) leave the files to isBinaryFile.
+            output = exp.stdout
+            complete = set(exp.codes) <= PROPGET_NOT_FOUND_CODES
+            if( not complete):
+                logging.warning("Batched binary file check failed: %s" % exp)
+
+        mimetypes = dict()
+        try:
+            for target in ET.fromstring(output).iterfind('target'):
+                mimetypes[unquote(target.get('path'))] = target.findtext('property') or ''
+        except ET.ParseError:
+            return
+
+        for pegurl, key in targets.items():
+            fmimetype = mimetypes.get(unquote(key[0]))
+            if( fmimetype is not None):
+                self.mimecache[key] = not self.__isTextMimeType(fmimetype)
+            elif( complete):
+                self.mimecache[key] = False
+
+    def isDirectory(self, revno, changepath):
+        #if the file/dir is deleted in the current revision. Then the status needs to be checked for
+        # one revision before that
+        logging.debug("isDirectory: path %s revno %d" % (changepath, revno))
+        #the kind of a path at a given revision never changes, hence ask the repository only once
+        key = (self.getUrl(changepath), revno)
+        isDir = self.kindcache.get(key)
+        if( isDir is not None):
+            return(isDir)
+        isDir = False
+
+        try:
+            entry = self.getInfo(changepath, revno)
+            if( len(entry) > 0 and entry[0]['kind'] == 'dir'):
+                isDir = True
+                logging.debug("path %s is Directory" % changepath)
+        except SVNError:
+            #it is possible that changedpath is deleted (even if changetype is not 'D') and
+            # doesnot exist in the revno. In this case, we will get an SVNError exception.
+            # this case just return isDir as 'False' and let the processing continue
+            pass
+
+        self.kindcache[key] = isDir
+        return(isDir)
+
+    def _getLineCount(self, filepath, revno):
+        '''
+        count the newlines of the file while 'svn cat' streams it, so the file is never held
+        in memory. Files larger than 'maxlinecountsize' bytes are skipped (0 lines): svn is
+        stopped as soon as the limit is passed.
+        '''
+        linecount = 0
+        size = 0
+        lastbyte = b'\n'
+
+        logging.info("Trying to get linecount for %s" % (filepath))
+        url = self.getUrl(filepath)
+        cmd = self._svnCommand('cat', self._pegUrl(url, revno))
+        process = self._startSvn(cmd)
+        try:
+            while True:
+                data = process.stdout.read1(READ_SIZE)
+                if( not data):
+                    break
+                size += len(data)
+                if( self.maxlinecountsize and size > self.maxlinecountsize):
+                    logging.info("Skipping linecount for %s, larger than %d bytes"
+                                 % (filepath, self.maxlinecountsize))
+                    return(0)
+                linecount += data.count(b'\n')
+                lastbyte = data[-1:]
+            stderr = process.stderr.read()
+            if( process.wait() != 0):
+                raise SVNError(cmd, process.returncode, makeunicode(stderr) or '')
+        finally:
+            self._closeProcess(process)
+
+        if( lastbyte != b'\n'):
+            #last line without a newline
+            linecount += 1
+        logging.debug("%s linecount : %d" % (filepath, linecount))
+
+        return(linecount)
+
+    def getLineCount(self, filepath, revno):
+        linecount = 0
+        if( self.isBinaryFile(filepath, revno) == False):
+            linecount = self._getLineCount(filepath, revno)
+
+        return(linecount)
+
+    def getRootUrl(self):
+        if( self.svnrooturl == None):
+            self._getUrlInfo(self.svnrepourl)
+            logging.debug("found rooturl %s" % self.svnrooturl)
+
+        #if the svnrooturl is None at this point, then raise an exception
+        if( self.svnrooturl == None):
+            raise RuntimeError("Repository Root not found")
+
+        return(self.svnrooturl)
+
+    def getUrl(self, path):
+        url = self.svnrepourl
+        if( path.strip() != ""):
+            url = self.getRootUrl() + quote(path)
+        return(url)
+
+    def isRepoUrlSameAsRoot(self):
+        repourl = self.svnrepourl.rstrip('/')
+        rooturl = self.getRootUrl()
+        rooturl = rooturl.rstrip('/')
+        return(repourl == rooturl)
+
+    def __iter__(self):
+        from .svnlogiter import SVNRevLogIter
+        return(iter(SVNRevLogIter(self, 1, self.getHeadRevNo())))
@@ -0,0 +1,342 @@
+"""
+Concurrent multi-repository sync engine.
+
+Workers fetch commits from the VCS servers in parallel while a single writer,
+the thread calling SyncEngine.run(), stores them. Workers never touch the
+database, which keeps SQLite free of "database is locked" errors.
+
+Git repositories configured several times with the same URL, e.g. once per
+branch, are handled by one worker that probes and fetches the remote once.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .authors import AuthorResolver
+from .models import SYNC_BATCH_SIZE, SyncRun, chunked
+from .timing import SyncTimer
+
+logger = logging.getLogger(__name__)
+
+SYNC_WORKERS = getattr(settings, 'BIGTEAM_SYNC_WORKERS', 4)
+SYNC_WORKER_MODE = getattr(settings, 'BIGTEAM_SYNC_WORKER_MODE', 'thread')
+SYNC_PER_HOST_LIMIT = getattr(settings, 'BIGTEAM_SYNC_PER_HOST_LIMIT', 2)
+
+# Seconds the writer waits for a message before checking on its workers
+POLL_INTERVAL = 1.0
+
+
+def repository_host(url):
+    """
+    Return the VCS server host of a repository URL.
+
+    Handles regular URLs, scp-style Git URLs (git@host:path) and local paths,
+    which all map to 'localhost'.
+    """
+    if '://' in url:
+        return urlparse(url).hostname or 'localhost'
+    if ':' in url.split('/', 1)[0]:
+        return url.split(':', 1)[0].rsplit('@', 1)[-1]
+    return 'localhost'
+
+
+class _WorkerQueue:
+    """
+    Queue of the messages workers send to the writer.
+
+    put() waits for room as long as the writer runs, and raises once it has
+    stopped, so that a worker never blocks forever on a full queue. In
+    process mode ``messages`` and ``stopped`` are manager proxies, which
+    workers receive pickled.
+    """
+
+    def __init__(self, messages, stopped):
+        self.messages = messages
+        self.stopped = stopped
+
+    def put(self, message):
+        while not self.stopped.is_set():
+            try:
+                return self.messages.put(message, timeout=POLL_INTERVAL)
+            except queue.Full:
+                continue
+        raise RuntimeError('Sync was cancelled')
+
+    def get(self, timeout):
+        return self.messages.get(timeout=timeout)
+
+
+def _init_worker():
+    # Spawned worker processes start without Django configured
+    django.setup()
+
+
+def remote_groups(repositories):
+    """
+    Group repositories by remote, in order of first appearance.
+
+    Git repositories with the same URL (e.g. different branches) form one
+    group that is probed and fetched once; every other repository is a
+    group of its own.
+    """
+    groups = {}
+    for repository in repositories:
+        if repository.vcs_type == 'git':
+            key = ('git', repository.url)
+        else:
+            key = ('pk', repository.pk)
+        groups.setdefault(key, []).append(repository)
+    return list(groups.values())
+
+
+def fetch_remote(repositories, last_stored_revs, messages, batch_size):
+    """
+    Worker task: fetch new commits of repositories sharing one remote.
+
+    A single ls-remote gives the heads of every repository of the group.
+    The shared Git mirror is then fetched by the first repository that
+    changed, and the others read their commits from it without another
+    fetch. Messages are the same as for fetch_repository().
+    """
+    if len(repositories) == 1:
+        return fetch_repository(repositories[0], last_stored_revs[0], messages, batch_size)
+
+    client = None
+    try:
+        client = repositories[0].get_vcs_client()
+        remote_heads = client.list_remote_heads()
+    except Exception as e:
+        for repository in repositories:
+            messages.put(('failed', repository.pk,
+                          (f'Connection test failed: {e}', SyncTimer())))
+        return
+    finally:
+        if client is not None:
+            client.cleanup()
+
+    for repository, last_stored_rev in zip(repositories, last_stored_revs):
+        fetch_repository(repository, last_stored_rev, messages, batch_size, remote_heads)
+
+
+def fetch_repository(repository, last_stored_rev, messages, batch_size, remote_heads=None):
+    """
+    Worker task: fetch new commits of one repository.
+
+    Commits are put on ``messages`` in batches as ('batch', pk, commits),
+    preceded by ('orphans', pk, revisions) when a force push removed stored
+    commits, and followed by ('done', pk, (head, timer)) or ('failed', pk, (error message,
+    timer)). When the remote head matches ``last_stored_rev`` only
+    ('skipped', pk, (head, timer)) is sent. ``timer`` is the SyncTimer with
+    the connect, head, fetch and parse phases of the worker.
+
+    ``remote_heads`` is the output of GitClient.list_remote_heads() when the
+    remote was already probed for a group of repositories.
+    """
+    timer = SyncTimer()
+    client = None
+    try:
+        try:
+            with timer.phase('connect'):
+                client = repository.get_vcs_client()
+                client.timer = timer
+                if remote_heads is not None:
+                    head = client.probe_head(remote_heads)
+                else:
+                    head = client.probe_head()
+        except Exception as e:
+            messages.put(('failed', repository.pk, (f'Connection test failed: {e}', timer)))
+            return
+        if head == last_stored_rev:
+            messages.put(('skipped', repository.pk, (head, timer)))
+            return
+
+        with timer.phase('head'):
+            orphans = repository.fetch_orphaned_commits(client, last_stored_rev, head)
+        if orphans:
+            messages.put(('orphans', repository.pk, orphans))
+        commits = timer.iterate(
+            repository.fetch_new_commits(client, last_stored_rev, head), 'parse')
+        for batch in chunked(commits, batch_size):
+            messages.put(('batch', repository.pk, batch))
+        messages.put(('done', repository.pk, (client.read_revision(head), timer)))
+    except Exception as e:
+        messages.put(('failed', repository.pk, (str(e), timer)))
+    finally:
+        if client is not None:
+            client.cleanup()
+
+
+class SyncEngine:
+    """
+    Sync several repositories concurrently.
+
+    Args:
+        workers: size of the worker pool
+        mode: 'thread' for network-bound fetching or 'process'
+        per_host_limit: maximum repositories fetched from one host at once
+        batch_size: commits per batch handed to the writer
+    """
+
+    def __init__(self, workers=None, mode=None, per_host_limit=None, batch_size=None):
+        self.workers = workers or SYNC_WORKERS
+        self.mode = mode or SYNC_WORKER_MODE
+        self.per_host_limit = per_host_limit or SYNC_PER_HOST_LIMIT
+        self.batch_size = batch_size or SYNC_BATCH_SIZE
+        if self.mode not in ('thread', 'process'):
+            raise ValueError(f"Unsupported sync worker mode: {self.mode}")
+
+    def _create_pool(self):
+        """
+        Create the executor and the message queue shared with its workers.
+
+        The queue is bounded so that workers block instead of piling up
+        batches when the writer falls behind.
+        """
+        maxsize = self.workers * 2
+        if self.mode == 'thread':
+            executor = ThreadPoolExecutor(self.workers, thread_name_prefix='sync-worker')
+            return executor, _WorkerQueue(queue.Queue(maxsize), threading.Event()), None
+
+        # Forked workers must not inherit open database connections
+        connections.close_all()
+        manager = multiprocessing.Manager()
+        executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        return executor, _WorkerQueue(manager.Queue(maxsize), manager.Event()), manager
+
+    def run(self, repositories, on_progress=None, on_finish=None):
+        """
+        Sync all given repositories.
+
+        Both callbacks are called from the writer thread, so they may write
+        to the database.
+
+        Args:
+            repositories: Repository objects to sync
+            on_progress: called as on_progress(repository, new_commits_count)
+                after each stored batch
+            on_finish: called as on_finish(repository, success, error) when
+                a repository is done
+
+        Returns:
+            tuple: (updated_count, failed_count)
+        """
+        pending = deque(remote_groups(repositories))
+        if not pending:
+            return 0, 0
+
+        resolver = AuthorResolver()
+        executor, messages, manager = self._create_pool()
+        running = {}          # pk -> (repository, future)
+        runs = {}             # pk -> (started_at, last_stored_rev, writer timer)
+        workers = Counter()   # future -> repositories it still has to finish
+        abandoned = []        # futures of failed repositories still producing
+        hosts = Counter()     # host -> remotes being fetched
+        new_commits = Counter()
+        results = Counter()   # 'updated' / 'failed' -> count
+
+        def dispatch():
+            # Start remotes whose host has spare capacity, in order
+            for group in list(pending):
+                if len(workers) >= self.workers:
+                    break
+                host = repository_host(group[0].url)
+                if hosts[host] >= self.per_host_limit:
+                    continue
+                pending.remove(group)
+                hosts[host] += 1
+                last_stored_revs = [repository.getLastStoredRev() for repository in group]
+                for repository in group:
+                    # Workers don't touch the database; load the upstream here
+                    repository.fork_of
+                future = executor.submit(fetch_remote, group, last_stored_revs,
+                                         messages, self.batch_size)
+                workers[future] = len(group)
+                for repository, last_stored_rev in zip(group, last_stored_revs):
+                    running[repository.pk] = (repository, future)
+                    runs[repository.pk] = (timezone.now(), last_stored_rev, SyncTimer())
+
+        def finish(pk, success, error='', status=None, head=None, timer=None):
+            repository, future = running.pop(pk)
+            started_at, last_stored_rev, writer_timer = runs.pop(pk)
+            workers[future] -= 1
+            if not workers[future]:
+                del workers[future]
+                hosts[repository_host(repository.url)] -= 1
+            if timer is not None:
+                writer_timer.merge(timer)
+            SyncRun.record(repository, writer_timer, status or ('success' if success else 'failed'),
+                           new_commits[pk], started_at=started_at,
+                           start_revision=last_stored_rev, end_revision=head, error=error)
+            if success:
+                results['updated'] += 1
+            else:
+                logger.error(f'Failed to update repository {repository.name}: {error}')
+                results['failed'] += 1
+            if on_finish is not None:
+                on_finish(repository, success, error)
+            dispatch()
+
+        try:
+            dispatch()
+            while running or not all(future.done() for future in abandoned):
+                try:
+                    kind, pk, payload = messages.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    # A worker that died without reporting counts as failed
+                    for pk, (repository, future) in list(running.items()):
+                        if future.done() and future.exception() is not None:
+                            finish(pk, False, str(future.exception()))
+                    continue
+
+                if pk not in running:
+                    continue  # batch of an abandoned repository
+                repository = running[pk][0]
+
+                if kind == 'batch':
+                    try:
+                        new_commits[pk] += repository.store_commits(
+                            payload, batch_size=self.batch_size, resolver=resolver,
+                            timer=runs[pk][2])
+                    except Exception as e:
+                        # Keep draining the worker's batches until it stops
+                        abandoned.append(running[pk][1])
+                        finish(pk, False, f'Failed to store commits: {e}')
+                        continue
+                    if on_progress is not None:
+                        on_progress(repository, new_commits[pk])
+                elif kind == 'orphans':
+                    try:
+                        repository.remove_commits(payload, timer=runs[pk][2])
+                    except Exception as e:
+                        abandoned.append(running[pk][1])
+                        finish(pk, False, f'Failed to remove rewritten commits: {e}')
+                elif kind == 'done':
+                    head, timer = payload
+                    repository.mark_synced(new_commits[pk], head)
+                    finish(pk, True, head=head, timer=timer)
+                elif kind == 'skipped':
+                    head, timer = payload
+                    repository.mark_skipped()
+                    finish(pk, True, status='skipped', head=head, timer=timer)
+                else:
+                    error, timer = payload
+                    finish(pk, False, error, timer=timer)
+        finally:
+            # Workers blocked on a full queue give up instead of waiting
+            # for a writer that is gone
+            messages.stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if manager is not None:
+                manager.shutdown()
+
+        return results['updated'], results['failed']
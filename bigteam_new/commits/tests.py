@@ -5,7 +5,37 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 
-from django.test import TestCase
+import asyncio
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import types
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from git import GitCommandError
+
+from .authors import AuthorResolver
+from .benchmark import compare, make_git_repository, make_svn_repository, run_benchmarks
+from .models import SYNC_JOB_TIMEOUT, Author, CommitLog, Repository, SyncJob, SyncRun
+from .scheduler import RepositorySchedule, SyncScheduler
+from .svnclient.svnlogclient import LRUCache, SVNError, SVNLogClient, SVNLogEntry
+from .svnclient.svnlogiter import SVNRevLog, SVNRevLogIter
+from .sync import SyncEngine, repository_host
+from .timing import SyncTimer
+from .vcs.base import VCSCommit
+from .vcs.git_client import GitClient, decode_tips
+from .vcs.git_log import iter_log_revisions
+from .vcs.git_mirror import MirrorStore
+from .vcs.svn_look import SVNLook, find_svn_repository
 
 
 class SimpleTest(TestCase):
@@ -14,3 +44,1284 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+def make_commit(revision, author='alice', email='', message='change'):
+    return VCSCommit(
+        revision=revision,
+        author=author,
+        author_email=email,
+        timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        message=message,
+    )
+
+
+class StoreCommitsTest(TestCase):
+    def setUp(self):
+        self.repo = Repository.objects.create(name='demo', url='file:///tmp/demo')
+
+    def test_store_commits_counts_only_new_commits(self):
+        self.repo.store_commits([make_commit('1')])
+        commits = [make_commit(str(rev)) for rev in range(1, 6)]
+
+        stored = self.repo.store_commits(commits, batch_size=2)
+
+        self.assertEqual(stored, 4)
+        self.assertEqual(self.repo.commits.count(), 5)
+
+    def test_store_commits_ignores_duplicates_within_batch(self):
+        stored = self.repo.store_commits([make_commit('1'), make_commit('1')])
+
+        self.assertEqual(stored, 1)
+        self.assertEqual(CommitLog.objects.count(), 1)
+
+    def test_store_commits_advances_svn_watermark_numerically(self):
+        self.repo.store_commits([make_commit('9'), make_commit('10')], batch_size=1)
+        self.repo.store_commits([make_commit('2')])
+
+        self.repo.refresh_from_db()
+        self.assertEqual(self.repo.watermark, {'revision': 10})
+        self.assertEqual(self.repo.getLastStoredRev(), '10')
+
+    def test_import_history_checkpoints_only_complete_windows(self):
+        def iter_commits(start_revision, end_revision):
+            for revision in range(int(start_revision), int(end_revision) + 1):
+                if revision == 5:
+                    raise SVNError(['svn', 'log'], 1, 'svn: E175002: Connection reset')
+                yield make_commit(str(revision))
+
+        client = mock.Mock()
+        client.get_latest_revision.return_value = '6'
+        client.count_revisions.side_effect = int
+        client.iter_commits.side_effect = iter_commits
+
+        with mock.patch.object(Repository, 'get_vcs_client', return_value=client), \
+                self.assertRaises(SVNError):
+            self.repo.import_history(window_size=3)
+
+        self.repo.refresh_from_db()
+        self.assertEqual(self.repo.import_progress(), '3/6')
+        self.assertEqual(self.repo.getLastStoredRev(), '3')
+        self.assertEqual(self.repo.sync_runs.get().status, 'failed')
+
+    def test_clear_resets_watermark(self):
+        self.repo.store_commits([make_commit('1')])
+
+        self.repo.clear()
+
+        self.repo.refresh_from_db()
+        self.assertIsNone(self.repo.getLastStoredRev())
+
+    def test_store_commits_matches_authors_by_account_then_email(self):
+        existing = Author.objects.create(account='old', email='bob@example.com')
+
+        self.repo.store_commits([
+            make_commit('1', author='alice'),
+            make_commit('2', author='bob', email='bob@example.com'),
+            make_commit('3', author='alice'),
+        ])
+
+        self.assertEqual(Author.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual(existing.account, 'bob')
+        self.assertEqual(
+            self.repo.commits.get(revision='2').author_id, existing.id)
+
+
+class AuthorResolverTest(TestCase):
+    def test_resolve_uses_preloaded_cache(self):
+        author = Author.objects.create(account='alice', email='alice@example.com')
+        resolver = AuthorResolver()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve('alice'), author)
+            self.assertEqual(resolver.resolve('alice', 'alice@example.com'), author)
+
+    def test_resolve_many_creates_missing_authors_in_bulk(self):
+        resolver = AuthorResolver()
+
+        authors = resolver.resolve_many([('alice', ''), ('bob', 'bob@example.com')])
+
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(authors[('bob', 'bob@example.com')].display, 'bob')
+        self.assertIsNotNone(authors[('alice', '')].pk)
+
+    def test_resolve_sees_authors_created_by_another_sync(self):
+        resolver = AuthorResolver()
+        other = AuthorResolver()
+        author = other.resolve('alice')
+
+        self.assertEqual(resolver.resolve('alice'), author)
+        self.assertEqual(Author.objects.count(), 1)
+
+    def test_rename_keeps_other_author_of_same_account(self):
+        first = Author.objects.create(account='bob', email='bob@example.com')
+        second = Author.objects.create(account='bob', email='robert@example.com')
+        resolver = AuthorResolver()
+
+        self.assertEqual(resolver.resolve('robert', 'robert@example.com'), second)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver.resolve('bob'), first)
+
+    def test_get_or_create_author_without_email(self):
+        repo = Repository.objects.create(name='demo', url='file:///tmp/demo')
+
+        author = repo.get_or_create_author('alice')
+
+        self.assertEqual(author, repo.get_or_create_author('alice'))
+
+
+def make_workdir(test):
+    """
+    Create a temporary directory removed after ``test``, holding the Git
+    mirrors of the test as well.
+    """
+    path = tempfile.mkdtemp(prefix='bigteam_test_')
+    test.addCleanup(shutil.rmtree, path, True)
+    mirrors = override_settings(BIGTEAM_GIT_MIRROR_DIR=os.path.join(path, 'mirrors'))
+    mirrors.enable()
+    test.addCleanup(mirrors.disable)
+    return path
+
+
+def git_output(path, *args, **env):
+    """
+    Run a git command in ``path`` and return its stripped output.
+    """
+    return subprocess.run(['git', *args], cwd=path, check=True, text=True,
+                          capture_output=True, env={**os.environ, **env}).stdout.strip()
+
+
+def add_git_commits(path, commit_count, authors=('alice',)):
+    """
+    Add ``commit_count`` commits to the checked out branch of ``path``.
+    """
+    start = int(git_output(path, 'rev-list', '--count', '--all') or 0)
+    for number in range(start, start + commit_count):
+        author = authors[number % len(authors)]
+        with open(os.path.join(path, f'file{number % 3}.txt'), 'a') as handle:
+            handle.write(f'line {number}\n')
+        git_output(path, 'add', '-A')
+        git_output(path, 'commit', '-q', '-m', f'commit {number}',
+                   GIT_AUTHOR_NAME=author, GIT_AUTHOR_EMAIL=f'{author}@example.com',
+                   GIT_COMMITTER_NAME=author, GIT_COMMITTER_EMAIL=f'{author}@example.com')
+
+
+def make_git_repo(path, commit_count, authors=('alice',), branch='main'):
+    """
+    Create a Git repository with ``commit_count`` commits on ``branch``.
+    """
+    os.makedirs(path, exist_ok=True)
+    git_output(path, 'init', '-q', '-b', branch)
+    add_git_commits(path, commit_count, authors)
+    return path
+
+
+def force_push(path, base):
+    """
+    Rewrite the checked out branch of ``path`` as one new commit on ``base``.
+    """
+    git_output(path, 'reset', '-q', '--hard', base)
+    git_output(path, 'commit', '-q', '--allow-empty', '-m', 'rewritten',
+               GIT_AUTHOR_NAME='alice', GIT_AUTHOR_EMAIL='alice@example.com',
+               GIT_COMMITTER_NAME='alice', GIT_COMMITTER_EMAIL='alice@example.com')
+
+
+def failing_git_log(commit_count):
+    """
+    Patch GitClient to read ``commit_count`` commits, then fail as if git
+    log died.
+    """
+    from .vcs import git_client
+    iter_log_revisions = git_client.iter_log_revisions
+
+    def iter_log_then_fail(*args, **kwargs):
+        yield from islice(iter_log_revisions(*args, **kwargs), commit_count)
+        raise GitCommandError(['git', 'log'], 128, b'fatal: connection reset')
+
+    return mock.patch('commits.vcs.git_client.iter_log_revisions', iter_log_then_fail)
+
+
+class GitSyncTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+        self.origin = make_git_repo(os.path.join(self.tmpdir, 'origin'), 5,
+                                    authors=('alice', 'bob'))
+
+    def test_iter_commits_is_a_generator(self):
+        client = GitClient(self.origin, branch='main')
+        self.addCleanup(client.cleanup)
+
+        commits = client.iter_commits()
+
+        self.assertIsInstance(commits, types.GeneratorType)
+        revisions = [commit.revision for commit in commits]
+        self.assertEqual(len(revisions), 5)
+
+    def test_iter_commits_raises_when_git_log_fails(self):
+        client = GitClient(self.origin, branch='main')
+        self.addCleanup(client.cleanup)
+        commits = []
+
+        with failing_git_log(1), self.assertRaises(GitCommandError):
+            for commit in client.iter_new_commits(None, client.probe_head()):
+                commits.append(commit)
+
+        self.assertEqual(len(commits), 1)
+
+    def test_iter_log_reads_files_and_line_counts(self):
+        with open(os.path.join(self.origin, 'image.bin'), 'wb') as handle:
+            handle.write(b'\x00\x01binary')
+        with open(os.path.join(self.origin, 'file0.txt'), 'a') as handle:
+            handle.write('one\ntwo\n')
+        git_output(self.origin, 'add', '-A')
+        git_output(self.origin, 'commit', '-q', '-m', 'subject\n\nbody',
+                   GIT_AUTHOR_NAME='alice', GIT_AUTHOR_EMAIL='alice@example.com',
+                   GIT_COMMITTER_NAME='alice', GIT_COMMITTER_EMAIL='alice@example.com')
+
+        shas = git_output(self.origin, 'rev-list', '--reverse', 'main').split()
+
+        commits = list(iter_log_revisions(self.origin, shas))
+        # Records cut at every few bytes parse the same
+        with mock.patch('commits.vcs.git_log.READ_SIZE', 7):
+            self.assertEqual([vars(commit) for commit in iter_log_revisions(self.origin, shas)],
+                             [vars(commit) for commit in commits])
+
+        self.assertEqual(len(commits), 6)
+        self.assertEqual(commits[0].files_changed, ['file0.txt'])
+        self.assertEqual((commits[0].lines_added, commits[0].lines_deleted), (1, 0))
+        last = commits[-1]
+        self.assertEqual(last.revision, git_output(self.origin, 'rev-parse', 'HEAD'))
+        self.assertEqual(sorted(last.files_changed), ['file0.txt', 'image.bin'])
+        self.assertEqual(last.lines_added, 2)
+        self.assertEqual(last.message, 'subject\n\nbody')
+
+    def test_iter_log_stops_git_when_closed_early(self):
+        commits = iter_log_revisions(self.origin, [git_output(self.origin, 'rev-parse', 'main')])
+        next(commits)
+
+        commits.close()
+
+    def test_iter_commits_walks_complete_history_in_pages(self):
+        add_git_commits(self.origin, 6)
+        client = GitClient(self.origin, branch='main')
+        self.addCleanup(client.cleanup)
+
+        with mock.patch('commits.vcs.git_client.GIT_PAGE_SIZE', 4):
+            revisions = [commit.revision for commit in client.iter_commits()]
+
+        expected = git_output(self.origin, 'rev-list', '--topo-order', '--reverse', 'main')
+        self.assertEqual(revisions, expected.splitlines())
+
+    def test_local_repository_is_read_in_place(self):
+        client = GitClient(f'file://{self.origin}', branch='main')
+        self.addCleanup(client.cleanup)
+        add_git_commits(self.origin, 1)
+
+        head = client.probe_head()
+        commits = list(client.iter_new_commits(None, head))
+
+        self.assertEqual(head, git_output(self.origin, 'rev-parse', 'HEAD'))
+        self.assertEqual(len(commits), 6)
+        self.assertEqual(client.local_path, self.origin)
+        self.assertEqual(MirrorStore().mirrors(), [])
+
+    def test_update_stores_commits_and_authors(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+
+        self.assertTrue(repo.update())
+
+        self.assertEqual(repo.commits.count(), 5)
+        self.assertEqual(Author.objects.count(), 2)
+
+    def test_update_resumes_from_watermark(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+        repo.update()
+        tip = git_output(self.origin, 'rev-parse', 'HEAD')
+        self.assertEqual(repo.getLastStoredRev(), tip)
+
+        add_git_commits(self.origin, 2)
+        repo.update()
+
+        repo.refresh_from_db()
+        self.assertEqual(repo.commits.count(), 7)
+        self.assertEqual(repo.getLastStoredRev(),
+                         git_output(self.origin, 'rev-parse', 'HEAD'))
+
+    def test_update_keeps_watermark_of_interrupted_fetch(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+        shas = git_output(self.origin, 'rev-list', '--reverse', 'main').splitlines()
+
+        with failing_git_log(1), mock.patch('commits.models.SYNC_BATCH_SIZE', 1):
+            self.assertFalse(repo.update())
+
+        repo.refresh_from_db()
+        self.assertEqual(repo.getLastStoredRev(), shas[0])
+        self.assertEqual(repo.sync_runs.get().status, 'failed')
+
+        # The next sync is not skipped and reads the rest
+        self.assertTrue(repo.update())
+        self.assertEqual(repo.commits.count(), 5)
+        self.assertEqual(repo.getLastStoredRev(), shas[-1])
+
+    def test_update_replaces_commits_rewritten_by_force_push(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+        repo.update()
+        dropped = git_output(self.origin, 'rev-list', 'HEAD~2..HEAD').split()
+
+        force_push(self.origin, 'HEAD~2')
+        self.assertTrue(repo.update())
+
+        revisions = set(repo.commits.values_list('revision', flat=True))
+        self.assertEqual(revisions, set(git_output(self.origin, 'rev-list', 'HEAD').split()))
+        self.assertFalse(revisions & set(dropped))
+        self.assertEqual(repo.sync_runs.order_by('-id').first().commit_count, 1)
+
+    def test_update_skips_unchanged_repository(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+        repo.update()
+
+        with mock.patch.object(GitClient, '_setup_local_repo') as setup:
+            self.assertTrue(repo.update())
+
+        setup.assert_not_called()
+        repo.refresh_from_db()
+        self.assertEqual(repo.sync_skips, 1)
+
+    def test_update_fails_on_unreachable_repository(self):
+        repo = Repository.objects.create(name='missing', vcs_type='git', branch='main',
+                                         url=os.path.join(self.tmpdir, 'missing'))
+
+        self.assertFalse(repo.update())
+
+    def test_update_tracks_branch_globs_and_stores_each_commit_once(self):
+        git_output(self.origin, 'checkout', '-q', '-b', 'release/1.0')
+        add_git_commits(self.origin, 2)
+        git_output(self.origin, 'checkout', '-q', '-b', 'feature/x', 'main')
+        add_git_commits(self.origin, 1)
+        git_output(self.origin, 'checkout', '-q', 'main')
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main, release/*')
+
+        self.assertTrue(repo.update())
+
+        self.assertEqual(repo.commits.count(), 5 + 2)
+        repo.refresh_from_db()
+        self.assertEqual(set(repo.watermark['refs']), {'main', 'release/1.0'})
+
+        git_output(self.origin, 'checkout', '-q', 'release/1.0')
+        add_git_commits(self.origin, 1)
+        git_output(self.origin, 'checkout', '-q', 'main')
+        git_output(self.origin, 'merge', '-q', '--no-ff', '-m', 'merge release', 'release/1.0',
+                   GIT_AUTHOR_NAME='alice', GIT_AUTHOR_EMAIL='alice@example.com',
+                   GIT_COMMITTER_NAME='alice', GIT_COMMITTER_EMAIL='alice@example.com')
+        self.assertTrue(repo.update())
+
+        self.assertEqual(repo.commits.count(), 5 + 2 + 1 + 1)
+        self.assertEqual(repo.sync_runs.order_by('-id').first().commit_count, 2)
+        self.assertTrue(repo.update())
+        repo.refresh_from_db()
+        self.assertEqual(repo.sync_skips, 1)
+
+    def test_cut_short_walk_keeps_branch_tips_out_of_watermark(self):
+        git_output(self.origin, 'branch', 'release/1.0', 'main~2')
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main, release/*')
+        client = repo.get_vcs_client()
+        head = client.probe_head()
+        commits = repo.fetch_new_commits(client, None, head)
+
+        repo.store_commits(islice(commits, 2))
+        repo.mark_synced(2, client.read_revision(head))
+        repo.refresh_from_db()
+        self.assertNotIn('refs', repo.watermark)
+
+        repo.store_commits(commits)
+        repo.mark_synced(3, client.read_revision(head))
+        repo.refresh_from_db()
+        self.assertEqual(repo.watermark['refs'], decode_tips(head))
+        client.cleanup()
+
+    def test_import_history_records_checkpoints(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+
+        self.assertEqual(repo.import_history(window_size=2), 5)
+
+        repo.refresh_from_db()
+        self.assertEqual(repo.import_progress(), '5/5')
+
+        add_git_commits(self.origin, 3)
+        self.assertEqual(repo.import_history(window_size=2), 3)
+        repo.refresh_from_db()
+        self.assertEqual(repo.import_progress(), '8/8')
+
+    def test_import_history_progress_counts_commits_below_path(self):
+        os.makedirs(os.path.join(self.origin, 'sub'))
+        with open(os.path.join(self.origin, 'sub', 'app.txt'), 'w') as handle:
+            handle.write('line\n')
+        git_output(self.origin, 'add', '-A')
+        git_output(self.origin, 'commit', '-q', '-m', 'sub',
+                   GIT_AUTHOR_NAME='alice', GIT_AUTHOR_EMAIL='alice@example.com',
+                   GIT_COMMITTER_NAME='alice', GIT_COMMITTER_EMAIL='alice@example.com')
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main', path='sub')
+
+        self.assertEqual(repo.import_history(window_size=2), 1)
+
+        repo.refresh_from_db()
+        self.assertEqual(repo.import_progress(), '1/1')
+
+    def test_import_history_keeps_checkpoint_of_failed_window(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+        shas = git_output(self.origin, 'rev-list', '--reverse', 'main').splitlines()
+
+        with failing_git_log(3), self.assertRaises(GitCommandError):
+            repo.import_history(window_size=2)
+
+        repo.refresh_from_db()
+        self.assertEqual(repo.getLastStoredRev(), shas[1])
+        self.assertEqual(repo.import_progress(), '2/5')
+        self.assertEqual(repo.sync_runs.get().status, 'failed')
+
+        self.assertEqual(repo.import_history(window_size=2), 3)
+        repo.refresh_from_db()
+        self.assertEqual(repo.getLastStoredRev(), shas[-1])
+
+
+@override_settings(BIGTEAM_READ_LOCAL_IN_PLACE=False)
+class GitMirrorTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+        self.origin = make_git_repo(os.path.join(self.tmpdir, 'origin'), 3)
+        self.store = MirrorStore(os.path.join(self.tmpdir, 'store'))
+
+    def sync(self):
+        client = GitClient(self.origin, branch='main', mirror_store=self.store)
+        try:
+            commits = list(client.iter_commits())
+        finally:
+            client.cleanup()
+        return client, commits
+
+    def test_mirror_is_kept_and_fetched_incrementally(self):
+        first, commits = self.sync()
+        self.assertEqual(len(commits), 3)
+        mirror = self.store.path_for(self.origin)
+        self.assertTrue(os.path.isdir(mirror))
+
+        add_git_commits(self.origin, 1)
+        second, commits = self.sync()
+
+        self.assertEqual(len(commits), 4)
+        self.assertEqual(self.store.mirrors(), [mirror])
+        self.assertLess(second.timer.counters['objects'], first.timer.counters['objects'])
+
+    def test_mirror_lock_is_shared_by_readers(self):
+        client = GitClient(self.origin, branch='main', mirror_store=self.store)
+        client.get_latest_revision()
+        mirror = self.store.path_for(self.origin)
+
+        self.assertFalse(self.store.lock(mirror).acquire(blocking=False))
+        self.assertTrue(self.store.lock(mirror).acquire(shared=True, blocking=False))
+        client.cleanup()
+        self.assertTrue(self.store.lock(mirror).acquire(blocking=False))
+
+    def test_collect_garbage_evicts_least_recently_used_mirrors(self):
+        self.sync()
+        other = make_git_repo(os.path.join(self.tmpdir, 'other'), 3)
+        client = GitClient(other, branch='main', mirror_store=self.store)
+        client.get_latest_revision()
+        client.cleanup()
+        os.utime(self.store.path_for(self.origin), (0, 0))
+
+        self.store.max_size = self.store.size(self.store.path_for(other)) + 1
+        evicted = self.store.collect_garbage()
+
+        self.assertEqual(evicted, [self.store.path_for(self.origin)])
+        self.assertEqual(self.store.mirrors(), [self.store.path_for(other)])
+
+    def test_store_is_collected_only_after_a_fetch(self):
+        with mock.patch.object(self.store, 'collect_garbage', return_value=[]) as collect:
+            self.sync()
+            self.assertEqual(collect.call_count, 1)
+
+            # The mirror already holds the head, nothing is fetched
+            client = GitClient(self.origin, branch='main', mirror_store=self.store)
+            list(client.iter_commits(end_revision=client.probe_head()))
+            client.cleanup()
+            self.assertEqual(collect.call_count, 1)
+
+    def test_fork_borrows_objects_of_its_upstream(self):
+        fork = os.path.join(self.tmpdir, 'fork')
+        subprocess.run(['git', 'clone', '-q', self.origin, fork], check=True)
+        add_git_commits(fork, 2)
+        upstream = GitClient(self.origin, branch='main', mirror_store=self.store)
+        client = GitClient(fork, branch='main', mirror_store=self.store, reference=upstream)
+        try:
+            commits = list(client.iter_commits())
+        finally:
+            client.cleanup()
+
+        self.assertEqual(len(commits), 5)
+        upstream_mirror = self.store.path_for(self.origin)
+        fork_mirror = self.store.path_for(fork)
+        self.assertEqual(self.store.alternates(fork_mirror), [upstream_mirror])
+        def count(path):
+            stats = dict(line.split(': ')
+                         for line in git_output(path, 'count-objects', '-v').splitlines())
+            return int(stats['count']) + int(stats['in-pack'])
+        self.assertLess(count(fork_mirror), count(upstream_mirror))
+
+        # The upstream is older but must outlive its fork
+        os.utime(upstream_mirror, (0, 0))
+        self.store.max_size = 1
+        self.assertEqual(self.store.collect_garbage(), [fork_mirror])
+        self.assertEqual(self.store.collect_garbage(), [upstream_mirror])
+
+    def test_path_scope_reads_only_commits_touching_path(self):
+        os.makedirs(os.path.join(self.origin, 'sub'))
+        for number in range(2):
+            with open(os.path.join(self.origin, 'sub', 'app.txt'), 'a') as handle:
+                handle.write(f'line {number}\n')
+            with open(os.path.join(self.origin, 'file0.txt'), 'a') as handle:
+                handle.write(f'line {number}\n')
+            git_output(self.origin, 'add', '-A')
+            git_output(self.origin, 'commit', '-q', '-m', f'sub {number}',
+                       GIT_AUTHOR_NAME='alice', GIT_AUTHOR_EMAIL='alice@example.com',
+                       GIT_COMMITTER_NAME='alice', GIT_COMMITTER_EMAIL='alice@example.com')
+        add_git_commits(self.origin, 1)
+        client = GitClient(self.origin, branch='main', path='/sub/', mirror_store=self.store)
+        try:
+            commits = list(client.iter_commits())
+        finally:
+            client.cleanup()
+
+        self.assertEqual([commit.message for commit in commits], ['sub 0', 'sub 1'])
+        self.assertEqual(commits[1].files_changed, ['sub/app.txt'])
+        self.assertEqual(commits[1].lines_added, 1)
+        mirror = self.store.path_for(self.origin)
+        self.assertTrue(os.path.exists(
+            os.path.join(mirror, 'objects', 'info', 'commit-graphs', 'commit-graph-chain')))
+        git_output(mirror, 'commit-graph', 'verify')
+
+    def test_force_push_after_mirror_eviction_reads_branch_again(self):
+        repo = Repository.objects.create(name='origin', url=self.origin,
+                                         vcs_type='git', branch='main')
+        repo.update()
+        shutil.rmtree(MirrorStore().path_for(self.origin))
+
+        force_push(self.origin, 'HEAD~1')
+        self.assertTrue(repo.update())
+
+        # The old tip can't be compared with any more, so it is kept
+        self.assertEqual(repo.commits.count(), 4)
+        self.assertTrue(repo.commits.filter(
+            revision=git_output(self.origin, 'rev-parse', 'HEAD')).exists())
+
+    def test_repository_passes_upstream_to_fork_client(self):
+        upstream = Repository.objects.create(name='upstream', url=self.origin,
+                                             vcs_type='git', branch='main')
+        fork = Repository.objects.create(name='fork', url='/srv/fork', vcs_type='git',
+                                         branch='main', fork_of=upstream)
+
+        client = fork.get_vcs_client()
+
+        self.assertEqual(client.reference.repo_url, self.origin)
+        self.assertIsNone(client.reference.reference)
+
+
+class SyncEngineTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+        for number in range(3):
+            path = make_git_repo(os.path.join(self.tmpdir, f'repo{number}'),
+                                 number + 2, authors=('alice', 'bob'))
+            Repository.objects.create(name=f'repo{number}', url=path,
+                                      vcs_type='git', branch='main')
+
+    def test_repository_host(self):
+        self.assertEqual(repository_host('https://svn.example.com/repo'), 'svn.example.com')
+        self.assertEqual(repository_host('git@github.com:org/repo.git'), 'github.com')
+        self.assertEqual(repository_host('/srv/git/repo'), 'localhost')
+
+    def test_run_syncs_all_repositories(self):
+        engine = SyncEngine(workers=3, per_host_limit=1, batch_size=2)
+
+        updated, failed = engine.run(Repository.objects.all())
+
+        self.assertEqual((updated, failed), (3, 0))
+        self.assertEqual(CommitLog.objects.count(), 2 + 3 + 4)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertFalse(Repository.objects.filter(last_sync=None).exists())
+
+        self.assertEqual(engine.run(Repository.objects.all()), (3, 0))
+        self.assertEqual(Repository.objects.filter(sync_skips=1).count(), 3)
+        self.assertEqual(SyncRun.objects.filter(status='success').count(), 3)
+        self.assertEqual(SyncRun.objects.filter(status='skipped').count(), 3)
+
+    def test_workers_stop_when_writer_fails(self):
+        def fail(repository, new_commits_count):
+            raise RuntimeError('writer failed')
+
+        engine = SyncEngine(workers=3, per_host_limit=3, batch_size=1)
+        with self.assertRaises(RuntimeError):
+            engine.run(Repository.objects.all(), on_progress=fail)
+
+        # Workers blocked on the full queue give up instead of hanging exit
+        for thread in threading.enumerate():
+            if thread.name.startswith('sync-worker'):
+                thread.join(5)
+                self.assertFalse(thread.is_alive())
+
+    @override_settings(BIGTEAM_READ_LOCAL_IN_PLACE=False)
+    def test_run_fetches_shared_remote_once(self):
+        origin = os.path.join(self.tmpdir, 'repo0')
+        git_output(origin, 'checkout', '-q', '-b', 'develop')
+        add_git_commits(origin, 3)
+        Repository.objects.create(name='repo0-develop', url=origin,
+                                  vcs_type='git', branch='develop')
+        repositories = Repository.objects.filter(url=origin)
+
+        with mock.patch.object(GitClient, '_fetch', autospec=True,
+                               side_effect=GitClient._fetch) as fetch, \
+                mock.patch.object(GitClient, 'list_remote_heads', autospec=True,
+                                  side_effect=GitClient.list_remote_heads) as list_heads:
+            self.assertEqual(SyncEngine(workers=2).run(repositories), (2, 0))
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(list_heads.call_count, 1)
+        self.assertEqual(Repository.objects.get(name='repo0').commits.count(), 2)
+        self.assertEqual(Repository.objects.get(name='repo0-develop').commits.count(), 5)
+
+    def test_run_removes_commits_rewritten_by_force_push(self):
+        SyncEngine(workers=2).run(Repository.objects.all())
+        origin = os.path.join(self.tmpdir, 'repo1')
+        force_push(origin, 'HEAD~1')
+
+        self.assertEqual(SyncEngine(workers=2).run(Repository.objects.all()), (3, 0))
+
+        repo = Repository.objects.get(name='repo1')
+        self.assertEqual(set(repo.commits.values_list('revision', flat=True)),
+                         set(git_output(origin, 'rev-list', 'HEAD').split()))
+
+    def test_run_keeps_watermark_of_interrupted_fetch(self):
+        repo = Repository.objects.get(name='repo2')
+        shas = git_output(repo.url, 'rev-list', '--reverse', 'main').splitlines()
+
+        with failing_git_log(1):
+            updated, failed = SyncEngine(workers=1, batch_size=1).run([repo])
+
+        self.assertEqual((updated, failed), (0, 1))
+        repo.refresh_from_db()
+        self.assertEqual(repo.getLastStoredRev(), shas[0])
+        self.assertEqual(repo.sync_runs.get().status, 'failed')
+
+    def test_run_reports_failed_repositories(self):
+        Repository.objects.create(name='missing', vcs_type='git', branch='main',
+                                  url=os.path.join(self.tmpdir, 'missing'))
+
+        updated, failed = SyncEngine(workers=2).run(Repository.objects.all())
+
+        self.assertEqual((updated, failed), (3, 1))
+
+
+class RepositoryScheduleTest(TestCase):
+    def test_next_delay_backs_off_exponentially_up_to_limit(self):
+        schedule = RepositorySchedule(60, jitter=0, max_backoff=300)
+        self.assertEqual(schedule.next_delay(), 60)
+
+        schedule.record(False)
+        self.assertEqual(schedule.next_delay(), 120)
+        schedule.record(False)
+        schedule.record(False)
+        self.assertEqual(schedule.next_delay(), 300)
+
+        schedule.record(True)
+        self.assertEqual(schedule.next_delay(), 60)
+
+    def test_next_delay_applies_jitter(self):
+        schedule = RepositorySchedule(100, jitter=0.1)
+
+        for _ in range(20):
+            self.assertTrue(90 <= schedule.next_delay() <= 110)
+
+
+class SyncSchedulerTest(TransactionTestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+
+    def test_sync_repository_stores_commits(self):
+        origin = make_git_repo(os.path.join(self.tmpdir, 'origin'), 4)
+        repo = Repository.objects.create(name='origin', url=origin,
+                                         vcs_type='git', branch='main')
+
+        success = asyncio.run(SyncScheduler(workers=2, batch_size=3).sync_repository(repo))
+
+        self.assertTrue(success)
+        self.assertEqual(repo.commits.count(), 4)
+
+    def test_sync_repository_sees_authors_deleted_since_last_sync(self):
+        origin = make_git_repo(os.path.join(self.tmpdir, 'origin'), 2)
+        repo = Repository.objects.create(name='origin', url=origin,
+                                         vcs_type='git', branch='main')
+        scheduler = SyncScheduler()
+        self.assertTrue(asyncio.run(scheduler.sync_repository(repo)))
+
+        Author.objects.all().delete()
+        add_git_commits(origin, 2)
+        repo.refresh_from_db()
+
+        self.assertTrue(asyncio.run(scheduler.sync_repository(repo)))
+        self.assertEqual(repo.commits.count(), 2)
+
+    def test_repository_loop_reads_repository_after_delay(self):
+        repo = Repository.objects.create(name='origin', url='/srv/git/origin',
+                                         vcs_type='git', branch='main')
+        scheduler = SyncScheduler()
+        synced = []
+
+        async def sync_repository(repository):
+            synced.append(repository.branch)
+            stop_event.set()
+            return True
+
+        async def run():
+            with mock.patch.object(RepositorySchedule, 'first_delay', return_value=0.5), \
+                    mock.patch.object(scheduler, 'sync_repository', sync_repository):
+                loop = asyncio.create_task(scheduler._repository_loop(repo.pk, stop_event))
+                await asyncio.sleep(0.1)
+                await scheduler.write(
+                    Repository.objects.filter(pk=repo.pk).update, branch='develop')
+                await loop
+
+        stop_event = asyncio.Event()
+        asyncio.run(run())
+
+        self.assertEqual(synced, ['develop'])
+
+    def test_sync_repository_reports_failure(self):
+        repo = Repository.objects.create(name='missing', vcs_type='git', branch='main',
+                                         url=os.path.join(self.tmpdir, 'missing'))
+
+        self.assertFalse(asyncio.run(SyncScheduler().sync_repository(repo)))
+
+
+class SyncJobTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+        origin = make_git_repo(os.path.join(self.tmpdir, 'origin'), 3)
+        self.repo = Repository.objects.create(name='origin', url=origin,
+                                              vcs_type='git', branch='main')
+
+    def test_update_all_queues_jobs_without_syncing(self):
+        response = self.client.get(reverse('commits:update_all'))
+        self.client.get(reverse('commits:update_all'))
+
+        self.assertRedirects(response, reverse('commits:home'), fetch_redirect_response=False)
+        self.assertEqual(SyncJob.objects.filter(status='queued').count(), 1)
+        self.assertEqual(CommitLog.objects.count(), 0)
+
+    def test_claim_returns_each_job_once(self):
+        SyncJob.enqueue([self.repo])
+
+        self.assertEqual(len(SyncJob.claim(limit=5)), 1)
+        self.assertEqual(SyncJob.claim(limit=5), [])
+
+    def test_jobs_of_dead_workers_are_reclaimed(self):
+        SyncJob.enqueue([self.repo])
+        job = SyncJob.claim(limit=5)[0]
+        self.assertEqual(SyncJob.enqueue([self.repo]), [])
+
+        SyncJob.objects.filter(pk=job.pk).update(
+            updated_at=datetime.now(timezone.utc) - timedelta(seconds=SYNC_JOB_TIMEOUT + 1))
+
+        self.assertEqual(len(SyncJob.enqueue([self.repo])), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_repository_has_one_active_job(self):
+        SyncJob.enqueue([self.repo])
+
+        # What a concurrent enqueue that missed the job above would insert
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SyncJob.objects.create(repository=self.repo)
+
+    def test_sync_worker_processes_queued_jobs(self):
+        SyncJob.enqueue([self.repo])
+
+        call_command('sync_worker', '--once', stdout=open(os.devnull, 'w'))
+
+        job = SyncJob.objects.get()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.commits_ingested, 3)
+        self.assertIsNotNone(job.duration())
+
+    def test_sync_worker_closes_jobs_when_engine_fails(self):
+        SyncJob.enqueue([self.repo])
+
+        with mock.patch('commits.sync.SyncEngine.run', side_effect=RuntimeError('writer failed')):
+            with self.assertRaises(RuntimeError):
+                call_command('sync_worker', '--once', stdout=open(os.devnull, 'w'))
+
+        job = SyncJob.objects.get()
+        self.assertEqual((job.status, job.error), ('failed', 'Sync did not complete'))
+
+    def test_sync_status_reports_latest_job_per_repository(self):
+        SyncJob.objects.create(repository=self.repo, status='done')
+        SyncJob.enqueue([self.repo])
+
+        response = self.client.get(reverse('commits:sync_status'),
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        data = response.json()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['status'], 'queued')
+        self.assertEqual(data[0]['repository__name'], 'origin')
+
+
+class SyncRunTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+        self.origin = make_git_repo(os.path.join(self.tmpdir, 'origin'), 4)
+        self.repo = Repository.objects.create(name='origin', url=self.origin,
+                                              vcs_type='git', branch='main')
+
+    def test_timer_charges_nested_phases_exclusively(self):
+        timer = SyncTimer()
+
+        with timer.phase('parse'):
+            with timer.phase('fetch'):
+                pass
+        list(timer.iterate(range(3), 'write'))
+
+        self.assertEqual(set(name for name, seconds in timer.durations.items() if seconds),
+                         {'parse', 'fetch', 'write'})
+        self.assertAlmostEqual(timer.total(), sum(timer.durations.values()))
+
+    @override_settings(BIGTEAM_READ_LOCAL_IN_PLACE=False)
+    def test_update_records_phase_timings(self):
+        self.repo.update()
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, 'success')
+        self.assertEqual(run.commit_count, 4)
+        self.assertEqual(run.start_revision, '')
+        self.assertEqual(run.end_revision, git_output(self.origin, 'rev-parse', 'HEAD'))
+        self.assertGreater(run.objects_fetched, 0)
+        for field in ('head_time', 'fetch_time', 'parse_time', 'author_time', 'write_time'):
+            self.assertGreater(getattr(run, field), 0, field)
+
+    def test_update_records_skipped_and_failed_runs(self):
+        self.repo.update()
+        self.repo.update()
+        Repository.objects.filter(pk=self.repo.pk).update(url=os.path.join(self.tmpdir, 'gone'))
+        self.repo.refresh_from_db()
+        self.repo.update()
+
+        statuses = list(SyncRun.objects.order_by('id').values_list('status', flat=True))
+        self.assertEqual(statuses, ['success', 'skipped', 'failed'])
+        self.assertIn('Connection test failed', SyncRun.objects.get(status='failed').error)
+
+    def test_admin_throughput_view(self):
+        self.repo.update()
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+        response = self.client.get(reverse('admin:commits_syncrun_throughput'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'origin')
+
+
+SVNLOOK_LOG_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<log>
+<logentry revision="1">
+<author>alice</author>
+<date>2024-01-01T11:00:00.000000Z</date>
+<paths>
+<path kind="dir" action="A">/trunk</path>
+<path kind="file" action="A">/trunk/a.txt</path>
+<path kind="dir" action="A">/branches</path>
+</paths>
+<msg>first</msg>
+</logentry>
+<logentry revision="2">
+<author>alice</author>
+<date>2024-01-01T12:00:00.000000Z</date>
+<paths>
+<path kind="file" action="M">/branches/b.txt</path>
+</paths>
+<msg>second</msg>
+</logentry>
+<logentry revision="3">
+<author>bob</author>
+<date>2024-01-02T12:00:00.000000Z</date>
+<paths>
+<path kind="file" action="M">/trunk/a.txt</path>
+</paths>
+<msg>third
+
+body
+</msg>
+</logentry>
+</log>
+"""
+
+
+class SVNLookTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+
+    def test_find_svn_repository_splits_url(self):
+        repository = os.path.join(self.tmpdir, 'repo')
+        os.makedirs(os.path.join(repository, 'db'))
+        open(os.path.join(repository, 'format'), 'w').close()
+
+        self.assertEqual(find_svn_repository(f'file://{repository}/trunk/src'),
+                         (repository, 'trunk/src'))
+        self.assertEqual(find_svn_repository(repository), (repository, ''))
+        self.assertIsNone(find_svn_repository(self.tmpdir))
+        self.assertIsNone(find_svn_repository('https://svn.example.com/repo'))
+
+    def test_iter_commits_reads_revisions_below_path(self):
+        look = SVNLook('/srv/svn/repo', 'trunk')
+
+        with fake_svn(SVNLOOK_LOG_XML) as popen:
+            commits = list(look.iter_commits(1, 3))
+
+        # One svn log for the whole range
+        popen.assert_called_once()
+        self.assertEqual(popen.call_args.args[0][-4:],
+                         ['-r', '1:3', '--verbose', 'file:///srv/svn/repo@3'])
+        self.assertEqual([commit.revision for commit in commits], ['1', '3'])
+        self.assertEqual(commits[0].files_changed, ['/trunk', '/trunk/a.txt'])
+        self.assertEqual(commits[0].timestamp,
+                         datetime(2024, 1, 1, 11, 0, tzinfo=timezone.utc))
+        self.assertEqual((commits[1].author, commits[1].message), ('bob', 'third\n\nbody'))
+
+    @skipUnless(shutil.which('svnadmin') and shutil.which('svnlook') and shutil.which('svn'),
+                'svn is not installed')
+    def test_local_repository_is_read_with_svnlook(self):
+        from .vcs.svn_client import SVNClient
+        url = make_svn_repository(os.path.join(self.tmpdir, 'repo'), 3, authors=2)
+        client = SVNClient(url)
+
+        commits = list(client.iter_commits(end_revision=client.probe_head()))
+
+        self.assertIsNotNone(client.svnlook)
+        self.assertEqual([commit.revision for commit in commits], ['1', '2', '3'])
+        self.assertEqual(commits[1].author, 'author1')
+        self.assertEqual(commits[2].files_changed, ['/file2.txt'])
+
+
+SVN_LOG_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<log>
+<logentry revision="4">
+<author>alice</author>
+<date>2024-01-01T12:00:00.123456Z</date>
+<paths>
+<path kind="dir" action="A" copyfrom-path="/trunk" copyfrom-rev="3">/branches/b1</path>
+<path kind="file" action="M">/trunk/a.txt</path>
+</paths>
+<msg>branch</msg>
+</logentry>
+<logentry revision="5">
+<date>2024-01-02T12:00:00.000000Z</date>
+<paths>
+<path kind="file" action="D">/trunk/b.txt</path>
+</paths>
+<msg></msg>
+</logentry>
+</log>
+"""
+
+
+def fake_svn(stdout, returncode=0, stderr=b''):
+    """Patch the svn command line client to print ``stdout``."""
+    process = mock.Mock(stdout=io.BytesIO(stdout), stderr=io.BytesIO(stderr),
+                        returncode=returncode)
+    process.wait.return_value = returncode
+    process.poll.return_value = returncode
+    return mock.patch('commits.svnclient.svnlogclient.subprocess.Popen', return_value=process)
+
+
+def iter_fake_logs(start, end, cachesize=None, detailedLog=False, paths=0):
+    for revno in range(start, min(end, start + cachesize - 1) + 1):
+        changed_paths = [{'path': f'/trunk/{revno}/{number}.txt', 'action': 'A',
+                          'copyfrom_path': None, 'copyfrom_revision': None}
+                         for number in range(paths)]
+        yield SVNLogEntry(revno, author='alice', changed_paths=changed_paths)
+
+
+def fake_log_client(head, paths=0):
+    """SVNLogClient double whose revisions each change ``paths`` files."""
+    client = mock.Mock(spec=['iterLogs', 'getHeadRevNo'])
+    client.iterLogs.side_effect = lambda *args, **kwargs: iter_fake_logs(*args, **kwargs,
+                                                                         paths=paths)
+    client.getHeadRevNo.return_value = head
+    return client
+
+
+class SVNLogClientTest(TestCase):
+    def test_iter_logs_streams_xml_log(self):
+        client = SVNLogClient('https://svn.example.com/repo')
+
+        with fake_svn(SVN_LOG_XML) as popen:
+            entries = list(client.iterLogs(4, 5, cachesize=100, detailedLog=True))
+
+        command = popen.call_args.args[0]
+        self.assertEqual(command[:2], ['svn', 'log'])
+        self.assertIn('--xml', command)
+        self.assertEqual(command[-6:], ['-r', '4:5', '--limit', '100', '--verbose',
+                                        'https://svn.example.com/repo@5'])
+        self.assertEqual([entry.revno for entry in entries], [4, 5])
+        self.assertEqual((entries[0].author, entries[0].message), ('alice', 'branch'))
+        self.assertEqual(entries[0].date, datetime(2024, 1, 1, 12, 0))
+        self.assertEqual(entries[0].changed_paths[0],
+                         {'path': '/branches/b1', 'action': 'A', 'kind': 'dir',
+                          'copyfrom_path': '/trunk', 'copyfrom_revision': 3})
+        self.assertEqual((entries[1].author, entries[1].message), ('', ''))
+
+    def test_password_is_passed_on_stdin(self):
+        client = SVNLogClient('https://svn.example.com/repo', username='alice', password='secret')
+
+        with fake_svn(SVN_LOG_XML) as popen:
+            list(client.iterLogs(4, 5))
+
+        command = popen.call_args.args[0]
+        self.assertNotIn('secret', command)
+        self.assertIn('--password-from-stdin', command)
+        self.assertIn('--trust-server-cert-failures=not-yet-valid', command)
+        popen.return_value.stdin.write.assert_called_once_with(b'secret\n')
+        popen.return_value.stdin.close.assert_called_once_with()
+
+    def test_head_lookup_raises_when_svn_reports_nothing(self):
+        client = SVNLogClient('https://svn.example.com/repo')
+
+        with fake_svn(b'<?xml version="1.0"?>\n<info>\n</info>\n'):
+            with self.assertRaises(SVNError):
+                client.getHeadRevNo()
+
+    def test_failed_command_raises_svn_error(self):
+        client = SVNLogClient('https://svn.example.com/repo')
+
+        with fake_svn(b'<?xml version="1.0"?>\n<log>\n', returncode=1,
+                      stderr=b"svn: E170013: Unable to connect to a repository\n"):
+            with self.assertRaises(SVNError) as raised:
+                list(client.iterLogs(1, 2))
+
+        self.assertEqual(raised.exception.codes, ['E170013'])
+
+    def test_rev_log_iter_reads_range_in_windows(self):
+        client = fake_log_client(5)
+
+        revisions = [revlog.revno for revlog in
+                     SVNRevLogIter(client, 1, 0, cachesize=2, maxcachesize=2)]
+
+        self.assertEqual(revisions, [1, 2, 3, 4, 5])
+        self.assertEqual([call.args[:2] for call in client.iterLogs.call_args_list],
+                         [(1, 5), (3, 5), (5, 5)])
+
+    def test_rev_log_iter_grows_windows_of_fast_server(self):
+        client = fake_log_client(20)
+
+        revisions = [revlog.revno for revlog in
+                     SVNRevLogIter(client, 1, 20, cachesize=2, maxcachesize=8)]
+
+        self.assertEqual(revisions, list(range(1, 21)))
+        self.assertEqual([(call.args[0], call.kwargs['cachesize'])
+                          for call in client.iterLogs.call_args_list],
+                         [(1, 2), (3, 4), (7, 8), (15, 8)])
+
+    @mock.patch('commits.svnclient.svnlogiter.MAX_WINDOW_PATHS', 20)
+    def test_rev_log_iter_shrinks_windows_of_large_revisions(self):
+        client = fake_log_client(12, paths=10)
+
+        revisions = [revlog.revno for revlog in
+                     SVNRevLogIter(client, 1, 12, cachesize=2, maxcachesize=8)]
+
+        self.assertEqual(revisions, list(range(1, 13)))
+        # 4 revisions changing 40 paths pass the limit of 20 paths
+        self.assertEqual([call.kwargs['cachesize'] for call in client.iterLogs.call_args_list],
+                         [2, 4, 2, 4])
+
+    def test_rev_log_iter_prefetches_next_window(self):
+        client = fake_log_client(3)
+        second_window = threading.Event()
+
+        def iter_logs(start, *args, **kwargs):
+            if start == 2:
+                second_window.set()
+            return iter_fake_logs(start, *args, **kwargs)
+
+        client.iterLogs.side_effect = iter_logs
+
+        revlogs = iter(SVNRevLogIter(client, 1, 3, cachesize=1, maxcachesize=1))
+        self.assertEqual(next(revlogs).revno, 1)
+
+        # requested while the first revision is still being processed
+        self.assertTrue(second_window.wait(5))
+        self.assertEqual([revlog.revno for revlog in revlogs], [2, 3])
+
+    def test_path_kinds_come_from_log(self):
+        client = SVNLogClient('https://svn.example.com/repo')
+        client.svnrooturl = 'https://svn.example.com/repo'
+        with fake_svn(SVN_LOG_XML):
+            entries = list(client.iterLogs(4, 5, detailedLog=True))
+
+        with mock.patch.object(client, 'isDirectory') as is_directory:
+            paths = [(change.isDirectory(), change.filepath())
+                     for entry in entries
+                     for change in SVNRevLog(client, entry).getChangeEntries()]
+
+        self.assertEqual(paths, [(True, '/branches/b1/'), (False, '/trunk/a.txt'),
+                                 (False, '/trunk/b.txt')])
+        is_directory.assert_not_called()
+
+    def test_is_directory_asks_once_per_path_and_revision(self):
+        client = SVNLogClient('https://svn.example.com/repo', kindcache=LRUCache(2))
+        client.svnrooturl = 'https://svn.example.com/repo'
+        info = [{'kind': 'dir'}]
+
+        with mock.patch.object(client, 'getInfo', return_value=info) as get_info:
+            self.assertTrue(client.isDirectory(4, '/trunk'))
+            self.assertTrue(client.isDirectory(4, '/trunk'))
+            client.isDirectory(5, '/trunk')
+            client.isDirectory(4, '/branches')
+            # the least recently used entry was evicted
+            client.isDirectory(4, '/trunk')
+
+        self.assertEqual([call.args for call in get_info.call_args_list],
+                         [('/trunk', 4), ('/trunk', 5), ('/branches', 4), ('/trunk', 4)])
+
+    def test_binary_files_of_revision_are_found_in_one_request(self):
+        client = SVNLogClient('https://svn.example.com/repo', binaryext=['png'])
+        client.svnrooturl = 'https://svn.example.com/repo'
+        output = b"""<?xml version="1.0" encoding="UTF-8"?>
+<properties>
+<target path="https://svn.example.com/repo/trunk/data%20file.bin">
+<property name="svn:mime-type">application/octet-stream</property>
+</target>
+<target path="https://svn.example.com/repo/trunk/page.html">
+<property name="svn:mime-type">text/html</property>
+</target>
+</properties>
+"""
+        # svn fails when some target has no svn:mime-type
+        result = subprocess.CompletedProcess([], 1, output, b"svn: warning: W200017: Property "
+                                             b"'svn:mime-type' not found on 'a.txt'\n"
+                                             b"svn: E200000: A problem occurred\n")
+        files = [('/trunk/a.txt', 4), ('/trunk/data file.bin', 4), ('/trunk/page.html', 4),
+                 ('/trunk/logo.png', 4), ('/trunk/a.txt', 4)]
+
+        with mock.patch('commits.svnclient.svnlogclient.subprocess.run',
+                        return_value=result) as run:
+            client.prefetchBinaryFlags(files)
+            flags = [client.isBinaryFile(*target) for target in files]
+
+        run.assert_called_once()
+        self.assertEqual(run.call_args.args[0][-3:],
+                         ['https://svn.example.com/repo/trunk/a.txt@4',
+                          'https://svn.example.com/repo/trunk/data%20file.bin@4',
+                          'https://svn.example.com/repo/trunk/page.html@4'])
+        self.assertEqual(flags, [False, True, False, True, False])
+
+    def test_binary_check_falls_back_to_proplist_after_propget_error(self):
+        client = SVNLogClient('https://svn.example.com/repo')
+        client.svnrooturl = 'https://svn.example.com/repo'
+        result = subprocess.CompletedProcess([], 1, b'', b"svn: E160013: path not found\n")
+
+        with mock.patch('commits.svnclient.svnlogclient.subprocess.run', return_value=result):
+            client.prefetchBinaryFlags([('/trunk/gone.txt', 4)])
+        with fake_svn(b'<?xml version="1.0"?><properties/>') as popen:
+            self.assertFalse(client.isBinaryFile('/trunk/gone.txt', 4))
+
+        self.assertEqual(popen.call_args.args[0][:2], ['svn', 'proplist'])
+
+    def test_line_count_streams_file(self):
+        client = SVNLogClient('https://svn.example.com/repo')
+        client.svnrooturl = 'https://svn.example.com/repo'
+
+        counts = []
+        for content in [b'', b'one\ntwo\n', b'one\ntwo\nthree']:
+            with fake_svn(content) as popen:
+                counts.append(client._getLineCount('/trunk/a.txt', 4))
+
+        self.assertEqual(counts, [0, 2, 3])
+        self.assertEqual(popen.call_args.args[0][:2], ['svn', 'cat'])
+        self.assertEqual(popen.call_args.args[0][-1], 'https://svn.example.com/repo/trunk/a.txt@4')
+
+    def test_line_count_skips_large_file(self):
+        client = SVNLogClient('https://svn.example.com/repo', maxlinecountsize=10)
+        client.svnrooturl = 'https://svn.example.com/repo'
+
+        with fake_svn(b'line\n' * 100) as popen:
+            popen.return_value.poll.return_value = None
+            self.assertEqual(client._getLineCount('/trunk/generated.txt', 4), 0)
+
+        # svn is stopped instead of sending the rest of the file
+        popen.return_value.kill.assert_called_once()
+
+    def test_svn_client_raises_when_log_fails(self):
+        from .vcs.svn_client import SVNClient
+        client = SVNClient('https://svn.example.com/repo', in_place=False)
+        client._get_svn_client().svnrooturl = 'https://svn.example.com/repo'
+
+        with fake_svn(SVN_LOG_XML[:300], returncode=1, stderr=b"svn: E175002: Connection reset\n"):
+            with self.assertRaises(SVNError):
+                list(client.iter_commits('4', '5'))
+
+    def test_svn_client_reads_log_with_command_line_client(self):
+        from .vcs.svn_client import SVNClient
+        client = SVNClient('https://svn.example.com/repo', in_place=False)
+        client._get_svn_client().svnrooturl = 'https://svn.example.com/repo'
+
+        with fake_svn(SVN_LOG_XML):
+            commits = list(client.iter_commits('4', '5'))
+
+        self.assertEqual([commit.revision for commit in commits], ['4', '5'])
+        self.assertEqual([commit.author for commit in commits], ['alice', 'unknown'])
+        self.assertEqual(commits[0].files_changed, ['/branches/b1', '/trunk/a.txt'])
+        self.assertEqual(commits[1].timestamp, datetime(2024, 1, 2, 12, 0, tzinfo=timezone.utc))
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        self.tmpdir = make_workdir(self)
+
+    def test_make_git_repository(self):
+        path = make_git_repository(os.path.join(self.tmpdir, 'repo'), 12, authors=3)
+
+        self.assertEqual(git_output(path, 'rev-list', '--count', 'main'), '12')
+        authors = set(git_output(path, 'log', '--format=%an').splitlines())
+        self.assertEqual(len(authors), 3)
+
+    def test_run_benchmarks_reports_throughput_and_queries(self):
+        report = run_benchmarks(self.tmpdir, vcs_types=['git'], commit_count=20, authors=2)
+
+        results = {result['name']: result for result in report['results']}
+        self.assertEqual(results['git-client']['commits'], 20)
+        self.assertEqual(results['git-client']['queries'], 0)
+        # Read through a fresh mirror, paying for the initial fetch
+        self.assertEqual(results['git-client-mirror']['commits'], 20)
+        self.assertGreater(results['git-client-mirror']['phases']['fetch'], 0)
+        self.assertEqual(results['git-update']['commits'], 20)
+        self.assertGreater(results['git-update']['commits_per_sec'], 0)
+        self.assertLess(results['git-update']['queries_per_commit'], 1)
+        self.assertEqual(results['git-update-unchanged']['commits'], 0)
+
+    def test_compare_flags_slower_cases(self):
+        baseline = {'results': [{'name': 'git-update', 'commits_per_sec': 100.0},
+                                {'name': 'git-client', 'commits_per_sec': 100.0}]}
+        report = {'results': [{'name': 'git-update', 'commits_per_sec': 70.0},
+                              {'name': 'git-client', 'commits_per_sec': 90.0}]}
+
+        self.assertEqual(compare(report, baseline, 0.2), [('git-update', 100.0, 70.0)])
@@ -0,0 +1,68 @@
+"""
+Per-phase timing of repository syncs.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class SyncTimer:
+    """
+    Accumulates the time a sync spends in each phase.
+
+    Phases nest: while an inner phase runs, the outer phase is paused, so a
+    clone triggered from inside log parsing is charged to 'fetch' only.
+    Timers are plain data and can be sent back from worker processes.
+    """
+
+    PHASES = ('connect', 'head', 'fetch', 'parse', 'authors', 'write')
+
+    def __init__(self):
+        self.durations = dict.fromkeys(self.PHASES, 0.0)
+        self.counters = Counter()
+        self._stack = []
+        self._started = None
+
+    @contextmanager
+    def phase(self, name):
+        now = perf_counter()
+        if self._stack:
+            self.durations[self._stack[-1]] += now - self._started
+        self._stack.append(name)
+        self._started = now
+        try:
+            yield
+        finally:
+            now = perf_counter()
+            self.durations[name] += now - self._started
+            self._stack.pop()
+            self._started = now
+
+    def iterate(self, iterable, name):
+        """
+        Yield from ``iterable``, charging the time spent producing each item
+        to phase ``name``.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name, amount):
+        """Add ``amount`` to counter ``name`` (e.g. 'bytes', 'objects')."""
+        self.counters[name] += amount
+
+    def merge(self, other):
+        """Add the durations and counters of another timer."""
+        for name, seconds in other.durations.items():
+            self.durations[name] += seconds
+        self.counters.update(other.counters)
+        return self
+
+    def total(self):
+        return sum(self.durations.values())
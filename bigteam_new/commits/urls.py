@@ -17,4 +17,5 @@ urlpatterns = [
     path('ajax/commits/detail/', ajaxviews.commits_detail, name='commits_detail'),
     path('ajax/commits/stats/', ajaxviews.commits_stats, name='commits_stats'),
     path('ajax/commits/project/', ajaxviews.commits_project, name='commits_project'),
+    path('ajax/sync/status/', ajaxviews.sync_status, name='sync_status'),
 ]
@@ -3,13 +3,39 @@ Abstract base class for Version Control System clients.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 from datetime import datetime
+from urllib.parse import unquote, urlparse
 import logging
+import os
+
+from ..timing import SyncTimer
 
 logger = logging.getLogger(__name__)
 
 
+def local_repository_path(url: str) -> Optional[str]:
+    """
+    Get the filesystem path of a repository stored on this host.
+
+    Args:
+        url: file:// URL or absolute path of the repository
+
+    Returns:
+        str: the path, which may not exist, or None for remote URLs
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        if parsed.netloc not in ('', 'localhost'):
+            return None
+        path = unquote(parsed.path)
+    elif not parsed.scheme and os.path.isabs(url):
+        path = url
+    else:
+        return None
+    return path
+
+
 class VCSCommit:
     """
     Standard commit representation across different VCS.
@@ -20,13 +46,17 @@ class VCSCommit:
                  author_email: str = '',
                  timestamp: Optional[datetime] = None,
                  message: str = '',
-                 files_changed: Optional[List[str]] = None):
+                 files_changed: Optional[List[str]] = None,
+                 lines_added: int = 0,
+                 lines_deleted: int = 0):
         self.revision = revision
         self.author = author
         self.author_email = author_email
         self.timestamp = timestamp or datetime.now()
         self.message = message
         self.files_changed = files_changed or []
+        self.lines_added = lines_added
+        self.lines_deleted = lines_deleted
     
     def __str__(self):
         return f"{self.revision}: {self.message[:50]}..."
@@ -45,6 +75,8 @@ class BaseVCSClient(ABC):
         self.username = username
         self.password = password
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Replaced by the caller to collect the timings of one sync
+        self.timer = SyncTimer()
     
     @abstractmethod
     def authenticate(self) -> bool:
@@ -61,24 +93,74 @@ class BaseVCSClient(ABC):
         """
         pass
     
+    def probe_head(self) -> str:
+        """
+        Get the remote head revision with as little work as possible.
+
+        Used to skip syncs when nothing changed; raises if the repository
+        cannot be reached, so it also serves as the connection test.
+        """
+        return self.get_latest_revision()
+    
     @abstractmethod
-    def get_commits(self, 
-                   start_revision: Optional[str] = None, 
-                   end_revision: Optional[str] = None,
-                   since_date: Optional[datetime] = None) -> List[VCSCommit]:
+    def count_revisions(self, revision: str) -> int:
         """
-        Get commits from the repository.
-        
+        Count the revisions of the history up to and including ``revision``.
+        """
+        pass
+    
+    @abstractmethod
+    def iter_commits(self,
+                     start_revision: Optional[str] = None,
+                     end_revision: Optional[str] = None,
+                     since_date: Optional[datetime] = None) -> Iterator[VCSCommit]:
+        """
+        Iterate over commits from the repository.
+
+        Implementations are generators: commits are produced while the
+        underlying log is read, so callers can store them incrementally
+        without holding the whole history in memory.
+
         Args:
             start_revision: Starting revision (inclusive)
             end_revision: Ending revision (inclusive)
             since_date: Get commits since this date
-            
-        Returns:
-            List of VCSCommit objects
+
+        Yields:
+            VCSCommit objects
         """
         pass
+
+    def get_commits(self,
+                   start_revision: Optional[str] = None,
+                   end_revision: Optional[str] = None,
+                   since_date: Optional[datetime] = None) -> List[VCSCommit]:
+        """
+        Get commits from the repository as a list.
+
+        Prefer iter_commits() for large ranges.
+        """
+        return list(self.iter_commits(start_revision, end_revision, since_date))
     
+    def find_orphaned_commits(self, last_known_revision: str, head: str) -> List[str]:
+        """
+        Find the commits up to ``last_known_revision`` that are no longer in
+        the history up to ``head``, e.g. after a force push.
+
+        Histories that can't be rewritten have none.
+        """
+        return []
+
+    def read_revision(self, head: str) -> Optional[str]:
+        """
+        Get the part of ``head`` whose commits were all read, which a sync
+        may record as its watermark.
+
+        Fetch errors are raised, so once the commits up to ``head`` were
+        iterated to the end all of ``head`` was read.
+        """
+        return head
+
     @abstractmethod
     def test_connection(self) -> bool:
         """
@@ -86,24 +168,36 @@ class BaseVCSClient(ABC):
         """
         pass
     
+    def iter_new_commits(self, last_known_revision: Optional[str] = None) -> Iterator[VCSCommit]:
+        """
+        Iterate over new commits since the last known revision.
+
+        Errors are raised, not logged, so that a fetch failing halfway is
+        not mistaken for the end of the history.
+        """
+        latest = self.get_latest_revision()
+        if not last_known_revision:
+            # First sync: backfill the complete history
+            yield from self.iter_commits(end_revision=latest)
+            return
+        
+        if last_known_revision == latest:
+            return  # No new commits
+        
+        yield from self.iter_commits(start_revision=last_known_revision,
+                                     end_revision=latest)
+
     def get_new_commits(self, last_known_revision: Optional[str] = None) -> List[VCSCommit]:
         """
-        Get new commits since the last known revision.
-        """
-        try:
-            latest = self.get_latest_revision()
-            if not last_known_revision:
-                # If no last known revision, get recent commits
-                return self.get_commits(end_revision=latest)
-            
-            if last_known_revision == latest:
-                return []  # No new commits
-            
-            return self.get_commits(start_revision=last_known_revision, 
-                                  end_revision=latest)
-        except Exception as e:
-            self.logger.error(f"Error getting new commits: {e}")
-            return []
+        Get new commits since the last known revision as a list.
+        """
+        return list(self.iter_new_commits(last_known_revision))
+    
+    def cleanup(self):
+        """
+        Release local resources held by the client.
+        """
+        pass
     
     def normalize_author(self, author: str, email: str = '') -> str:
         """
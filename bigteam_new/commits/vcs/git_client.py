@@ -3,10 +3,12 @@ Git VCS client implementation.
 """
 
 import os
-import tempfile
+import re
 import shutil
 from datetime import datetime
-from typing import List, Optional
+from fnmatch import fnmatchcase
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
 import logging
 
 try:
@@ -16,25 +18,99 @@ try:
 except ImportError:
     GIT_AVAILABLE = False
 
-from .base import BaseVCSClient, VCSCommit
+from django.conf import settings
+
+from .base import BaseVCSClient, VCSCommit, local_repository_path
+from .git_log import iter_log_revisions, iter_revisions
+from .git_mirror import MIRROR_REFSPECS, MirrorStore
 
 logger = logging.getLogger(__name__)
 
+# Commits read from git log at a time when walking a history
+GIT_PAGE_SIZE = getattr(settings, 'BIGTEAM_GIT_PAGE_SIZE', 1000)
+
+
+def parse_branches(value: str) -> List[str]:
+    """
+    Split a branch setting such as 'main, release/*' into names and globs.
+    """
+    return [name for name in re.split(r'[\s,]+', value or '') if name] or ['main']
+
+
+def encode_tips(tips: Dict[str, str]) -> str:
+    """
+    Encode branch tips as one revision string.
+
+    A single tip is its plain SHA, as when only one branch was tracked;
+    several tips are sorted 'branch=sha' pairs separated by commas, so equal
+    sets of tips always encode to the same string.
+    """
+    if len(tips) == 1:
+        return next(iter(tips.values()))
+    return ','.join(f'{name}={sha}' for name, sha in sorted(tips.items()))
+
+
+def decode_tips(revision: str, branch: str = '') -> Dict[str, str]:
+    """
+    Decode a revision string of encode_tips() into {branch: sha}.
+
+    A plain SHA maps to ``branch``.
+    """
+    if '=' not in revision:
+        return {branch: revision}
+    return dict(pair.split('=', 1) for pair in revision.split(','))
+
+
+def local_git_path(url: str) -> Optional[str]:
+    """
+    Get the directory of a Git repository (bare or not) stored on this host,
+    or None if ``url`` is remote or not a Git repository.
+    """
+    path = local_repository_path(url)
+    if path and (os.path.exists(os.path.join(path, '.git'))
+                 or os.path.isdir(os.path.join(path, 'objects'))
+                 and os.path.isfile(os.path.join(path, 'HEAD'))):
+        return path
+    return None
+
 
 class GitClient(BaseVCSClient):
     """
     Git repository client implementation.
     """
     
-    def __init__(self, repo_url: str, branch: str = 'main', 
+    def __init__(self, repo_url: str, branch: str = 'main', path: str = '',
                  username: str = '', password: str = '',
-                 ssh_key_path: str = '', access_token: str = ''):
+                 ssh_key_path: str = '', access_token: str = '',
+                 mirror_store: MirrorStore = None, reference: 'GitClient' = None,
+                 in_place: Optional[bool] = None):
         super().__init__(repo_url, username, password)
-        self.branch = branch or 'main'
+        self.branches = parse_branches(branch)
+        # First tracked branch, for callers that follow a single one
+        self.branch = self.branches[0]
+        # Subdirectory whose commits are read, '' for the whole repository
+        self.path = (path or '').strip('/')
         self.ssh_key_path = ssh_key_path
         self.access_token = access_token
+        self.mirrors = mirror_store or MirrorStore()
+        # Client of the upstream repository when this one is a fork
+        self.reference = reference
+        # Repository read directly when it is on this host
+        if in_place is None:
+            # BIGTEAM_READ_LOCAL_IN_PLACE is read here rather than at import
+            # so that tests and the benchmark can switch it
+            in_place = getattr(settings, 'BIGTEAM_READ_LOCAL_IN_PLACE', True)
+        if in_place:
+            self.in_place_path = local_git_path(repo_url)
+        else:
+            self.in_place_path = None
         self.local_path = None
         self.repo = None
+        self._lock = None
+        # Whether this client fetched into the store, so cleanup() checks its size
+        self._fetched = False
+        # Tip SHAs whose history the last iter_commits() walk read in full
+        self.read_tips = set()
         
         if not GIT_AVAILABLE:
             raise ImportError("GitPython is required for Git support. Install it with: pip install GitPython")
@@ -55,33 +131,143 @@ class GitClient(BaseVCSClient):
         
         return self.repo_url
     
-    def _setup_local_repo(self):
+    def _setup_local_repo(self, required=()):
         """
-        Set up local repository for operations.
+        Open the mirror of the repository, fetching what changed upstream.
+
+        The mirror is created by the first sync of a URL and kept across
+        runs, so later syncs only transfer new objects. It is shared by all
+        repositories with this URL: when it already holds the ``required``
+        commits, e.g. because another branch of the same remote was just
+        synced, nothing is fetched. It stays locked in shared mode until
+        cleanup() so it can't be evicted while in use.
+
+        A repository on this host is opened where it is instead, with
+        nothing to fetch or lock.
+
+        Args:
+            required: commit SHAs the caller needs in the mirror
         """
-        if self.local_path and os.path.exists(self.local_path):
-            try:
+        if self.in_place_path:
+            self.local_path = self.in_place_path
+            self.repo = Repo(self.local_path)
+            return
+        
+        self.local_path = self.mirrors.path_for(self.repo_url)
+        self._lock = self.mirrors.lock(self.local_path)
+        if required and self._lock.acquire(shared=True):
+            if self.mirrors.has_commits(self.local_path, required):
                 self.repo = Repo(self.local_path)
                 return
-            except InvalidGitRepositoryError:
-                # Clean up and re-clone
-                shutil.rmtree(self.local_path)
+            self._lock.release()
+        
+        self._lock.acquire()
+        try:
+            # Another sync of this remote may have fetched while we waited
+            if not (required and self.mirrors.has_commits(self.local_path, required)):
+                self._fetch()
+            else:
+                self.repo = Repo(self.local_path)
+        except Exception:
+            self._lock.release()
+            raise
+        # Other syncs of this URL may read along, but not fetch or evict
+        self._lock.acquire(shared=True)
+    
+    def _fetch(self):
+        """
+        Fetch all branches and tags into the mirror, recording time and
+        objects fetched. Must hold the mirror lock exclusively.
+        """
+        created = not os.path.exists(self.local_path)
+        try:
+            if created:
+                self.logger.info(f"Creating mirror of {self.repo_url} in {self.local_path}")
+                self.repo = Repo.init(self.local_path, bare=True)
+            else:
+                self.repo = Repo(self.local_path)
+        except InvalidGitRepositoryError:
+            # Damaged mirror, start over
+            shutil.rmtree(self.local_path)
+            return self._fetch()
         
-        # Create temporary directory for repository
-        self.local_path = tempfile.mkdtemp(prefix='bigteam_git_')
+        if self.reference is not None:
+            self._link_reference(created)
         
+        before = (0, 0) if created else self._count_objects()
         try:
-            auth_url = self._get_auth_url()
-            self.logger.info(f"Cloning repository: {self.repo_url}")
-            
-            # Clone the repository
-            self.repo = Repo.clone_from(auth_url, self.local_path, branch=self.branch)
-            
+            # Credentials are passed on the command line only, never stored
+            # in the mirror's config
+            with self.timer.phase('fetch'):
+                self.repo.git.fetch('--prune', '--quiet', self._get_auth_url(), *MIRROR_REFSPECS)
         except GitCommandError as e:
-            self.logger.error(f"Failed to clone repository: {e}")
-            if self.local_path and os.path.exists(self.local_path):
-                shutil.rmtree(self.local_path)
+            self.logger.error(f"Failed to fetch repository: {e}")
+            self.repo = None
+            if created:
+                shutil.rmtree(self.local_path, ignore_errors=True)
             raise
+        self._count_fetched(before)
+        self._fetched = True
+        if self.path:
+            self._write_commit_graph()
+        self.mirrors.touch(self.local_path)
+    
+    def _link_reference(self, created):
+        """
+        Let the mirror of this fork borrow the objects of its upstream mirror,
+        so that only the objects specific to the fork are fetched and stored.
+        """
+        if self.reference.in_place_path:
+            # Upstream has no mirror; its own repository is not ours to pin
+            return
+        reference_path = self.mirrors.path_for(self.reference.repo_url)
+        if reference_path == self.local_path or reference_path in self.mirrors.alternates(self.local_path):
+            return
+        
+        if not os.path.isdir(reference_path):
+            # Fetch the upstream first, so the fork gets only its own objects
+            self.reference.timer = self.timer
+            try:
+                self.reference._setup_local_repo()
+            finally:
+                self.reference.cleanup()
+        
+        self.logger.info(f"Sharing objects of {self.repo_url} with {self.reference.repo_url}")
+        self.mirrors.link(self.local_path, reference_path)
+        if not created:
+            # Drop the objects the upstream mirror already has
+            self.repo.git.repack('-a', '-d', '-l', '-q')
+    
+    def _write_commit_graph(self):
+        """
+        Add the fetched commits to the commit-graph of the mirror, with
+        changed-path Bloom filters.
+
+        They let ``git rev-list -- <path>`` skip the commits that can't
+        touch the path without diffing their trees. Only new commits are
+        written, as a new layer of a split graph.
+        """
+        try:
+            with self.timer.phase('fetch'):
+                self.repo.git.commit_graph('write', '--reachable', '--changed-paths', '--split')
+        except GitCommandError as e:
+            # Only slower without it
+            self.logger.warning(f"Failed to write commit-graph of {self.local_path}: {e}")
+    
+    def _count_objects(self):
+        """
+        Get the (objects, bytes) stored in the local repository.
+        """
+        stats = dict(line.split(': ', 1)
+                     for line in self.repo.git.count_objects('-v').splitlines())
+        objects = int(stats.get('count', 0)) + int(stats.get('in-pack', 0))
+        size_kib = int(stats.get('size', 0)) + int(stats.get('size-pack', 0))
+        return objects, size_kib * 1024
+    
+    def _count_fetched(self, before):
+        objects, size = self._count_objects()
+        self.timer.count('objects', max(0, objects - before[0]))
+        self.timer.count('bytes', max(0, size - before[1]))
     
     def authenticate(self) -> bool:
         """
@@ -94,77 +280,250 @@ class GitClient(BaseVCSClient):
             self.logger.error(f"Authentication failed: {e}")
             return False
     
+    def tracks(self, name: str) -> bool:
+        """
+        Tell whether branch ``name`` is tracked by this client.
+        """
+        return any(fnmatchcase(name, pattern) for pattern in self.branches)
+    
+    def _local_tips(self) -> Dict[str, str]:
+        """
+        Get the tracked branches of the mirror and their tip SHAs.
+        """
+        output = self.repo.git.for_each_ref(
+            '--format=%(objectname) %(refname)',
+            *[f'refs/heads/{pattern}' for pattern in self.branches])
+        return self._parse_tips(output)
+    
+    def _parse_tips(self, output: str) -> Dict[str, str]:
+        tips = {}
+        for line in output.splitlines():
+            sha, ref = line.split()
+            name = ref[len('refs/heads/'):]
+            if ref.startswith('refs/heads/') and self.tracks(name):
+                tips[name] = sha
+        if not tips:
+            raise ValueError(f"Branch {', '.join(self.branches)} not found in {self.repo_url}")
+        return tips
+    
     def get_latest_revision(self) -> str:
         """
-        Get the latest commit SHA from the specified branch.
+        Get the tips of the tracked branches, see encode_tips().
         """
         if not self.repo:
             self._setup_local_repo()
         
         try:
-            # Update to latest
-            origin = self.repo.remotes.origin
-            origin.pull(self.branch)
-            
-            # Get latest commit SHA
-            latest_commit = self.repo.head.commit
-            return latest_commit.hexsha
+            # The mirror was brought up to date when it was opened
+            with self.timer.phase('head'):
+                return encode_tips(self._local_tips())
             
         except GitCommandError as e:
             self.logger.error(f"Failed to get latest revision: {e}")
             raise
     
-    def get_commits(self, 
-                   start_revision: str = None, 
-                   end_revision: str = None,
-                   since_date: datetime = None) -> List[VCSCommit]:
+    def probe_head(self, remote_heads: Optional[str] = None) -> str:
         """
-        Get commits from the Git repository.
+        Get the tips of the tracked branches with a single ls-remote,
+        without fetching.
+        
+        Args:
+            remote_heads: output of list_remote_heads() for this URL, when
+                several repositories of one remote are probed at once
+        """
+        if remote_heads is None and self.in_place_path:
+            remote_heads = self.list_remote_heads()
+        if remote_heads is not None:
+            return encode_tips(self._parse_tips(remote_heads))
+        with self.timer.phase('head'):
+            output = git.cmd.Git().ls_remote(
+                self._get_auth_url(), *[f'refs/heads/{pattern}' for pattern in self.branches])
+        return encode_tips(self._parse_tips(output))
+    
+    def list_remote_heads(self) -> str:
+        """
+        List every branch of the remote with one ls-remote, for probe_head().
+        
+        A repository on this host lists its branches itself.
+        """
+        with self.timer.phase('head'):
+            if self.in_place_path:
+                return git.cmd.Git(self.in_place_path).for_each_ref(
+                    '--format=%(objectname) %(refname)', 'refs/heads')
+            return git.cmd.Git().ls_remote('--heads', self._get_auth_url())
+    
+    def count_revisions(self, revision: str) -> int:
+        """
+        Count the commits reachable from ``revision`` (tips as returned by
+        get_latest_revision(), or a single SHA). With a path, only commits
+        touching it are counted, as iter_commits() only yields those.
         """
         if not self.repo:
             self._setup_local_repo()
         
-        commits = []
+        paths = [self.path] if self.path else []
+        return int(self.repo.git.rev_list('--count', *decode_tips(revision).values(), '--', *paths))
+    
+    def iter_commits(self, 
+                     start_revision: str = None, 
+                     end_revision: str = None,
+                     since_date: datetime = None) -> Iterator[VCSCommit]:
+        """
+        Iterate over commits from the Git repository.
+        
+        Revisions are tips as returned by get_latest_revision() or single
+        SHAs. Yields every commit reachable from ``end_revision`` (default:
+        the tracked branches) and not from ``start_revision`` exactly once,
+        even when several branches contain it. With a path, only commits
+        touching it are yielded, with the files changed below it.
+        
+        Raises:
+            GitCommandError: if git fails, also after some commits were
+                yielded
+        """
+        if not self.repo:
+            self._setup_local_repo(
+                required=list(decode_tips(end_revision).values()) if end_revision else ())
         
+        count = 0
+        self.read_tips = set()
+        
+        # Build revision range
+        if end_revision:
+            tips = list(decode_tips(end_revision).values())
+        else:
+            tips = list(self._local_tips().values())
+        revisions = list(tips)
+        if start_revision:
+            revisions += [f'^{sha}' for sha in self._existing_tips(start_revision)]
+        paths = [self.path] if self.path else []
+        options = []
+        if since_date and not start_revision:
+            # Git uses ISO format for --since
+            options.append(f"--since={since_date.strftime('%Y-%m-%d')}")
+        
+        # Walk the whole range oldest first, so that every stored batch
+        # is a valid resume point, reading it in pages of GIT_PAGE_SIZE
+        # commits to keep memory bounded however long the history is
+        total = int(self.repo.git.rev_list('--count', *options, *revisions, '--', *paths))
+        shas = iter_revisions(self.local_path, revisions,
+                              '--topo-order', '--reverse', *options, paths=paths)
+        while True:
+            page = list(islice(shas, GIT_PAGE_SIZE))
+            if not page:
+                break
+            for commit in iter_log_revisions(self.local_path, page, paths):
+                commit.author = self.normalize_author(commit.author, commit.author_email)
+                yield commit
+                count += 1
+            if total > GIT_PAGE_SIZE:
+                self.logger.info(f"Read {count}/{total} commits of {self.repo_url}")
+        # All branches are walked at once, so they are all read only now
+        self.read_tips = set(tips)
+        
+        self.logger.info(f"Retrieved {count} commits from Git repository")
+    
+    def _existing_tips(self, revision: str) -> List[str]:
+        """
+        Get the SHAs of ``revision`` the repository still holds.
+
+        A tip rewritten by a force push is gone from a mirror created since,
+        and history can't be read from it; its branch is then read in full
+        and the commits stored before are skipped when storing.
+        """
+        tips = list(decode_tips(revision).values())
+        existing = self.mirrors.existing_commits(self.local_path, tips)
+        for sha in tips:
+            if sha not in existing:
+                self.logger.warning(f"Commit {sha} is gone from {self.repo_url}, "
+                                    f"reading its branch from the start")
+        return [sha for sha in tips if sha in existing]
+    
+    def _is_ancestor(self, sha: str, tip: str) -> bool:
         try:
-            # Update repository
-            origin = self.repo.remotes.origin
-            origin.pull(self.branch)
-            
-            # Build revision range
-            rev_range = self.branch
-            if start_revision and end_revision:
-                rev_range = f"{start_revision}..{end_revision}"
-            elif end_revision:
-                rev_range = end_revision
-            elif since_date:
-                # Git uses ISO format for --since
-                since_str = since_date.strftime('%Y-%m-%d')
-                rev_range = f"{self.branch} --since='{since_str}'"
-            
-            # Get commits
-            for commit in self.repo.iter_commits(rev_range, max_count=1000):
-                vcs_commit = VCSCommit(
-                    revision=commit.hexsha,
-                    author=self.normalize_author(commit.author.name, commit.author.email),
-                    author_email=commit.author.email,
-                    timestamp=datetime.fromtimestamp(commit.committed_date),
-                    message=commit.message.strip(),
-                    files_changed=[item.a_path or item.b_path for item in commit.stats.files.keys()]
-                )
-                commits.append(vcs_commit)
-            
-            self.logger.info(f"Retrieved {len(commits)} commits from Git repository")
-            return commits
-            
+            self.repo.git.merge_base('--is-ancestor', sha, tip)
+            return True
         except GitCommandError as e:
-            self.logger.error(f"Failed to get commits: {e}")
+            if e.status == 1:
+                return False
+            raise
+    
+    def find_orphaned_commits(self, last_known_revision: str, head: str) -> List[str]:
+        """
+        Find the commits a force push removed from the tracked branches.
+        
+        A stored tip still in the history of its branch's new tip was simply
+        fast-forwarded, which one merge-base check per branch tells. Only for
+        the tips that were rewritten or deleted is the diverged segment
+        listed: the commits reachable from the old tip but from none of the
+        new tips.
+        
+        Args:
+            last_known_revision: tips stored by the previous sync
+            head: tips the sync runs up to
+        
+        Returns:
+            list: SHAs of the commits to remove, empty when history was only
+                extended. Commits of old tips that are no longer available
+                can't be listed and are kept.
+        """
+        new_tips = decode_tips(head, self.branch)
+        if not self.repo:
+            self._setup_local_repo(required=list(new_tips.values()))
+        
+        old_tips = decode_tips(last_known_revision, self.branch)
+        existing = self.mirrors.existing_commits(self.local_path, list(old_tips.values()))
+        rewritten = []
+        for branch, sha in old_tips.items():
+            tip = new_tips.get(branch)
+            if sha == tip or sha not in existing:
+                continue
+            if tip is None or not self._is_ancestor(sha, tip):
+                self.logger.info(f"Branch {branch} of {self.repo_url} was rewritten or deleted")
+                rewritten.append(sha)
+        if not rewritten:
             return []
+        
+        paths = [self.path] if self.path else []
+        output = self.repo.git.rev_list(
+            *rewritten, *[f'^{sha}' for sha in new_tips.values()], '--', *paths)
+        return output.split()
+    
+    def iter_new_commits(self, last_known_revision: Optional[str] = None,
+                         head: Optional[str] = None) -> Iterator[VCSCommit]:
+        """
+        Iterate over the commits added since ``last_known_revision``.
+        
+        Args:
+            last_known_revision: tips stored by the previous sync
+            head: tips to sync up to, e.g. from probe_head() (default:
+                the tips of the mirror after fetching)
+        """
+        latest = head or self.get_latest_revision()
+        if last_known_revision == latest:
+            self.read_tips = set(decode_tips(latest).values())
+            return  # No new commits
+        yield from self.iter_commits(start_revision=last_known_revision,
+                                     end_revision=latest)
+    
+    def read_revision(self, head: str) -> Optional[str]:
+        """
+        Get ``head`` if the last iter_commits() walk read the history of all
+        its tips to the end, None otherwise.
+
+        A tip whose history was cut short must not become the watermark,
+        or its missing commits would never be read.
+        """
+        if set(decode_tips(head).values()) <= self.read_tips:
+            return head
+        return None
     
     def test_connection(self) -> bool:
         """
         Test connection to the Git repository.
         """
+        if self.in_place_path:
+            return True
         try:
             # Try to list remote refs
             auth_url = self._get_auth_url()
@@ -176,18 +535,25 @@ class GitClient(BaseVCSClient):
     
     def cleanup(self):
         """
-        Clean up temporary local repository.
+        Release the mirror and, if this client fetched, evict old mirrors
+        when the store is too big.
+        
+        The mirror itself is kept for the next sync. Sizing the store walks
+        every file of every mirror, so syncs that fetched nothing skip it.
         """
-        if self.local_path and os.path.exists(self.local_path):
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+            self.repo = None
+        if self._fetched:
+            self._fetched = False
             try:
-                shutil.rmtree(self.local_path)
-                self.local_path = None
-                self.repo = None
+                self.mirrors.collect_garbage()
             except Exception as e:
-                self.logger.error(f"Failed to cleanup local repository: {e}")
+                self.logger.error(f"Failed to collect Git mirrors: {e}")
     
     def __del__(self):
         """
         Ensure cleanup on object destruction.
         """
-        self.cleanup()
\ No newline at end of file
+        self.cleanup()
@@ -0,0 +1,140 @@
+"""
+Streaming reader of ``git log --numstat`` output.
+
+A single git process lists a page of commits with their changed files and
+line counts. Commits are parsed and yielded as the output arrives,
+instead of running one diff per commit as GitPython's ``commit.stats`` does.
+"""
+
+import subprocess
+from datetime import datetime
+
+from git import GitCommandError
+
+from .base import VCSCommit
+
+# Commits start with a record separator; header fields end with a unit
+# separator, the last one closing the message before the numstat lines
+RECORD_SEPARATOR = b'\x1e'
+FIELD_SEPARATOR = b'\x1f'
+LOG_FORMAT = '%x1e%H%x1f%an%x1f%ae%x1f%ct%x1f%B%x1f'
+
+# Bytes read from git at a time
+READ_SIZE = 64 * 1024
+
+
+def _decode(data):
+    return data.decode('utf-8', errors='replace')
+
+
+def parse_commit(record):
+    """
+    Parse one commit record of the log output into a VCSCommit.
+
+    Added/deleted counts of binary files are reported by git as '-' and
+    count as zero.
+    """
+    sha, name, email, timestamp, message, numstat = record.split(FIELD_SEPARATOR, 5)
+
+    files_changed = []
+    lines_added = lines_deleted = 0
+    for line in numstat.split(b'\n'):
+        if not line:
+            continue
+        added, deleted, path = line.split(b'\t', 2)
+        files_changed.append(_decode(path))
+        if added != b'-':
+            lines_added += int(added)
+            lines_deleted += int(deleted)
+
+    return VCSCommit(
+        revision=_decode(sha),
+        author=_decode(name),
+        author_email=_decode(email),
+        timestamp=datetime.fromtimestamp(int(timestamp)),
+        message=_decode(message).strip(),
+        files_changed=files_changed,
+        lines_added=lines_added,
+        lines_deleted=lines_deleted,
+    )
+
+
+def iter_log_revisions(git_dir, revisions, paths=()):
+    """
+    Stream the given commits of ``git_dir``, in the given order.
+
+    Used to read a long history page by page: the SHAs of a page go to git
+    on stdin, so the command line stays short whatever the page size.
+    Changed files and line counts are limited to ``paths`` if given.
+    """
+    stdin = ''.join(f'{revision}\n' for revision in revisions).encode()
+    return _stream_log(git_dir, ['--no-walk=unsorted', '--stdin', '--', *paths], stdin)
+
+
+def iter_revisions(git_dir, revisions, *options, paths=()):
+    """
+    Stream the SHAs ``git rev-list`` lists for ``revisions``, e.g.
+    ['tip1', 'tip2', '^old'], keeping only commits that touch ``paths``
+    if given.
+
+    Raises:
+        GitCommandError: if git rev-list fails
+    """
+    command = ['git', '-C', str(git_dir), 'rev-list', *options, *revisions, '--', *paths]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for line in process.stdout:
+            yield line.strip().decode()
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise GitCommandError(command, process.returncode, stderr)
+    finally:
+        _close(process)
+
+
+def _stream_log(git_dir, arguments, stdin=None):
+    command = ['git', '-c', 'core.quotepath=off', '-C', str(git_dir), 'log',
+               f'--format={LOG_FORMAT}', '--numstat', '--no-renames',
+               '--diff-merges=first-parent', *arguments]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               stdin=subprocess.PIPE if stdin is not None else None)
+    try:
+        if stdin is not None:
+            # git reads all revisions before printing anything
+            process.stdin.write(stdin)
+            process.stdin.close()
+
+        buffer = bytearray()
+        while True:
+            data = process.stdout.read1(READ_SIZE)
+            if not data:
+                break
+            # Only the new data is searched, so a huge commit arriving in
+            # many reads is not rescanned each time
+            scanned = len(buffer)
+            buffer += data
+            end = buffer.rfind(RECORD_SEPARATOR, scanned)
+            if end < 0:
+                continue
+            # Everything before the last separator is a complete commit
+            for record in bytes(buffer[:end]).split(RECORD_SEPARATOR):
+                if record:
+                    yield parse_commit(record)
+            del buffer[:end + 1]
+        if buffer:
+            yield parse_commit(bytes(buffer))
+
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise GitCommandError(command, process.returncode, stderr)
+    finally:
+        _close(process)
+
+
+def _close(process):
+    if process.poll() is None:
+        # The caller stopped early
+        process.kill()
+        process.wait()
+    process.stdout.close()
+    process.stderr.close()
@@ -0,0 +1,216 @@
+"""
+Persistent store of bare Git mirrors shared by all syncs.
+
+Each remote URL gets one bare repository under the mirror directory. The
+first sync fetches the whole history, later syncs only fetch what changed.
+Mirrors are protected by file locks so that several workers, threads or
+processes, can use the store at once, and the least recently used mirrors
+are evicted when the store grows beyond its size limit.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Refs kept in a mirror: all branches and tags of the remote
+MIRROR_REFSPECS = ['+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*']
+
+
+class MirrorLock:
+    """
+    File lock of one mirror, shared by threads and processes.
+
+    Fetching takes the lock exclusively, reading shares it, so a mirror is
+    never fetched into or evicted while a sync reads it. An exclusive lock
+    can be turned into a shared one without releasing it.
+    """
+
+    def __init__(self, path):
+        self.path = f'{path}.lock'
+        self.handle = None
+
+    def acquire(self, shared=False, blocking=True):
+        """
+        Take the lock, or change the mode of a held lock.
+
+        Returns:
+            bool: False if ``blocking`` is off and the lock is taken
+        """
+        if self.handle is None:
+            self.handle = open(self.path, 'a')
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.handle, operation)
+        except BlockingIOError:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class MirrorStore:
+    """
+    Directory of bare Git mirrors, one per remote URL.
+
+    Args:
+        root: mirror directory (default: BIGTEAM_GIT_MIRROR_DIR)
+        max_size: size in bytes above which least recently used mirrors are
+            evicted (default: BIGTEAM_GIT_MIRROR_MAX_SIZE, 0 for no limit)
+    """
+
+    def __init__(self, root=None, max_size=None):
+        # Settings are read here rather than at import so that tests and
+        # the benchmark can point the store somewhere else
+        self.root = str(root or getattr(settings, 'BIGTEAM_GIT_MIRROR_DIR', None)
+                        or os.path.join(tempfile.gettempdir(), 'bigteam-git-mirrors'))
+        if max_size is None:
+            max_size = getattr(settings, 'BIGTEAM_GIT_MIRROR_MAX_SIZE', 0)
+        self.max_size = max_size
+
+    def path_for(self, url):
+        """
+        Get the mirror directory of a remote URL.
+
+        The name keeps the last part of the URL for humans and a hash of the
+        whole URL for uniqueness.
+        """
+        name = re.sub(r'[^A-Za-z0-9._-]+', '_', url.rstrip('/').rsplit('/', 1)[-1])
+        name = name[:-4] if name.endswith('.git') else name
+        digest = hashlib.sha1(url.encode()).hexdigest()[:12]
+        return os.path.join(self.root, f'{name}-{digest}.git')
+
+    def lock(self, path):
+        """Get the lock of the mirror at ``path``."""
+        os.makedirs(self.root, exist_ok=True)
+        return MirrorLock(path)
+
+    def touch(self, path):
+        """Mark the mirror at ``path`` as used now."""
+        os.utime(path)
+
+    def has_commits(self, path, shas):
+        """
+        Tell whether the mirror at ``path`` holds all the given commits.
+        """
+        return self.existing_commits(path, shas) == set(shas)
+
+    def existing_commits(self, path, shas):
+        """
+        Get the given commits the repository at ``path`` holds, as a set.
+        """
+        if not os.path.isdir(path):
+            return set()
+        result = subprocess.run(['git', '-C', path, 'cat-file', '--batch-check'],
+                                input=''.join(f'{sha}\n' for sha in shas),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return set()
+        # '<sha> commit <size>', or '<sha> missing'
+        return {line.split()[0] for line in result.stdout.splitlines()
+                if line.split()[1:2] == ['commit']}
+
+    def alternates(self, path):
+        """
+        Get the mirrors whose objects the mirror at ``path`` borrows.
+        """
+        try:
+            with open(os.path.join(path, 'objects', 'info', 'alternates')) as handle:
+                return [os.path.dirname(line.strip().rstrip('/'))
+                        for line in handle if line.strip()]
+        except OSError:
+            return []
+
+    def link(self, path, reference_path):
+        """
+        Make the mirror at ``path`` borrow objects from ``reference_path``.
+
+        Used for forks: objects they share with their upstream are then
+        stored and fetched once, in the upstream mirror. That mirror must
+        never prune objects, as a fork may still reference them after a
+        force push upstream.
+        """
+        subprocess.run(['git', '-C', reference_path, 'config', 'gc.pruneExpire', 'never'],
+                       check=True)
+        alternates = self.alternates(path) + [reference_path]
+        with open(os.path.join(path, 'objects', 'info', 'alternates'), 'w') as handle:
+            handle.writelines(f'{os.path.join(mirror, "objects")}\n' for mirror in alternates)
+
+    def size(self, path):
+        """Get the disk usage of a mirror in bytes."""
+        total = 0
+        for directory, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(directory, name)).st_size
+                except OSError:
+                    pass  # removed by a concurrent git gc
+        return total
+
+    def mirrors(self):
+        """
+        List the mirrors of the store, least recently used first.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        paths = [os.path.join(self.root, name) for name in os.listdir(self.root)
+                 if name.endswith('.git')]
+        return sorted(paths, key=os.path.getmtime)
+
+    def collect_garbage(self):
+        """
+        Evict least recently used mirrors until the store fits in max_size.
+
+        Mirrors in use and mirrors whose objects forks borrow are skipped;
+        they are evicted by a later collection if the store is still too big.
+
+        Returns:
+            list: paths of the evicted mirrors
+        """
+        if not self.max_size:
+            return []
+
+        mirrors = self.mirrors()
+        # Mirrors lending objects to forks go only after the forks
+        referenced = {reference for path in mirrors for reference in self.alternates(path)}
+        sizes = {path: self.size(path) for path in mirrors}
+        total = sum(sizes.values())
+        evicted = []
+        for path in mirrors:
+            if total <= self.max_size:
+                break
+            if path in referenced:
+                continue
+            lock = self.lock(path)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                lock.release()
+            total -= sizes[path]
+            evicted.append(path)
+            logger.info(f'Evicted Git mirror {path} ({sizes[path]} bytes)')
+        return evicted
@@ -2,32 +2,63 @@
 SVN VCS client implementation - wrapper around existing SVN code.
 """
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
 import logging
 
 try:
-    from ..svnclient.svnlogclient import SVNLogClient as OriginalSVNClient
+    from ..svnclient.svnlogclient import LRUCache, SVNLogClient as OriginalSVNClient
     from ..svnclient.svnlogiter import SVNRevLogIter
     SVN_AVAILABLE = True
 except ImportError:
     SVN_AVAILABLE = False
 
+from django.conf import settings
+
 from .base import BaseVCSClient, VCSCommit
+from .svn_look import SVNLook
 
 logger = logging.getLogger(__name__)
 
+# Node kinds (file or directory) of (path, revision) pairs the log did not
+# report, shared by all syncs of this process since they never change
+PATH_KIND_CACHE_SIZE = getattr(settings, 'BIGTEAM_SVN_PATH_KIND_CACHE_SIZE', 100000)
+PATH_KINDS = LRUCache(PATH_KIND_CACHE_SIZE) if SVN_AVAILABLE else None
+
+# Binary flags of (file, last changed revision) pairs, shared the same way
+MIME_TYPE_CACHE_SIZE = getattr(settings, 'BIGTEAM_SVN_MIME_TYPE_CACHE_SIZE', 100000)
+MIME_TYPES = LRUCache(MIME_TYPE_CACHE_SIZE) if SVN_AVAILABLE else None
+
+# Files above this size in bytes are not line counted (0: count every file)
+LINE_COUNT_MAX_SIZE = getattr(settings, 'BIGTEAM_SVN_LINE_COUNT_MAX_SIZE', 50 * 1024 ** 2)
+
+# Largest window of revisions read with one svn log request
+LOG_MAX_WINDOW = getattr(settings, 'BIGTEAM_SVN_LOG_MAX_WINDOW', 5000)
+
+# Server certificate failures svn accepts, e.g. 'unknown-ca,not-yet-valid'
+TRUST_SERVER_CERT_FAILURES = getattr(settings, 'BIGTEAM_SVN_TRUST_SERVER_CERT_FAILURES',
+                                     'not-yet-valid')
+
 
 class SVNClient(BaseVCSClient):
     """
     SVN repository client implementation - wraps existing SVN functionality.
     """
     
-    def __init__(self, repo_url: str, username: str = '', password: str = ''):
+    def __init__(self, repo_url: str, username: str = '', password: str = '',
+                 in_place: Optional[bool] = None):
         super().__init__(repo_url, username, password)
         self.svn_client = None
+        # Reader of the repository when it is on this host
+        if in_place is None:
+            # Not read at import, as in GitClient
+            in_place = getattr(settings, 'BIGTEAM_READ_LOCAL_IN_PLACE', True)
+        if in_place:
+            self.svnlook = SVNLook.open(repo_url)
+        else:
+            self.svnlook = None
         
-        if not SVN_AVAILABLE:
+        if self.svnlook is None and not SVN_AVAILABLE:
             raise ImportError("SVN client modules are not available")
     
     def _get_svn_client(self):
@@ -38,18 +69,26 @@ class SVNClient(BaseVCSClient):
             self.svn_client = OriginalSVNClient(
                 self.repo_url, 
                 username=self.username, 
-                password=self.password
+                password=self.password,
+                kindcache=PATH_KINDS,
+                mimecache=MIME_TYPES,
+                maxlinecountsize=LINE_COUNT_MAX_SIZE,
+                trustfailures=TRUST_SERVER_CERT_FAILURES
             )
         return self.svn_client
     
+    def _get_head_revision(self) -> int:
+        if self.svnlook is not None:
+            return self.svnlook.youngest()
+        return self._get_svn_client().getHeadRevNo()
+    
     def authenticate(self) -> bool:
         """
         Test authentication with SVN server.
         """
         try:
-            client = self._get_svn_client()
             # Try to get head revision as authentication test
-            client.getHeadRevNo()
+            self._get_head_revision()
             return True
         except Exception as e:
             self.logger.error(f"SVN authentication failed: {e}")
@@ -60,78 +99,96 @@ class SVNClient(BaseVCSClient):
         Get the latest revision number from SVN.
         """
         try:
-            client = self._get_svn_client()
-            rev_no = client.getHeadRevNo()
-            return str(rev_no)
+            return str(self._get_head_revision())
         except Exception as e:
             self.logger.error(f"Failed to get latest SVN revision: {e}")
             raise
     
-    def get_commits(self, 
-                   start_revision: Optional[str] = None, 
-                   end_revision: Optional[str] = None,
-                   since_date: Optional[datetime] = None) -> List[VCSCommit]:
+    def probe_head(self) -> str:
+        """
+        Get the head revision with a single log request.
+        """
+        with self.timer.phase('head'):
+            return str(self._get_head_revision())
+    
+    def count_revisions(self, revision: str) -> int:
+        """
+        SVN revisions are numbered from 1, so the count is the number itself.
+        """
+        return int(revision)
+    
+    def iter_commits(self, 
+                     start_revision: Optional[str] = None, 
+                     end_revision: Optional[str] = None,
+                     since_date: Optional[datetime] = None) -> Iterator[VCSCommit]:
         """
-        Get commits from SVN repository.
+        Iterate over commits from SVN repository.
+        
+        Errors are raised, also after some commits were yielded, so that a
+        fetch failing halfway is not mistaken for the end of the range.
         """
-        commits = []
+        count = 0
         
-        try:
-            client = self._get_svn_client()
-            
-            # Convert string revisions to integers
-            start_rev = int(start_revision) if start_revision else None
-            end_rev = int(end_revision) if end_revision else None
-            
-            if not start_rev and not end_rev:
-                # Get recent commits if no range specified
-                latest_rev = client.getHeadRevNo()
-                start_rev = max(1, latest_rev - 100)  # Last 100 commits
-                end_rev = latest_rev
-            elif not start_rev:
-                start_rev = 1
-            elif not end_rev:
-                end_rev = client.getHeadRevNo()
-            
-                         # Use existing SVN iterator
-             svn_logs = SVNRevLogIter(client, start_rev, end_rev)
-             
-             for rev_log in svn_logs:
-                 if rev_log.isvalid():
-                     # Get changed file paths
-                     changed_files = []
-                     try:
-                         for change_entry in rev_log.getChangeEntries():
-                             changed_files.append(change_entry.filepath())
-                     except:
-                         changed_files = []
-                     
-                     # Convert SVN log to VCSCommit
-                     vcs_commit = VCSCommit(
-                         revision=str(rev_log.revno),
-                         author=self.normalize_author(str(rev_log.author)),
-                         author_email='',  # SVN doesn't typically have emails
-                         timestamp=rev_log.date,
-                         message=str(rev_log.message),
-                         files_changed=changed_files
-                     )
-                     commits.append(vcs_commit)
-            
-            self.logger.info(f"Retrieved {len(commits)} commits from SVN repository")
-            return commits
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get SVN commits: {e}")
-            return []
+        # Convert string revisions to integers
+        start_rev = int(start_revision) if start_revision else None
+        end_rev = int(end_revision) if end_revision else None
+        
+        if not start_rev and not end_rev:
+            # Get recent commits if no range specified
+            latest_rev = self._get_head_revision()
+            start_rev = max(1, latest_rev - 100)  # Last 100 commits
+            end_rev = latest_rev
+        elif not start_rev:
+            start_rev = 1
+        elif not end_rev:
+            end_rev = self._get_head_revision()
+        
+        # Reading the log is charged to the fetch phase
+        if self.svnlook is not None:
+            commits = self.svnlook.iter_commits(start_rev, end_rev)
+        else:
+            commits = self._iter_log_commits(start_rev, end_rev)
+        
+        for commit in self.timer.iterate(commits, 'fetch'):
+            commit.author = self.normalize_author(commit.author)
+            yield commit
+            count += 1
+        
+        self.logger.info(f"Retrieved {count} commits from SVN repository")
+    
+    def _iter_log_commits(self, start_rev: int, end_rev: int) -> Iterator[VCSCommit]:
+        """
+        Iterate over commits through the svn client.
+        """
+        # Use existing SVN iterator; it prefetches logs in adaptive windows
+        svn_logs = SVNRevLogIter(self._get_svn_client(), start_rev, end_rev,
+                                 maxcachesize=LOG_MAX_WINDOW)
+        
+        for rev_log in svn_logs:
+            if rev_log.isvalid():
+                # Get changed file paths
+                changed_files = [change_entry.filepath()
+                                 for change_entry in rev_log.getChangeEntries()]
+                
+                # Convert SVN log to VCSCommit
+                yield VCSCommit(
+                    revision=str(rev_log.revno),
+                    author=str(rev_log.author),
+                    author_email='',  # SVN doesn't typically have emails
+                    # Naive UTC in the log; aware, so Django doesn't
+                    # take it for local time
+                    timestamp=rev_log.date.replace(tzinfo=timezone.utc),
+                    message=str(rev_log.message),
+                    files_changed=changed_files
+                )
     
     def test_connection(self) -> bool:
         """
         Test connection to SVN repository.
         """
         try:
-            client = self._get_svn_client()
             # Try to get repository info
-            client.getHeadRevNo()
+            self._get_head_revision()
             return True
         except Exception as e:
             self.logger.error(f"SVN connection test failed: {e}")
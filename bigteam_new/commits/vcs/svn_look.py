@@ -0,0 +1,115 @@
+"""
+Reader of Subversion repositories stored on this host.
+
+Only the head probe opens the repository files directly, with ``svnlook
+youngest``. The log and changed paths come from a single ``svn log --xml``
+over a ``file://`` URL, which goes through the RA layer like the remote
+path: in-place reading differs from it only in the head probe, and in
+reading the whole range with one streamed command instead of windows.
+"""
+
+import os
+import shutil
+import subprocess
+from datetime import timezone
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from ..svnclient.svnlogclient import SVNLogClient
+from .base import VCSCommit, local_repository_path
+
+# svnlook prints paths in the locale's encoding
+SVNLOOK_ENV = {**os.environ, 'LC_ALL': 'C.UTF-8'}
+
+
+def find_svn_repository(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Split the URL of a repository stored on this host into the repository
+    directory and the path inside it, e.g. ('/srv/svn/repo', 'trunk').
+
+    Returns:
+        tuple: (directory, path), or None if ``url`` is not in a local
+            repository
+    """
+    path = local_repository_path(url)
+    if not path:
+        return None
+    path = os.path.normpath(path)
+    inner = []
+    while True:
+        if (os.path.isfile(os.path.join(path, 'format'))
+                and os.path.isdir(os.path.join(path, 'db'))):
+            return path, '/'.join(reversed(inner))
+        parent, name = os.path.split(path)
+        if parent == path:
+            return None
+        inner.append(name)
+        path = parent
+
+
+class SVNLook:
+    """
+    Head probe and log reader of a local Subversion repository.
+
+    Args:
+        repository: repository directory
+        path: path inside the repository the URL points at; revisions
+            changing nothing below it are skipped
+    """
+
+    def __init__(self, repository: str, path: str = ''):
+        self.repository = repository
+        self.path = path.strip('/')
+        # Local repositories need no credentials
+        self.log_client = SVNLogClient('file://' + quote(os.path.abspath(repository)))
+
+    @classmethod
+    def open(cls, url: str) -> Optional['SVNLook']:
+        """
+        Get a reader for ``url``, or None if it is not a local repository
+        or svnlook and svn are not installed.
+        """
+        location = find_svn_repository(url)
+        if location is None or shutil.which('svnlook') is None or shutil.which('svn') is None:
+            return None
+        return cls(*location)
+
+    def _run(self, command: str) -> str:
+        result = subprocess.run(['svnlook', command, self.repository], capture_output=True,
+                                env=SVNLOOK_ENV, check=True)
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def youngest(self) -> int:
+        """Get the head revision number."""
+        return int(self._run('youngest'))
+
+    def _in_scope(self, path: str) -> bool:
+        inner = path.lstrip('/')
+        return not self.path or inner == self.path or inner.startswith(self.path + '/')
+
+    def iter_commits(self, start_revision: int, end_revision: int) -> Iterator[VCSCommit]:
+        """
+        Yield the revisions from ``start_revision`` to ``end_revision``
+        (inclusive) that change the repository path, oldest first.
+
+        The whole range is read by one ``svn log`` of the repository root,
+        streamed as it runs.
+
+        Raises:
+            SVNError: if svn fails, also after some commits were yielded
+        """
+        url = self.log_client.svnrepourl
+        for entry in self.log_client.iterLogs(start_revision, end_revision,
+                                              detailedLog=True, url=url):
+            files_changed = [change['path'] for change in entry.changed_paths
+                             if self._in_scope(change['path'])]
+            if self.path and not files_changed:
+                continue
+            yield VCSCommit(
+                revision=str(entry.revno),
+                author=entry.author,
+                # svn log dates are naive UTC, see SVNClient._iter_log_commits()
+                timestamp=entry.date.replace(tzinfo=timezone.utc),
+                message=entry.message.strip(),
+                files_changed=files_changed,
+            )
@@ -4,7 +4,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Sum, Count
 from django.contrib import messages
 import datetime
-from .models import Repository, Author, CommitLog, UpdateRepositories
+from .models import Repository, Author, CommitLog, SyncJob
 
 
 def home(request):
@@ -58,22 +58,15 @@ def person(request, person_id):
 
 
 def update_all(request):
-    """Update all repositories by fetching new commits."""
-    try:
-        updated_count, failed_count = UpdateRepositories()
-        
-        if failed_count == 0:
-            messages.success(
-                request, 
-                f'Successfully updated {updated_count} repositories.'
-            )
-        else:
-            messages.warning(
-                request,
-                f'Updated {updated_count} repositories successfully, '
-                f'{failed_count} failed. Check logs for details.'
-            )
-    except Exception as e:
-        messages.error(request, f'Error updating repositories: {e}')
+    """Queue a sync of all repositories; the sync_worker command runs them."""
+    jobs = SyncJob.enqueue(Repository.objects.all())
+    
+    if jobs:
+        messages.success(
+            request,
+            f'Queued {len(jobs)} repositories for update.'
+        )
+    else:
+        messages.info(request, 'All repositories are already queued for update.')
 
     return redirect('commits:home')